@@ -0,0 +1,117 @@
+"""
+Simulated booking days comparing therapist assignment policies: "first"
+(the patient takes the first free therapist listed, what the picker led to)
+and "scored" (services.assignment.assignment_score, what 🤖 Pilihkan Otomatis
+and AUTO_ASSIGN_THERAPIST use).
+
+Each day starts empty. Patients arrive with a random treatment, pick a
+random start among the times offered for it (slot_engine gap-fitting over
+every therapist), and the policy picks the therapist. The day ends after
+--patience patients in a row found nothing. Reported per day: bookings,
+booked minutes (share of open time), and minutes stranded in gaps too short
+for the shortest treatment. Runs in memory (schedule store + slot engine),
+no database.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_assignment
+    python -m benchmarks.bench_assignment --therapists 4 --treatments 40,60,90 --days 300
+"""
+import argparse
+import random
+import statistics
+from datetime import date, timedelta
+from typing import Dict, List
+
+from services.assignment import assignment_score
+from services.earliest_slots import free_intervals
+from services.schedule_store import ScheduleStore
+from services.slot_engine import OpenDay
+
+FIRST_DAY = date(2099, 1, 5)
+
+
+def simulate_day(policy: str, day_date: date, therapists: int, durations: List[int], rnd: random.Random,
+                 patience: int) -> Dict[str, int]:
+    store = ScheduleStore()
+    store.load([], [])
+    days = {d: OpenDay(day_date, d) for d in durations}
+    any_day = days[durations[0]]
+    window_start, window_end = any_day.windows[0][0], any_day.windows[-1][1]
+    min_session = min(durations) * 60
+    bookings = booked = misses = next_id = 0
+
+    while misses < patience:
+        duration = rnd.choice(durations)
+        day = days[duration]
+        fits = {t: set(day.fit(free_intervals(store.busy(t, window_start, window_end), window_start, window_end))[0])
+                for t in range(therapists)}
+        offered = sorted(set().union(*fits.values()))
+        if not offered:
+            misses += 1
+            continue
+        misses = 0
+        start = rnd.choice(offered)
+        end = start + duration * 60
+        candidates = [t for t in range(therapists) if start in fits[t]]
+        if policy == "first":
+            therapist = candidates[0]
+        else:
+            window = next((o, c) for o, c in day.windows if o <= start < c)
+
+            def key(t):
+                before, after = store.neighbours(t, start, end)
+                return assignment_score(start, end, window, before, after, store.day_load(t, start), min_session) + (t,)
+
+            therapist = min(candidates, key=key)
+        next_id += 1
+        store.add(next_id, therapist, start, end)
+        bookings += 1
+        booked += duration
+
+    stranded = 0
+    for t in range(therapists):
+        for opens, closes in any_day.windows:
+            for start, end in free_intervals(store.busy(t, opens, closes), opens, closes):
+                if end - start < min_session:
+                    stranded += (end - start) // 60
+    open_minutes = sum(c - o for o, c in any_day.windows) // 60 * therapists
+    return {"bookings": bookings, "booked": booked, "open": open_minutes, "stranded": stranded}
+
+
+def run(therapists: int, durations: List[int], days: int, patience: int, seed: int) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for policy in ("first", "scored"):
+        rnd = random.Random(seed)
+        results = [simulate_day(policy, FIRST_DAY + timedelta(days=i % 5), therapists, durations, rnd, patience)
+                   for i in range(days)]
+        report[policy] = {
+            "bookings": statistics.mean(r["bookings"] for r in results),
+            "booked_share": statistics.mean(r["booked"] / r["open"] for r in results),
+            "stranded": statistics.mean(r["stranded"] for r in results),
+        }
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bookings per day: first-listed vs scored therapist assignment")
+    parser.add_argument("--therapists", type=int, default=3, help="therapists of the patient's gender (default 3)")
+    parser.add_argument("--treatments", default="40,60", help="treatment durations in minutes (default 40,60)")
+    parser.add_argument("--days", type=int, default=200, help="simulated days per policy (default 200)")
+    parser.add_argument("--patience", type=int, default=30, help="failed patients in a row that end a day")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    durations = [int(m) for m in args.treatments.split(",")]
+    report = run(args.therapists, durations, args.days, args.patience, args.seed)
+    print(f"{'policy':<10}{'bookings/day':>14}{'booked %':>10}{'stranded min':>14}")
+    for policy, r in report.items():
+        print(f"{policy:<10}{r['bookings']:>14.2f}{r['booked_share'] * 100:>9.1f}%{r['stranded']:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
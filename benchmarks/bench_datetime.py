@@ -0,0 +1,149 @@
+"""
+Microbenchmarks for utils/datetime_helper: per-call cost of parsing and
+formatting the slot timestamps the bot renders on every screen.
+
+Each case runs the current helper against a copy of the previous
+implementation (pytz timezone, `fromisoformat` + `astimezone` on every
+call, no caching) over the same workload: the slot grid of the next
+--days days, i.e. the strings the calendar, therapist list, "my
+appointments" and availability checks parse over and over. "miss" cases
+clear the caches first to show the cost of a value seen for the first time.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_datetime
+    python -m benchmarks.bench_datetime --days 30 --repeat 7 --json datetime.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import pytz
+
+from utils import datetime_helper as dh
+
+LEGACY_TZ = pytz.timezone('Asia/Jakarta')
+
+
+# --- previous implementation, kept verbatim as the baseline ---
+
+def legacy_from_iso(iso_str: str) -> datetime:
+    if not iso_str:
+        return datetime.now(LEGACY_TZ)
+    dt = datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        return LEGACY_TZ.localize(dt)
+    return dt.astimezone(LEGACY_TZ)
+
+
+def legacy_format_datetime_id(iso_str: str) -> str:
+    dt = legacy_from_iso(iso_str)
+    weekday = dh.WEEKDAY_NAMES_ID[dt.weekday()]
+    return f"{weekday}, {dt.day:02d}-{dt.month:02d}-{dt.year} pukul {dt.hour:02d}:{dt.minute:02d} WIB"
+
+
+def legacy_format_datetime_short(iso_str: str) -> str:
+    dt = legacy_from_iso(iso_str)
+    return f"{dt.day:02d}-{dt.month:02d}-{dt.year} {dt.hour:02d}:{dt.minute:02d}"
+
+
+def legacy_overlaps(start1: datetime, duration1: int, start2_iso: str, duration2: int) -> bool:
+    start2 = legacy_from_iso(start2_iso)
+    end1 = start1 + timedelta(minutes=duration1)
+    end2 = start2 + timedelta(minutes=duration2)
+    return start1 < end2 and start2 < end1
+
+
+def slot_grid(days: int) -> List[str]:
+    """Slot ISO strings as generate_time_slots() produces them (08:00-17:00 every 30 min)."""
+    start = dh.now_jakarta().replace(hour=8, minute=0, second=0, microsecond=0)
+    return [(start + timedelta(days=d, minutes=30 * i)).isoformat() for d in range(days) for i in range(18)]
+
+
+def clear_caches():
+    dh._parse_iso.cache_clear()
+    dh._format_id.cache_clear()
+    dh._format_short.cache_clear()
+
+
+def per_call_ns(fn: Callable[[], None], calls: int, repeat: int, before: Callable[[], None] = None) -> float:
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        samples.append(timeit.timeit(fn, number=1) / calls * 1e9)
+    return statistics.median(samples)
+
+
+def run(days: int, repeat: int) -> Dict[str, dict]:
+    slots = slot_grid(days)
+    utc_slots = [dh.from_iso(s).astimezone(pytz.utc).isoformat().replace('+00:00', 'Z') for s in slots]
+    naive_slots = [s[:19] for s in slots]
+    anchor = dh.from_iso(slots[len(slots) // 2])
+    calls = len(slots)
+
+    def loop(fn, values):
+        return lambda: [fn(v) for v in values]
+
+    cases = {
+        "from_iso[+07:00]": (loop(legacy_from_iso, slots), loop(dh.from_iso, slots)),
+        "from_iso[Z]": (loop(legacy_from_iso, utc_slots), loop(dh.from_iso, utc_slots)),
+        "from_iso[naive]": (loop(legacy_from_iso, naive_slots), loop(dh.from_iso, naive_slots)),
+        "format_datetime_id": (loop(legacy_format_datetime_id, slots), loop(dh.format_datetime_id, slots)),
+        "format_datetime_short": (loop(legacy_format_datetime_short, slots), loop(dh.format_datetime_short, slots)),
+        "slot_label": (loop(lambda s: legacy_from_iso(s).strftime("%H:%M"), slots),
+                       loop(lambda s: dh.from_iso(s).strftime("%H:%M"), slots)),
+        "overlaps": (loop(lambda s: legacy_overlaps(anchor, 60, s, 60), slots),
+                     loop(lambda s: dh.overlaps(anchor, 60, s, 60), slots)),
+    }
+
+    report = {}
+    for name, (legacy, current) in cases.items():
+        before_ns = per_call_ns(legacy, calls, repeat)
+        clear_caches()
+        current()  # warm: the bot renders the same slot grid again and again
+        after_ns = per_call_ns(current, calls, repeat)
+        miss_ns = per_call_ns(current, calls, repeat, before=clear_caches)
+        report[name] = {
+            "before_ns": round(before_ns, 1),
+            "after_ns": round(after_ns, 1),
+            "after_miss_ns": round(miss_ns, 1),
+            "speedup": round(before_ns / after_ns, 2),
+        }
+    report["_workload"] = {"slots": calls, "repeat": repeat, "caches": dh.iso_cache_info()}
+    return report
+
+
+def print_report(report: Dict[str, dict]):
+    print(f"{'case':<24}{'before ns':>12}{'after ns':>12}{'miss ns':>12}{'speedup':>10}")
+    for name, r in report.items():
+        if name.startswith("_"):
+            continue
+        print(f"{name:<24}{r['before_ns']:>12.1f}{r['after_ns']:>12.1f}{r['after_miss_ns']:>12.1f}{r['speedup']:>9.2f}x")
+    print(f"\n{report['_workload']['slots']} slot timestamps per call batch, median of {report['_workload']['repeat']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-call cost of datetime parsing/formatting, before vs after")
+    parser.add_argument("--days", type=int, default=14, help="days of slots in the workload (default 14)")
+    parser.add_argument("--repeat", type=int, default=9, help="batches to take the median over")
+    parser.add_argument("--json", help="also write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args.days, args.repeat)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,539 @@
+"""
+Scale benchmarks for database/db.py and the availability paths built on it.
+
+Generates (or reuses) synthetic databases at several appointment volumes and
+times every Database method plus the user-facing availability paths (month
+calendar, therapist list for a date) and the admin CSV export. Output follows
+pytest-benchmark's layout: min / max / mean / stddev / median / ops per case,
+grouped by scale.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_db                       # 1k, 100k, 1M
+    python -m benchmarks.bench_db --scales 1k,100k --filter therapist_free
+    python -m benchmarks.bench_db --json after.json --compare before.json
+
+Generated databases are cached in --data-dir and reused between runs; pass
+--regenerate after changing the generator or the schema.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def _prepare_environment():
+    """config.py validates at import time; make sure it has what it needs."""
+    os.environ.setdefault("TOKEN", "123456:BENCH")
+    os.environ.setdefault("ADMIN_IDS", "1")
+    os.environ.pop("OPENAI_API_KEY", None)
+
+
+def parse_scale(text: str) -> int:
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1_000_000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def scale_label(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}M"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+class Case:
+    """One benchmark: an async callable, plus an optional per-round setup that returns its arguments."""
+
+    def __init__(self, name: str, fn: Callable[..., Awaitable], setup: Optional[Callable[[], Awaitable[tuple]]] = None):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+
+
+async def run_case(case: Case, min_rounds: int, min_time: float, max_time: float) -> dict:
+    timings: List[float] = []
+    error = None
+    spent = 0.0
+    while len(timings) < min_rounds or (spent < min_time and spent < max_time):
+        args = await case.setup() if case.setup else ()
+        started = time.perf_counter()
+        try:
+            await case.fn(*args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        spent += elapsed
+        if spent >= max_time:
+            break
+
+    if not timings:
+        return {"name": case.name, "rounds": 0, "error": error}
+    return {
+        "name": case.name,
+        "rounds": len(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "median": statistics.median(timings),
+        "ops": len(timings) / spent if spent else None,
+        "error": error,
+    }
+
+
+# --- availability paths (same loops as handlers/user.py and handlers/admin.py) ---
+
+async def month_calendar(database, year: int, month: int, max_days_ahead: int):
+    """show_calendar: one generate_time_slots call per open day in the booking window."""
+    import calendar
+    from utils.datetime_helper import generate_time_slots
+
+    today = date.today()
+    max_date = today + timedelta(days=max_days_ahead)
+    closed_dates = await database.get_month_holidays(year, month)
+    available = set()
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        check_date = date(year, month, day)
+        if check_date < today or check_date > max_date or check_date in closed_dates:
+            continue
+        if await generate_time_slots(check_date):
+            available.add(check_date)
+    return available
+
+
+async def therapists_for_date(database, date_obj: date, gender: str, session_minutes: int):
+    """view_therapists_for_date before gap-fitting: every slot of the day checked against every therapist."""
+    from utils.datetime_helper import generate_time_slots
+
+    therapists = await database.get_therapists(active_only=True)
+    slots = await generate_time_slots(date_obj)
+    availability = {}
+    for t in therapists:
+        if t.gender != gender:
+            continue
+        availability[t.id] = [s for s in slots if await database.therapist_free(t.id, s, session_minutes)]
+    return availability
+
+
+async def therapist_starts(database, date_obj: date, gender: str, session_minutes: int):
+    """view_therapists_for_date: services.slot_engine gap-fitting, one busy lookup per therapist."""
+    from services.slot_engine import therapist_starts as fit
+
+    therapist_ids = [t.id for t in await database.get_therapists(active_only=True) if t.gender == gender]
+    return await fit(therapist_ids, date_obj, session_minutes)
+
+
+async def group_starts(database, date_obj: date, session_minutes: int):
+    """Booking Keluarga: a 2 female + 1 male group, every start where a therapist matching exists."""
+    from services.group_booking import GroupMember, find_group_starts
+
+    members = [GroupMember("Perempuan", session_minutes), GroupMember("Perempuan", session_minutes),
+               GroupMember("Laki-laki", session_minutes)]
+    return await find_group_starts(members, date_obj, await database.get_therapists(active_only=True))
+
+
+async def earliest_slots_scan(database, gender: str, limit: int, max_days_ahead: int, session_minutes: int):
+    """Jadwal Tercepat done naively: day by day, every slot against every therapist, until `limit` hits."""
+    from utils.datetime_helper import generate_time_slots
+
+    therapists = [t for t in await database.get_therapists(active_only=True) if t.gender == gender]
+    hits = []
+    today = date.today()
+    for offset in range(max_days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if await database.is_weekly_holiday(day) or await database.is_date_holiday(day):
+            continue
+        for slot in await generate_time_slots(day):
+            for t in therapists:
+                if await database.therapist_free(t.id, slot, session_minutes):
+                    hits.append((slot, t.id))
+                    if len(hits) == limit:
+                        return hits
+    return hits
+
+
+async def earliest_slots(database, gender: str, limit: int):
+    """services.earliest_slots, pointed at this scale's database (it binds the db singleton on import)."""
+    import services.earliest_slots as service
+
+    service.db = database
+    return await service.find_earliest_slots(gender, limit)
+
+
+async def export_csv(database) -> bytes:
+    """admin_export_callback without the Telegram upload."""
+    appointments = await database.get_appointments(include_archive=True)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['ID', 'User ID', 'Nama Pasien', 'Gender', 'Alamat', 'Terapis', 'Waktu', 'Durasi', 'Status', 'Dibuat'])
+    for appt in appointments:
+        writer.writerow([
+            appt.id, appt.user_id, appt.user_name, appt.patient_gender, appt.patient_address,
+            appt.therapist_name, appt.start_dt, appt.duration_min, appt.status, appt.created_at
+        ])
+    return output.getvalue().encode('utf-8')
+
+
+# --- case catalogue ---
+
+async def _fixtures(database) -> dict:
+    """Pick representative ids, users and dates from the generated data."""
+    conn = database.conn
+    row = await (await conn.execute(
+        "SELECT user_id, COUNT(*) FROM appointments GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1"
+    )).fetchone()
+    heavy_user = row[0] if row else 1
+    row = await (await conn.execute(
+        "SELECT user_id FROM appointments GROUP BY user_id ORDER BY COUNT(*) ASC LIMIT 1"
+    )).fetchone()
+    light_user = row[0] if row else 1
+
+    today = date.today()
+    target = today + timedelta(days=7)
+    while await database.is_weekly_holiday(target) or await database.is_date_holiday(target):
+        target += timedelta(days=1)
+
+    row = await (await conn.execute(
+        "SELECT therapist_id, start_dt FROM appointments WHERE status = 'confirmed' AND start_dt > ? ORDER BY start_dt LIMIT 1",
+        (f"{today.isoformat()}T23:59",)
+    )).fetchone()
+    busy_therapist, busy_slot = (row[0], row[1]) if row else (1, f"{target.isoformat()}T09:00:00+07:00")
+
+    row = await (await conn.execute("SELECT MAX(id) FROM appointments")).fetchone()
+    last_appt = row[0] or 1
+    row = await (await conn.execute("SELECT MIN(id) FROM waitlist")).fetchone()
+    waitlist_id = row[0] or 1
+
+    return {
+        "heavy_user": heavy_user,
+        "light_user": light_user,
+        "target_date": target,
+        "busy_therapist": busy_therapist,
+        "busy_slot": busy_slot,
+        "free_slot": f"{target.isoformat()}T23:00:00+07:00",
+        "appointment_id": last_appt // 2 or 1,
+        "waitlist_id": waitlist_id,
+    }
+
+
+def build_cases(database, fx: dict, config) -> Tuple[List[Case], Callable[[], Awaitable]]:
+    """Returns the cases and a cleanup coroutine that removes rows the write cases created."""
+    target = fx["target_date"]
+    session = config.SESSION_MINUTES
+    created: Dict[str, List[int]] = {"appointments": [], "therapists": [], "waitlist": [], "broadcasts": []}
+    # add_appointment refuses a taken slot, so each write books its own day, ten years past the data.
+    write_days = iter(range(3650, 10 ** 6))
+
+    def write_slot() -> str:
+        return f"{(target + timedelta(days=next(write_days))).isoformat()}T23:00:00+07:00"
+
+    async def new_appointment():
+        appt_id = await database.add_appointment(
+            424242, "Pasien Bench", "Laki-laki", fx["busy_therapist"], write_slot(), session, "Jl. Bench"
+        )
+        created["appointments"].append(appt_id)
+        return (appt_id,)
+
+    async def new_therapist():
+        cursor = await database.conn.execute(
+            "INSERT INTO therapists (name, gender, active) VALUES ('Terapis Bench', 'Laki-laki', 1)"
+        )
+        await database.conn.commit()
+        created["therapists"].append(cursor.lastrowid)
+        return (cursor.lastrowid,)
+
+    async def new_waitlist():
+        entry_id = await database.add_to_waitlist(424242, "Pasien Bench", "Perempuan", "081234567890", target.isoformat())
+        created["waitlist"].append(entry_id)
+        return (entry_id,)
+
+    async def new_broadcast():
+        broadcast_id = await database.create_broadcast(1, "bench")
+        created["broadcasts"].append(broadcast_id)
+        return (broadcast_id,)
+
+    async def cleanup():
+        for table, ids in created.items():
+            if ids:
+                await database.conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(i,) for i in ids])
+                ids.clear()
+        await database.conn.commit()
+
+    async def add_appointment():
+        created["appointments"].append(await database.add_appointment(
+            424242, "Pasien Bench", "Laki-laki", fx["busy_therapist"], write_slot(), session, "Jl. Bench"
+        ))
+
+    async def add_therapist():
+        await database.add_therapist("Terapis Bench", "Perempuan")
+        cursor = await database.conn.execute("SELECT MAX(id) FROM therapists")
+        created["therapists"].append((await cursor.fetchone())[0])
+
+    async def add_to_waitlist():
+        created["waitlist"].append(await database.add_to_waitlist(424242, "Pasien Bench", "Perempuan"))
+
+    async def create_broadcast():
+        created["broadcasts"].append(await database.create_broadcast(1, "bench"))
+
+    async def toggle_twice(therapist_id):
+        await database.toggle_therapist_active(therapist_id)
+        await database.toggle_therapist_active(therapist_id)
+
+    async def holiday_date_roundtrip():
+        day = date(2099, 1, 1)
+        await database.add_holiday_date(day)
+        await database.remove_holiday_date(day)
+
+    async def holiday_weekly_roundtrip():
+        await database.add_holiday_weekly(6)
+        await database.remove_holiday_weekly(6)
+
+    async def connect_close():
+        from database.db import Database
+        fresh = Database(database.db_path)
+        await fresh.connect()
+        await fresh.close()
+
+    inactive_start = f"{(target + timedelta(days=30)).isoformat()}T00:00:00+07:00"
+    inactive_end = f"{(target + timedelta(days=37)).isoformat()}T00:00:00+07:00"
+
+    cases = [
+        Case("connect", connect_close),
+
+        Case("get_therapists", lambda: database.get_therapists()),
+        Case("get_therapists[all]", lambda: database.get_therapists(active_only=False)),
+        Case("get_therapist", lambda: database.get_therapist(fx["busy_therapist"])),
+        Case("add_therapist", add_therapist),
+        Case("update_therapist", lambda t: database.update_therapist(t, name="Terapis Bench 2"), setup=new_therapist),
+        Case("toggle_therapist_active[x2]", toggle_twice, setup=new_therapist),
+        Case("schedule_therapist_inactive",
+             lambda t: database.schedule_therapist_inactive(t, inactive_start, inactive_end), setup=new_therapist),
+        Case("cancel_scheduled_inactive", lambda t: database.cancel_scheduled_inactive(t), setup=new_therapist),
+        Case("deactivate_therapist", lambda t: database.deactivate_therapist(t), setup=new_therapist),
+        Case("reactivate_therapist", lambda t: database.reactivate_therapist(t), setup=new_therapist),
+        Case("delete_therapist", lambda t: database.delete_therapist(t), setup=new_therapist),
+        Case("get_therapists_to_deactivate", lambda: database.get_therapists_to_deactivate()),
+        Case("get_therapists_to_reactivate", lambda: database.get_therapists_to_reactivate()),
+
+        Case("therapist_free[busy]", lambda: database.therapist_free(fx["busy_therapist"], fx["busy_slot"], session)),
+        Case("therapist_free[free]", lambda: database.therapist_free(fx["busy_therapist"], fx["free_slot"], session)),
+
+        Case("add_appointment", add_appointment),
+        Case("get_appointments", lambda: database.get_appointments()),
+        Case("get_appointments[confirmed]", lambda: database.get_appointments("confirmed")),
+        Case("get_upcoming_appointments", lambda: database.get_upcoming_appointments()),
+        Case("get_all_appointments_for_admin[page1]", lambda: database.get_all_appointments_for_admin(50, 0)),
+        Case("get_all_appointments_for_admin[page20]", lambda: database.get_all_appointments_for_admin(50, 1000)),
+        Case("get_user_appointments[heavy]", lambda: database.get_user_appointments(fx["heavy_user"])),
+        Case("get_user_appointments[light]", lambda: database.get_user_appointments(fx["light_user"])),
+        Case("get_user_upcoming_appointments[heavy]", lambda: database.get_user_upcoming_appointments(fx["heavy_user"])),
+        Case("get_user_appointment_sections[heavy]", lambda: database.get_user_appointment_sections(fx["heavy_user"])),
+        Case("get_user_appointment_sections[light]", lambda: database.get_user_appointment_sections(fx["light_user"])),
+        Case("count_user_upcoming[heavy]", lambda: database.count_user_upcoming(fx["heavy_user"])),
+        Case("get_appointment_by_id", lambda: database.get_appointment_by_id(fx["appointment_id"])),
+        Case("update_appointment", lambda a: database.update_appointment(a, user_name="Pasien Bench 2"), setup=new_appointment),
+        Case("update_appointment_status", lambda a: database.update_appointment_status(a, "completed"), setup=new_appointment),
+        Case("cancel_appointment", lambda a: database.cancel_appointment(a), setup=new_appointment),
+        Case("delete_appointment", lambda a: database.delete_appointment(a), setup=new_appointment),
+
+        Case("add_to_waitlist", add_to_waitlist),
+        Case("get_waitlist", lambda: database.get_waitlist()),
+        Case("get_waitlist_entry", lambda: database.get_waitlist_entry(fx["waitlist_id"])),
+        Case("get_waitlist_by_date", lambda: database.get_waitlist_by_date(target.isoformat())),
+        Case("delete_waitlist_entry", lambda w: database.delete_waitlist_entry(w), setup=new_waitlist),
+
+        Case("is_weekly_holiday", lambda: database.is_weekly_holiday(target)),
+        Case("is_date_holiday", lambda: database.is_date_holiday(target)),
+        Case("get_month_holidays", lambda: database.get_month_holidays(target.year, target.month)),
+        Case("get_month_date_holidays", lambda: database.get_month_date_holidays(target.year, target.month)),
+        Case("get_holiday_dates", lambda: database.get_holiday_dates()),
+        Case("get_holiday_weekly", lambda: database.get_holiday_weekly()),
+        Case("add_remove_holiday_date", holiday_date_roundtrip),
+        Case("add_remove_holiday_weekly", holiday_weekly_roundtrip),
+
+        Case("create_broadcast", create_broadcast),
+        Case("update_broadcast_progress", lambda b: database.update_broadcast_progress(b, 10, 1), setup=new_broadcast),
+        Case("complete_broadcast", lambda b: database.complete_broadcast(b), setup=new_broadcast),
+        Case("get_all_user_chat_ids", lambda: database.get_all_user_chat_ids()),
+
+        Case("save_daily_health_content", lambda: database.save_daily_health_content("2099-01-01", "bench")),
+        Case("get_daily_health_content", lambda: database.get_daily_health_content("2099-01-01")),
+        Case("save_prayer_times", lambda: database.save_prayer_times("2099-01-01", "04:30", "11:55", "15:15", "17:55", "19:05")),
+        Case("get_prayer_times_for_date", lambda: database.get_prayer_times_for_date(target.isoformat())),
+        Case("get_prayer_times_range[30d]", lambda: database.get_prayer_times_range(
+            target.isoformat(), (target + timedelta(days=30)).isoformat())),
+        Case("clear_old_prayer_times[noop]", lambda: database.clear_old_prayer_times("1970-01-01")),
+
+        Case("availability.month_calendar",
+             lambda: month_calendar(database, target.year, target.month, config.MAX_DAYS_AHEAD)),
+        Case("availability.therapists_for_date",
+             lambda: therapists_for_date(database, target, "Laki-laki", session)),
+        Case("availability.therapist_starts",
+             lambda: therapist_starts(database, target, "Laki-laki", session)),
+        Case("availability.therapist_starts[60min]",
+             lambda: therapist_starts(database, target, "Laki-laki", 60)),
+        Case("availability.group_starts", lambda: group_starts(database, target, session)),
+        Case("availability.earliest_slots[scan]", lambda: earliest_slots_scan(
+            database, "Laki-laki", config.EARLIEST_SLOTS_COUNT, config.MAX_DAYS_AHEAD, session)),
+        Case("availability.earliest_slots", lambda: earliest_slots(database, "Laki-laki", config.EARLIEST_SLOTS_COUNT)),
+        Case("get_busy_intervals[window]", lambda: database.get_busy_intervals(
+            [fx["busy_therapist"]], fx["busy_slot"], f"{(target + timedelta(days=config.MAX_DAYS_AHEAD)).isoformat()}T00:00:00+07:00")),
+        Case("export.csv", lambda: export_csv(database)),
+    ]
+    return cases, cleanup
+
+
+async def bench_scale(db_path: str, args) -> List[dict]:
+    """Run every case against a scratch copy of db_path so the cached dataset stays pristine."""
+    import database.db as db_module
+    from config import Config
+    from database.db import Database
+    import utils.prayer_times as prayer_times
+
+    work_path = db_path + ".work"
+    shutil.copyfile(db_path, work_path)
+    database = Database(work_path)
+    await database.connect()
+    started = time.perf_counter()
+    await database.migrations.wait_for_backfills()
+    print(f"schema backfills finished in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    await database.load_schedule()
+    print(f"schedule store loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+    # generate_time_slots/prayer filtering use the module-level singleton.
+    previous_db = db_module.db
+    db_module.db = database
+    prayer_times._prayer_times_cache.clear()
+
+    results = []
+    try:
+        if args.archive_days is not None:
+            cutoff = (date.today() - timedelta(days=args.archive_days)).isoformat()
+            started = time.perf_counter()
+            moved = 0
+            while True:
+                batch = await database.archive_appointments(cutoff, 5000)
+                if not batch:
+                    break
+                moved += batch
+            print(f"archived {moved} appointments older than {cutoff} in {time.perf_counter() - started:.1f}s")
+
+        fx = await _fixtures(database)
+        cases, cleanup = build_cases(database, fx, Config)
+        for case in cases:
+            if args.filter and args.filter not in case.name:
+                continue
+            results.append(await run_case(case, args.min_rounds, args.min_time, args.max_time))
+            await cleanup()
+    finally:
+        db_module.db = previous_db
+        await database.close()
+        os.remove(work_path)
+    return results
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def print_table(scale: str, results: List[dict], baseline: Optional[Dict[str, dict]] = None):
+    print(f"\n---------- benchmark: {scale} appointments ----------")
+    header = f"{'Name':<42}{'Min':>11}{'Max':>11}{'Mean':>11}{'StdDev':>11}{'Median':>11}{'OPS':>11}{'Rounds':>8}"
+    if baseline is not None:
+        header += f"{'vs base':>10}"
+    print(header)
+    for r in results:
+        if not r["rounds"]:
+            print(f"{r['name']:<42}  ERROR {r['error']}")
+            continue
+        line = (f"{r['name']:<42}{_fmt(r['min']):>11}{_fmt(r['max']):>11}{_fmt(r['mean']):>11}"
+                f"{_fmt(r['stddev']):>11}{_fmt(r['median']):>11}{r['ops']:>11.1f}{r['rounds']:>8}")
+        if baseline is not None:
+            base = baseline.get(r["name"])
+            line += f"{r['median'] / base['median']:>9.2f}x" if base and base.get("median") else f"{'-':>10}"
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark database/db.py at several data volumes")
+    parser.add_argument("--scales", default="1k,100k,1M", help="comma-separated appointment counts (k/M suffixes)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "bekam-bench"),
+                        help="where generated databases are cached")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild cached databases")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=0.25, help="seconds to keep sampling fast cases")
+    parser.add_argument("--max-time", type=float, default=5.0, help="stop sampling a case after this many seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--archive-days", type=int,
+                        help="archive appointments older than N days on the scratch copy before measuring")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="JSON from a previous run; adds a median ratio column")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    _prepare_environment()
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    from config import Config
+    from benchmarks.synthetic_data import generate
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {}
+    for scale in [parse_scale(s) for s in args.scales.split(",") if s.strip()]:
+        label = scale_label(scale)
+        db_path = os.path.join(args.data_dir, f"bekam_{label}_seed{args.seed}.db")
+        if args.regenerate or not os.path.exists(db_path):
+            summary = generate(
+                db_path, appointments=scale, days_ahead=Config.MAX_DAYS_AHEAD + 30, seed=args.seed,
+                start_hour=Config.START_HOUR, end_hour=Config.END_HOUR,
+                break_start=Config.BREAK_START_HOUR, break_end=Config.BREAK_END_HOUR,
+                interval=Config.INTERVAL_MINUTES,
+            )
+            print(f"generated {label}: {summary['appointments']} appointments, "
+                  f"{summary['therapists']} therapists in {summary['seconds']}s -> {db_path}")
+
+        results = asyncio.run(bench_scale(db_path, args))
+        base = {r["name"]: r for r in baseline.get(label, [])} if baseline else None
+        print_table(label, results, base)
+        report[label] = results
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Startup benchmark: how long until the bot answers its first update.
+
+Measures, on throwaway files:
+
+- Database.connect on a new file (cold: DDL + seed + migrations),
+- Database.connect on an up-to-date file (warm: schema fingerprint fast path),
+- Database.connect on an up-to-date file whose fingerprint was cleared
+  (the full schema path every start used to take),
+- build_application() -> post_init -> polling -> reply to a first /start,
+  against the fake Bot API, with the per-phase `startup` metrics.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_startup --runs 20 --budget-ms 3000
+
+Exits 1 when the time to the first reply exceeds --budget-ms (default
+STARTUP_BUDGET_MS), so it can gate a release.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.load_test import _prepare_environment, seed_database
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "runs": len(ms),
+        "min_ms": round(min(ms), 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "max_ms": round(max(ms), 3),
+    }
+
+
+async def _connect_once(path: str) -> float:
+    from database.db import Database
+
+    database = Database(path)
+    try:
+        started = time.perf_counter()
+        await database.connect()
+        elapsed = time.perf_counter() - started
+        await database.migrations.wait_for_backfills()
+    finally:
+        await database.close()
+    return elapsed
+
+
+async def bench_connect(workdir: str, runs: int) -> dict:
+    import sqlite3
+
+    cold = []
+    for i in range(runs):
+        cold.append(await _connect_once(os.path.join(workdir, f"cold_{i}.db")))
+
+    path = os.path.join(workdir, "warm.db")
+    await _connect_once(path)
+    warm = [await _connect_once(path) for _ in range(runs)]
+
+    full = []
+    for _ in range(runs):
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA user_version = 0")
+        conn.close()
+        full.append(await _connect_once(path))
+
+    return {"cold": _summary(cold), "warm": _summary(warm), "full_schema_path": _summary(full)}
+
+
+async def bench_first_update(timeout: float, log_level: str) -> dict:
+    from benchmarks.fake_telegram_api import FakeTelegramAPI
+    from config import Config
+    from utils.metrics import metrics
+
+    await seed_database(Config.DB_PATH, 4, max(Config.MAX_DAYS_AHEAD, Config.PRAYER_PREFETCH_DAYS))
+
+    import main as bot_main
+    logging.getLogger().setLevel(log_level.upper())
+
+    async with FakeTelegramAPI() as api:
+        started = time.perf_counter()
+        application = bot_main.build_application(base_url=api.base_url, persistence_path=Config.PERSISTENCE_PATH)
+        await application.initialize()
+        await bot_main.post_init(application)
+        bot_main.start_scheduler(application)
+        await application.updater.start_polling(poll_interval=0.0, timeout=1,
+                                                allowed_updates=["message", "callback_query"])
+        await application.start()
+
+        user_id = 10_000
+        api.send_text(user_id, "/start")
+        await asyncio.wait_for(api.inbox(user_id).get(), timeout)
+        first_reply = time.perf_counter() - started
+
+        await application.updater.stop()
+        await application.stop()
+        await bot_main.post_shutdown(application)
+        await application.shutdown()
+        bot_main.global_scheduler.shutdown(wait=False)
+
+    phases = {name: round(h.max * 1000, 3) for name, h in metrics.series["startup"].items()}
+    return {"first_reply_ms": round(first_reply * 1000, 3), "phases_ms": phases}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Database.connect and time to the first answered update")
+    parser.add_argument("--runs", type=int, default=10, help="connect() repetitions per case")
+    parser.add_argument("--budget-ms", type=float, help="fail if the first reply takes longer (default STARTUP_BUDGET_MS)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the first reply")
+    parser.add_argument("--log-level", default="WARNING", help="bot log level during the run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bekam-startup-") as workdir:
+        _prepare_environment(workdir)
+        from config import Config
+
+        logging.getLogger().setLevel(args.log_level.upper())
+        budget_ms = args.budget_ms if args.budget_ms is not None else Config.STARTUP_BUDGET_MS
+        report = {"connect": asyncio.run(bench_connect(workdir, args.runs))}
+        report["first_update"] = asyncio.run(bench_first_update(args.timeout, args.log_level))
+        report["budget_ms"] = budget_ms
+        report["within_budget"] = report["first_update"]["first_reply_ms"] <= budget_ms
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Local stand-in for the Telegram Bot API, used by the load-test harness.
+
+Implements just enough of the API for the bot to run unmodified against it:
+getMe, deleteWebhook, getUpdates (long polling), sendMessage, editMessageText,
+answerCallbackQuery and sendDocument (setWebhook is accepted and ignored).
+Every message the bot sends is routed
+to a per-chat inbox so virtual patients can await the bot's reply.
+"""
+import asyncio
+import itertools
+import json
+import time
+from typing import Dict, List, Optional
+
+from utils.http_server import HTTPRequest, HTTPResponse, start_http_server, server_port
+
+BOT_USER = {
+    "id": 999000999,
+    "is_bot": True,
+    "first_name": "Fake Bekam Bot",
+    "username": "fake_bekam_bot",
+    "can_join_groups": False,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+}
+
+
+class BotReply:
+    __slots__ = ("method", "chat_id", "message", "received_at")
+
+    def __init__(self, method: str, chat_id: int, message: dict):
+        self.method = method
+        self.chat_id = chat_id
+        self.message = message
+        self.received_at = time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        return self.message.get("text") or self.message.get("caption") or ""
+
+    def buttons(self) -> List[str]:
+        markup = self.message.get("reply_markup") or {}
+        return [
+            button.get("callback_data", "")
+            for row in markup.get("inline_keyboard", [])
+            for button in row
+        ]
+
+
+class FakeTelegramAPI:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, record: bool = False):
+        self.host = host
+        self.port = port
+        self.server = None
+        # Copy of every update handed to the bot, replayable with benchmarks/replay_webhook.py.
+        self.recorded: Optional[List[dict]] = [] if record else None
+
+        self._updates: List[dict] = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_updates = asyncio.Event()
+
+        self._inboxes: Dict[int, asyncio.Queue] = {}
+        self.calls: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self.server = await start_http_server(self._handle, self.host, self.port)
+        self.port = server_port(self.server)
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    # --- patient side ---
+
+    def inbox(self, chat_id: int) -> asyncio.Queue:
+        if chat_id not in self._inboxes:
+            self._inboxes[chat_id] = asyncio.Queue()
+        return self._inboxes[chat_id]
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"Pasien{user_id}", "username": f"pasien{user_id}"}
+
+    def _chat(self, chat_id: int) -> dict:
+        return {"id": chat_id, "type": "private", "first_name": f"Pasien{chat_id}"}
+
+    def _push_update(self, payload: dict) -> int:
+        update_id = next(self._update_ids)
+        payload["update_id"] = update_id
+        self._updates.append(payload)
+        if self.recorded is not None:
+            self.recorded.append(json.loads(json.dumps(payload)))
+        self._new_updates.set()
+        return update_id
+
+    def send_text(self, user_id: int, text: str) -> float:
+        """Queue an incoming text message (or /command) from a patient; returns the enqueue time."""
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": self._chat(user_id),
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        sent_at = time.perf_counter()
+        self._push_update({"message": message})
+        return sent_at
+
+    def press_button(self, user_id: int, reply: BotReply, callback_data: str) -> float:
+        """Queue a callback query for a button on a message previously sent by the bot."""
+        query = {
+            "id": str(next(self._message_ids)),
+            "from": self._user(user_id),
+            "chat_instance": str(user_id),
+            "message": reply.message,
+            "data": callback_data,
+        }
+        sent_at = time.perf_counter()
+        self._push_update({"callback_query": query})
+        return sent_at
+
+    # --- bot side ---
+
+    def _params(self, request: HTTPRequest) -> dict:
+        params = dict(request.query)
+        if request.body:
+            params.update(request.form())
+        return params
+
+    @staticmethod
+    def _decode(value: Optional[str]):
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def _bot_message(self, params: dict, message_id: Optional[int] = None) -> dict:
+        chat_id = int(self._decode(params["chat_id"]))
+        message = {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": self._chat(chat_id),
+            "from": BOT_USER,
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        if "reply_markup" in params:
+            message["reply_markup"] = self._decode(params["reply_markup"])
+        return message
+
+    def _deliver(self, method: str, message: dict):
+        chat_id = message["chat"]["id"]
+        if chat_id in self._inboxes:
+            self._inboxes[chat_id].put_nowait(BotReply(method, chat_id, message))
+
+    async def _get_updates(self, params: dict) -> list:
+        offset = int(self._decode(params.get("offset")) or 0)
+        timeout = float(self._decode(params.get("timeout")) or 0)
+        limit = int(self._decode(params.get("limit")) or 100)
+
+        if offset:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return self._updates[:limit]
+
+    async def _handle(self, request: HTTPRequest) -> HTTPResponse:
+        method = request.path.rsplit("/", 1)[-1]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        params = self._params(request)
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method in ("deleteWebhook", "setWebhook", "answerCallbackQuery", "setMyCommands", "close", "logOut"):
+            result = True
+        elif method == "getUpdates":
+            result = await self._get_updates(params)
+        elif method == "sendMessage":
+            result = self._bot_message(params)
+            self._deliver(method, result)
+        elif method == "editMessageText":
+            result = self._bot_message(params, int(self._decode(params["message_id"])))
+            result["edit_date"] = int(time.time())
+            self._deliver(method, result)
+        elif method == "sendDocument":
+            result = self._bot_message(params)
+            result["document"] = {"file_id": f"doc{result['message_id']}", "file_unique_id": f"u{result['message_id']}"}
+            self._deliver(method, result)
+        else:
+            return HTTPResponse.json({"ok": False, "error_code": 404, "description": f"Method {method} not implemented"}, 404)
+
+        return HTTPResponse.json({"ok": True, "result": result})
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
@@ -0,0 +1,131 @@
+"""
+Import-time report for the bot's startup path (`python -X importtime`).
+
+Imports the target module (default: main) in fresh interpreters, parses the
+importtime output and prints the median over --runs of:
+
+- the total import time of the target,
+- time per top-level package (self time summed, so nothing is counted twice),
+- the slowest individual modules by self time,
+- the project's own modules.
+
+Usage (from the repository root):
+
+    python -m benchmarks.import_report --runs 5
+    python -m benchmarks.import_report --module handlers.admin --json imports.json
+
+Stale bytecode makes modules look slow (they are recompiled on every import
+when PYTHONDONTWRITEBYTECODE is set), so sources are byte-compiled first.
+"""
+import argparse
+import compileall
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_PACKAGES = {"main", "config", "database", "handlers", "jobs", "services", "utils"}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) per `import time:` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(module: str, env: Dict[str, str]) -> List[Tuple[str, int, int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def build_report(runs: List[List[Tuple[str, int, int, int]]], module: str, top: int) -> dict:
+    self_times: Dict[str, List[int]] = defaultdict(list)
+    totals = []
+    for rows in runs:
+        for name, self_us, cumulative_us, _ in rows:
+            self_times[name].append(self_us)
+            if name == module:
+                totals.append(cumulative_us)
+
+    median_self = {name: statistics.median(values) for name, values in self_times.items()}
+    packages: Dict[str, float] = defaultdict(float)
+    for name, self_us in median_self.items():
+        packages[name.split(".")[0]] += self_us
+
+    def ms(us: float) -> float:
+        return round(us / 1000, 2)
+
+    slowest = sorted(median_self.items(), key=lambda item: item[1], reverse=True)[:top]
+    project = sorted(((n, t) for n, t in median_self.items() if n.split(".")[0] in PROJECT_PACKAGES),
+                     key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "runs": len(runs),
+        "total_ms": ms(statistics.median(totals)) if totals else None,
+        "min_total_ms": ms(min(totals)) if totals else None,
+        "modules_imported": len(median_self),
+        "packages_ms": {name: ms(t) for name, t in sorted(packages.items(), key=lambda i: i[1], reverse=True)[:top]},
+        "slowest_modules_ms": {name: ms(t) for name, t in slowest},
+        "project_modules_ms": {name: ms(t) for name, t in project},
+        "project_total_ms": ms(sum(t for _, t in project)),
+    }
+
+
+def print_report(report: dict):
+    print(f"import {report['module']}: {report['total_ms']} ms median, {report['min_total_ms']} ms min "
+          f"({report['runs']} runs, {report['modules_imported']} modules)")
+    for title, key in (("Per package (self time)", "packages_ms"),
+                       ("Slowest modules (self time)", "slowest_modules_ms"),
+                       (f"Project modules ({report['project_total_ms']} ms)", "project_modules_ms")):
+        print(f"\n{title}:")
+        for name, value in report[key].items():
+            print(f"  {value:>8.2f} ms  {name}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time of the bot's modules")
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to take the median over")
+    parser.add_argument("--top", type=int, default=15, help="rows in the package/module tables")
+    parser.add_argument("--json", help="also write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    compileall.compile_dir(ROOT, quiet=1)
+
+    with tempfile.TemporaryDirectory(prefix="bekam-imports-") as workdir:
+        env = dict(os.environ)
+        env.setdefault("TOKEN", "123456:IMPORTS")
+        env.setdefault("ADMIN_IDS", "1")
+        env["LOG_FILE"] = os.path.join(workdir, "bot.log")
+        env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+        runs = [measure(args.module, env) for _ in range(args.runs)]
+
+    report = build_report(runs, args.module, args.top)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Load test: run the real Application/ConversationHandler from main.py against
+a local fake Telegram Bot API and walk thousands of virtual patients through
+the full booking flow (gender -> date -> time -> therapist -> name -> address
+-> confirm).
+
+Usage (from the repository root):
+
+    python -m benchmarks.load_test --patients 2000 --concurrency 200 --output report.json
+
+The report is JSON: per-handler p50/p95/p99 latency, throughput and error rate.
+Latency is measured from the moment the update is queued on the fake API until
+the bot's reply for that chat arrives, so it includes long-poll delivery.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+FLOW = [
+    "start_cmd",
+    "make_appointment_callback",
+    "patient_gender_callback",
+    "date_callback",
+    "time_callback",
+    "therapist_callback",
+    "patient_name_text",
+    "patient_address_text",
+    "confirmation_callback",
+]
+
+
+def _prepare_environment(workdir: str):
+    """Point the bot at throwaway files before config.py is imported."""
+    os.environ.setdefault("TOKEN", "123456:LOADTEST")
+    os.environ.setdefault("ADMIN_IDS", "1")
+    os.environ["DB_PATH"] = os.path.join(workdir, "loadtest.db")
+    os.environ["PERSISTENCE_PATH"] = os.path.join(workdir, "loadtest_persistence.pkl")
+    os.environ["LOG_FILE"] = os.path.join(workdir, "bot.log")
+    os.environ.pop("OPENAI_API_KEY", None)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class StepFailed(Exception):
+    pass
+
+
+class LoadTestStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in FLOW}
+        self.errors: Dict[str, int] = {name: 0 for name in FLOW}
+        self.bookings = 0
+        self.patients_failed = 0
+
+    def report(self, duration: float, config: dict, api_calls: dict) -> dict:
+        handlers = {}
+        total_steps = 0
+        total_errors = 0
+        for name in FLOW:
+            samples = [v * 1000 for v in self.latencies[name]]
+            errors = self.errors[name]
+            total_steps += len(samples) + errors
+            total_errors += errors
+            handlers[name] = {
+                "count": len(samples),
+                "errors": errors,
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": max(samples) if samples else None,
+            }
+        return {
+            "config": config,
+            "duration_s": round(duration, 3),
+            "throughput": {
+                "updates_per_s": round(total_steps / duration, 2) if duration else None,
+                "bookings_per_s": round(self.bookings / duration, 2) if duration else None,
+            },
+            "bookings": self.bookings,
+            "patients_failed": self.patients_failed,
+            "error_rate": round(total_errors / total_steps, 4) if total_steps else 0.0,
+            "handlers": handlers,
+            "api_calls": api_calls,
+        }
+
+
+class VirtualPatient:
+    def __init__(self, api, user_id: int, stats: LoadTestStats, timeout: float, rng: random.Random):
+        self.api = api
+        self.user_id = user_id
+        self.stats = stats
+        self.timeout = timeout
+        self.rng = rng
+        self.inbox = api.inbox(user_id)
+        self.last_reply = None
+
+    async def _await_reply(self, step: str, sent_at: float):
+        try:
+            reply = await asyncio.wait_for(self.inbox.get(), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.errors[step] += 1
+            raise StepFailed(f"{step}: timeout")
+
+        if reply.text.startswith("❌"):
+            self.stats.errors[step] += 1
+            raise StepFailed(f"{step}: {reply.text[:60]}")
+
+        self.stats.latencies[step].append(reply.received_at - sent_at)
+        self.last_reply = reply
+        return reply
+
+    async def _press(self, step: str, callback_data: str):
+        sent_at = self.api.press_button(self.user_id, self.last_reply, callback_data)
+        return await self._await_reply(step, sent_at)
+
+    async def _type(self, step: str, text: str):
+        sent_at = self.api.send_text(self.user_id, text)
+        return await self._await_reply(step, sent_at)
+
+    def _pick(self, step: str, reply, prefix: str, randomize: bool = False) -> str:
+        options = [data for data in reply.buttons() if data.startswith(prefix)]
+        if not options:
+            self.stats.errors[step] += 1
+            raise StepFailed(f"{step}: no '{prefix}' button")
+        return self.rng.choice(options) if randomize else options[0]
+
+    async def run(self):
+        try:
+            await self._type("start_cmd", "/start")
+            await self._press("make_appointment_callback", "make")
+            reply = await self._press("patient_gender_callback", self.rng.choice(["pat_m", "pat_f"]))
+
+            date_data = self._pick("date_callback", reply, "date_", randomize=True)
+            reply = await self._press("date_callback", date_data)
+
+            time_data = self._pick("time_callback", reply, "time_", randomize=True)
+            reply = await self._press("time_callback", time_data)
+
+            therapist_data = self._pick("therapist_callback", reply, "ther_")
+            await self._press("therapist_callback", therapist_data)
+
+            await self._type("patient_name_text", f"Pasien Uji {self.user_id}")
+            await self._type("patient_address_text", f"Jl. Uji Beban No. {self.user_id}")
+            await self._press("confirmation_callback", "confirm_yes")
+            self.stats.bookings += 1
+        except StepFailed as e:
+            self.stats.patients_failed += 1
+            logging.getLogger(__name__).debug(f"Patient {self.user_id} failed: {e}")
+
+
+async def seed_database(db_path: str, therapists: int, days: int):
+    """Create the schema, add extra therapists and pre-fill the prayer cache so no network is used."""
+    from database.db import Database
+    from database.models import SEED_THERAPISTS
+    from utils.datetime_helper import now_jakarta
+
+    database = Database(db_path)
+    await database.connect()
+    try:
+        for i in range(max(0, therapists - len(SEED_THERAPISTS))):
+            gender = "Laki-laki" if i % 2 == 0 else "Perempuan"
+            await database.add_therapist(f"Terapis Uji {i + 1}", gender)
+
+        today = now_jakarta().date()
+        for offset in range(days + 2):
+            day = (today + timedelta(days=offset)).isoformat()
+            await database.save_prayer_times(day, "04:30", "11:55", "15:15", "17:55", "19:05")
+    finally:
+        await database.close()
+
+
+async def run_load_test(args) -> dict:
+    from benchmarks.fake_telegram_api import FakeTelegramAPI
+    from config import Config
+
+    await seed_database(Config.DB_PATH, args.therapists, Config.MAX_DAYS_AHEAD)
+
+    import main as bot_main
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    async with FakeTelegramAPI(record=bool(args.record)) as api:
+        application = bot_main.build_application(base_url=api.base_url, persistence_path=Config.PERSISTENCE_PATH)
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        bot_main.start_scheduler(application)
+        await application.updater.start_polling(poll_interval=0.0, timeout=1,
+                                                allowed_updates=["message", "callback_query"])
+        await application.start()
+
+        stats = LoadTestStats()
+        rng = random.Random(args.seed)
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def patient_task(user_id: int):
+            async with semaphore:
+                await VirtualPatient(api, user_id, stats, args.timeout, rng).run()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(patient_task(10_000 + i) for i in range(args.patients)))
+        duration = time.perf_counter() - started
+
+        await application.updater.stop()
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        await application.shutdown()
+        bot_main.global_scheduler.shutdown(wait=False)
+
+        if args.record:
+            with open(args.record, "w") as f:
+                for update in api.recorded:
+                    f.write(json.dumps(update) + "\n")
+
+        config = {
+            "patients": args.patients,
+            "concurrency": args.concurrency,
+            "therapists": max(args.therapists, 4),
+            "timeout_s": args.timeout,
+            "seed": args.seed,
+        }
+        return stats.report(duration, config, dict(api.calls))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the booking flow against a fake Telegram Bot API")
+    parser.add_argument("--patients", type=int, default=1000, help="number of virtual patients")
+    parser.add_argument("--concurrency", type=int, default=100, help="patients in flight at once")
+    parser.add_argument("--therapists", type=int, default=4, help="total therapists to seed (min 4)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each bot reply")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for patient choices")
+    parser.add_argument("--log-level", default="WARNING", help="bot log level during the run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--record", help="save every update sent to the bot as JSON lines (input for replay_webhook)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bekam-loadtest-") as workdir:
+        _prepare_environment(workdir)
+        report = asyncio.run(run_load_test(args))
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0 if report["bookings"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
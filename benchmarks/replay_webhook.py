@@ -0,0 +1,222 @@
+"""
+Replay Telegram updates against the bot's webhook endpoint.
+
+Posts updates the way Telegram does (JSON body + secret-token header),
+keeping each chat's updates in order while chats run concurrently, and
+honours 503 + Retry-After by retrying like Telegram would.
+
+Against a running bot in webhook mode:
+
+    python -m benchmarks.replay_webhook --url http://127.0.0.1:8443/telegram \\
+        --secret "$WEBHOOK_SECRET" --updates updates.jsonl
+
+Fully local (fake Bot API + real Application + WebhookServer in-process):
+
+    python -m benchmarks.load_test --patients 200 --record updates.jsonl
+    python -m benchmarks.replay_webhook --local --updates updates.jsonl --queue-size 64
+
+--updates takes JSON lines of Update objects (load_test --record writes them);
+--synthetic N generates N /start messages from distinct users instead.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.load_test import _prepare_environment, percentile
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_updates(count: int, first_user_id: int = 20_000) -> List[dict]:
+    updates = []
+    for i in range(count):
+        user = {"id": first_user_id + i, "is_bot": False, "first_name": f"Pasien{first_user_id + i}"}
+        updates.append({
+            "update_id": i + 1,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": user["id"], "type": "private", "first_name": user["first_name"]},
+                "from": user,
+                "text": "/start",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+            },
+        })
+    return updates
+
+
+def _chat_key(update: dict) -> int:
+    for kind in ("message", "edited_message", "callback_query"):
+        payload = update.get(kind)
+        if not payload:
+            continue
+        if kind == "callback_query":
+            return payload["from"]["id"]
+        return payload["chat"]["id"]
+    return update.get("update_id", 0)
+
+
+class ReplayStats:
+    def __init__(self):
+        self.status: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.retries = 0
+        self.gave_up = 0
+
+    def report(self, duration: float, sent: int) -> dict:
+        samples = [v * 1000 for v in self.latencies]
+        return {
+            "updates": sent,
+            "duration_s": round(duration, 3),
+            "updates_per_s": round(sent / duration, 2) if duration else None,
+            "status": dict(sorted(self.status.items())),
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "p50_ms": percentile(samples, 50),
+            "p95_ms": percentile(samples, 95),
+            "p99_ms": percentile(samples, 99),
+            "max_ms": max(samples) if samples else None,
+        }
+
+
+async def replay(url: str, secret: Optional[str], updates: List[dict], concurrency: int,
+                 max_retries: int = 5) -> dict:
+    import httpx
+
+    by_chat: Dict[int, List[dict]] = {}
+    for update in updates:
+        by_chat.setdefault(_chat_key(update), []).append(update)
+
+    stats = ReplayStats()
+    headers = {SECRET_HEADER: secret} if secret else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+
+        async def post(update: dict):
+            for attempt in range(max_retries + 1):
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, json=update, headers=headers)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    response = None
+                    status = type(e).__name__
+                stats.latencies.append(time.perf_counter() - started)
+                stats.status[status] = stats.status.get(status, 0) + 1
+                if response is None or response.status_code not in (429, 502, 503):
+                    return
+                if attempt < max_retries:
+                    stats.retries += 1
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+            stats.gave_up += 1
+
+        async def chat_task(chat_updates: List[dict]):
+            # Telegram delivers a chat's updates one at a time, in order.
+            async with semaphore:
+                for update in chat_updates:
+                    await post(update)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(chat_task(u) for u in by_chat.values()))
+        duration = time.perf_counter() - started
+
+    return stats.report(duration, len(updates))
+
+
+async def replay_local(args, updates: List[dict]) -> dict:
+    """Run the bot behind WebhookServer against the fake Bot API and replay into it."""
+    from benchmarks.fake_telegram_api import FakeTelegramAPI
+    from benchmarks.load_test import seed_database
+    from config import Config
+    from services.webhook import WebhookServer
+
+    await seed_database(Config.DB_PATH, 4, Config.MAX_DAYS_AHEAD)
+
+    import main as bot_main
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    async with FakeTelegramAPI() as api:
+        application = bot_main.build_application(base_url=api.base_url, persistence_path=Config.PERSISTENCE_PATH)
+        await application.initialize()
+        await bot_main.post_init(application)
+        bot_main.start_scheduler(application)
+        await application.start()
+
+        server = WebhookServer(application, "127.0.0.1", 0, path="/telegram", secret_token=args.secret,
+                               queue_size=args.queue_size, workers=args.workers)
+        await server.start()
+        url = f"http://127.0.0.1:{server.port}/telegram"
+
+        report = await replay(url, args.secret, updates, args.concurrency, args.max_retries)
+
+        drain_started = time.perf_counter()
+        await server.stop(drain_timeout=args.drain_timeout)
+        report["drain_s"] = round(time.perf_counter() - drain_started, 3)
+        report["server"] = server.stats()
+        report["api_calls"] = dict(api.calls)
+
+        await application.stop()
+        await bot_main.post_shutdown(application)
+        await application.shutdown()
+        bot_main.global_scheduler.shutdown(wait=False)
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay Telegram updates against the webhook endpoint")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--updates", help="JSON lines file of Update objects")
+    source.add_argument("--synthetic", type=int, help="generate N /start messages from distinct users")
+    parser.add_argument("--url", help="webhook URL of a running bot (omit with --local)")
+    parser.add_argument("--local", action="store_true", help="start bot + fake Bot API + webhook server in-process")
+    parser.add_argument("--secret", default="replay-secret", help="value for the secret-token header")
+    parser.add_argument("--concurrency", type=int, default=50, help="chats replayed at once")
+    parser.add_argument("--max-retries", type=int, default=5, help="retries per update on 429/502/503")
+    parser.add_argument("--queue-size", type=int, default=1000, help="--local: WebhookServer queue size")
+    parser.add_argument("--workers", type=int, default=4, help="--local: WebhookServer workers")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="--local: seconds to drain on stop")
+    parser.add_argument("--log-level", default="WARNING", help="--local: bot log level during the run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    if not args.local and not args.url:
+        parser.error("--url is required unless --local is given")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    updates = load_updates(args.updates) if args.updates else synthetic_updates(args.synthetic)
+
+    if args.local:
+        with tempfile.TemporaryDirectory(prefix="bekam-webhook-") as workdir:
+            _prepare_environment(workdir)
+            os.environ.pop("WEBHOOK_URL", None)
+            report = asyncio.run(replay_local(args, updates))
+    else:
+        report = asyncio.run(replay(args.url, args.secret, updates, args.concurrency, args.max_retries))
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0 if report["status"].get("200") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
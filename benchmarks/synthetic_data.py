@@ -0,0 +1,279 @@
+"""
+Synthetic data generator for scale testing database/db.py.
+
+Builds a SQLite file with the bot's real schema (database/models.py) and
+configurable volumes of therapists, appointments spread over several years,
+waitlist entries, holidays and prayer-cache rows.
+
+Usage (from the repository root):
+
+    python -m benchmarks.synthetic_data --appointments 100000 --output /tmp/bekam_100k.db
+
+Appointment times sit on the clinic's slot grid (start/end hour, break and
+interval). Confirmed/completed bookings never double-book a therapist as long
+as the grid has room; past bookings are mostly completed, future ones mostly
+confirmed, with a share of cancellations in both.
+"""
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from database.models import (
+    THERAPISTS_TABLE, APPOINTMENTS_TABLE, WAITLIST_TABLE,
+    HOLIDAY_WEEKLY_TABLE, HOLIDAY_DATES_TABLE, BROADCASTS_TABLE,
+    DAILY_HEALTH_CONTENT_TABLE, PRAYER_TIMES_CACHE_TABLE,
+    SEED_HOLIDAY_WEEKLY
+)
+
+TZ_SUFFIX = "+07:00"
+BATCH_SIZE = 50_000
+FIRST_USER_ID = 100_000
+
+FIRST_NAMES = ["Ahmad", "Budi", "Siti", "Dewi", "Rizki", "Fajar", "Nur", "Agus", "Rina", "Dani",
+               "Putri", "Hasan", "Aisyah", "Yusuf", "Fitri", "Joko", "Lestari", "Imam", "Wulan", "Bayu"]
+LAST_NAMES = ["Saputra", "Wijaya", "Lestari", "Pratama", "Hidayat", "Rahmawati", "Santoso",
+              "Kurniawan", "Nugroho", "Sari", "Setiawan", "Maulana"]
+STREETS = ["Jl. Merdeka", "Jl. Sudirman", "Jl. Melati", "Jl. Kenanga", "Jl. Anggrek", "Jl. Mawar"]
+
+
+def _iso(day: date, minute_of_day: int) -> str:
+    return f"{day.isoformat()}T{minute_of_day // 60:02d}:{minute_of_day % 60:02d}:00{TZ_SUFFIX}"
+
+
+def slot_minutes(start_hour: int, end_hour: int, break_start: int, break_end: int, interval: int) -> List[int]:
+    """Slot start times (minutes after midnight) on the same grid as generate_time_slots."""
+    slots = []
+    minute = start_hour * 60
+    while minute < end_hour * 60:
+        hour = minute // 60
+        if hour < break_start or hour >= break_end:
+            slots.append(minute)
+        minute += interval
+    return slots
+
+
+def _person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate(
+    db_path: str,
+    appointments: int = 1000,
+    therapists: Optional[int] = None,
+    years: float = 3.0,
+    days_ahead: int = 60,
+    waitlist: Optional[int] = None,
+    holidays: Optional[int] = None,
+    users: Optional[int] = None,
+    start_hour: int = 9,
+    end_hour: int = 18,
+    break_start: int = 12,
+    break_end: int = 13,
+    interval: int = 40,
+    seed: int = 1,
+    today: Optional[date] = None,
+) -> dict:
+    """Create db_path (replacing any existing file) and return a summary of what was written."""
+    rng = random.Random(seed)
+    today = today or date.today()
+
+    if waitlist is None:
+        waitlist = max(10, appointments // 100)
+    if holidays is None:
+        holidays = max(5, int(years * 12))
+    if users is None:
+        users = max(1, appointments // 5)
+
+    first_day = today - timedelta(days=int(years * 365))
+    last_day = today + timedelta(days=days_ahead)
+    total_days = (last_day - first_day).days + 1
+    slots = slot_minutes(start_hour, end_hour, break_start, break_end, interval)
+    if therapists is None:
+        # Enough therapists that the slot grid is at most ~80% booked.
+        therapists = max(4, math.ceil(appointments * 1.25 / (total_days * len(slots))))
+
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+
+    for ddl in (THERAPISTS_TABLE, APPOINTMENTS_TABLE, WAITLIST_TABLE, HOLIDAY_WEEKLY_TABLE,
+                HOLIDAY_DATES_TABLE, BROADCASTS_TABLE, DAILY_HEALTH_CONTENT_TABLE, PRAYER_TIMES_CACHE_TABLE):
+        conn.execute(ddl)
+
+    therapist_rows = []
+    for i in range(therapists):
+        gender = "Laki-laki" if i % 2 == 0 else "Perempuan"
+        prefix = "Pak" if gender == "Laki-laki" else "Mba"
+        therapist_rows.append((f"{prefix} {rng.choice(FIRST_NAMES)} {i + 1}", gender, 1, None, None))
+    if therapists > 4:
+        # One therapist on a scheduled leave around today, like the admin "jadwal nonaktif" flow.
+        leave_start = datetime.combine(today + timedelta(days=3), datetime.min.time())
+        name, gender, _, _, _ = therapist_rows[-1]
+        therapist_rows[-1] = (name, gender, 1, leave_start.isoformat() + TZ_SUFFIX,
+                              (leave_start + timedelta(days=7)).isoformat() + TZ_SUFFIX)
+    conn.executemany(
+        "INSERT INTO therapists (name, gender, active, inactive_start, inactive_end) VALUES (?, ?, ?, ?, ?)",
+        therapist_rows
+    )
+    therapist_genders = [row[1] for row in therapist_rows]
+
+    # Sample distinct (day, slot, therapist) cells so bookings do not collide while the grid has room.
+    grid_size = total_days * len(slots) * therapists
+    if appointments <= grid_size:
+        cells = rng.sample(range(grid_size), appointments)
+    else:
+        cells = [rng.randrange(grid_size) for _ in range(appointments)]
+
+    rows = []
+    written = 0
+    for cell in cells:
+        therapist_index = cell % therapists
+        slot_index = (cell // therapists) % len(slots)
+        day_index = cell // (therapists * len(slots))
+        day = first_day + timedelta(days=day_index)
+
+        if day < today:
+            roll = rng.random()
+            status = "completed" if roll < 0.8 else "cancelled" if roll < 0.95 else "confirmed"
+        else:
+            status = "confirmed" if rng.random() < 0.9 else "cancelled"
+
+        # Skewed user distribution: a few regulars book often, most patients once or twice.
+        user_id = FIRST_USER_ID + int(rng.random() ** 1.5 * users)
+        created = day - timedelta(days=rng.randint(0, 30))
+        start_dt = _iso(day, slots[slot_index])
+        start_ts = int(datetime.fromisoformat(start_dt).timestamp())
+        rows.append((
+            user_id,
+            _person_name(rng),
+            therapist_genders[therapist_index],
+            f"{rng.choice(STREETS)} No. {rng.randint(1, 200)}",
+            therapist_index + 1,
+            start_dt,
+            interval,
+            status,
+            _iso(created, rng.randint(6 * 60, 22 * 60)),
+            start_ts,
+            start_ts + interval * 60,
+        ))
+        if len(rows) >= BATCH_SIZE:
+            conn.executemany(
+                """INSERT INTO appointments
+                (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, status, created_at,
+                 start_ts, end_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            written += len(rows)
+            rows = []
+    if rows:
+        conn.executemany(
+            """INSERT INTO appointments
+            (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, status, created_at,
+             start_ts, end_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        written += len(rows)
+
+    waitlist_rows = []
+    for _ in range(waitlist):
+        requested = today + timedelta(days=rng.randint(0, days_ahead))
+        phone = f"08{rng.randint(100000000, 9999999999)}"
+        waitlist_rows.append((
+            FIRST_USER_ID + rng.randrange(users),
+            _person_name(rng),
+            phone,
+            rng.choice(["Laki-laki", "Perempuan"]),
+            requested.isoformat(),
+            _iso(today - timedelta(days=rng.randint(0, 14)), rng.randint(6 * 60, 22 * 60)),
+            "62" + phone[1:],
+        ))
+    conn.executemany(
+        """INSERT INTO waitlist (chat_id, name, phone, gender, requested_date, created_at, phone_normalized)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        waitlist_rows
+    )
+
+    conn.executemany("INSERT OR IGNORE INTO holiday_weekly (weekday) VALUES (?)", [(w,) for w in SEED_HOLIDAY_WEEKLY])
+    holiday_days = {first_day + timedelta(days=rng.randrange(total_days)) for _ in range(holidays)}
+    conn.executemany("INSERT OR IGNORE INTO holiday_dates (date) VALUES (?)", [(d.isoformat(),) for d in holiday_days])
+
+    prayer_rows = []
+    for offset in range(total_days):
+        day = first_day + timedelta(days=offset)
+        # Small seasonal drift so rows are not identical.
+        drift = int(8 * ((offset % 365) / 365 - 0.5))
+        prayer_rows.append((
+            day.isoformat(),
+            f"04:{30 + drift:02d}", f"11:{55 + drift // 2:02d}", f"15:{15 + drift:02d}",
+            f"17:{55 + drift // 2:02d}", f"19:{5 + abs(drift):02d}",
+            _iso(day, 0),
+        ))
+    conn.executemany(
+        "INSERT OR REPLACE INTO prayer_times_cache (date, fajr, dhuhr, asr, maghrib, isha, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        prayer_rows
+    )
+
+    conn.commit()
+    conn.close()
+
+    return {
+        "db_path": db_path,
+        "appointments": written,
+        "therapists": therapists,
+        "users": users,
+        "waitlist": waitlist,
+        "holiday_dates": len(holiday_days),
+        "prayer_days": total_days,
+        "first_day": first_day.isoformat(),
+        "last_day": last_day.isoformat(),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic bekam booking database")
+    parser.add_argument("--output", required=True, help="SQLite file to create (overwritten)")
+    parser.add_argument("--appointments", type=int, default=1000)
+    parser.add_argument("--therapists", type=int, help="default: enough to keep the slot grid under ~80%% booked")
+    parser.add_argument("--years", type=float, default=3.0, help="history length in years")
+    parser.add_argument("--days-ahead", type=int, default=60, help="future booking window in days")
+    parser.add_argument("--waitlist", type=int, help="default: appointments / 100")
+    parser.add_argument("--holidays", type=int, help="number of dated holidays")
+    parser.add_argument("--users", type=int, help="distinct patients, default: appointments / 5")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = generate(
+        args.output,
+        appointments=args.appointments,
+        therapists=args.therapists,
+        years=args.years,
+        days_ahead=args.days_ahead,
+        waitlist=args.waitlist,
+        holidays=args.holidays,
+        users=args.users,
+        seed=args.seed,
+    )
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,12 @@
+import logging
 import os
 import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class Config:
     TOKEN = os.getenv("TOKEN", "")
@@ -19,15 +22,62 @@ class Config:
     END_HOUR = int(os.getenv("END_HOUR", "18"))
     BREAK_START_HOUR = int(os.getenv("BREAK_START_HOUR", "12"))
     BREAK_END_HOUR = int(os.getenv("BREAK_END_HOUR", "13"))
+    OPENING_HOURS = os.getenv("OPENING_HOURS", "")
     
     INTERVAL_MINUTES = int(os.getenv("INTERVAL_MINUTES", "40"))
     SESSION_MINUTES = int(os.getenv("SESSION_MINUTES", os.getenv("INTERVAL_MINUTES", "40")))
+    TREATMENTS = os.getenv("TREATMENTS", "")
     MAX_DAYS_AHEAD = int(os.getenv("MAX_DAYS_AHEAD", "30"))
     PRAYER_PREFETCH_DAYS = int(os.getenv("PRAYER_PREFETCH_DAYS", "30"))
+    EARLIEST_SLOTS_COUNT = int(os.getenv("EARLIEST_SLOTS_COUNT", "6"))
+    AUTO_ASSIGN_THERAPIST = os.getenv("AUTO_ASSIGN_THERAPIST", "false").lower() in ("1", "true", "yes")
+    GROUP_MAX_PATIENTS = int(os.getenv("GROUP_MAX_PATIENTS", "5"))
+    SERIES_MAX_OCCURRENCES = int(os.getenv("SERIES_MAX_OCCURRENCES", "12"))
     
     REMINDER_MINUTES_BEFORE = int(os.getenv("REMINDER_MINUTES_BEFORE", "30"))
     MIN_BOOKING_BUFFER_MINUTES = int(os.getenv("MIN_BOOKING_BUFFER_MINUTES", "5"))
     
+    LOG_FILE = os.getenv("LOG_FILE", "bot.log")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "jobs.sunnah_notifications.recipients=0.1")
+    
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_DRAIN_SECONDS = int(os.getenv("WEBHOOK_DRAIN_SECONDS", "30"))
+    
+    WORKER_ID = os.getenv("WORKER_ID", "")
+    LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "30"))
+    LEADER_HEARTBEAT_SECONDS = int(os.getenv("LEADER_HEARTBEAT_SECONDS", "10"))
+    REMINDER_SWEEP_SECONDS = int(os.getenv("REMINDER_SWEEP_SECONDS", "60"))
+    REMINDER_CLAIM_TIMEOUT_SECONDS = int(os.getenv("REMINDER_CLAIM_TIMEOUT_SECONDS", "300"))
+    REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "50"))
+    OUTBOX_SWEEP_SECONDS = int(os.getenv("OUTBOX_SWEEP_SECONDS", "10"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_RATE_PER_SECOND = float(os.getenv("OUTBOX_RATE_PER_SECOND", "20"))
+    
+    ADMIN_DIGEST_SECONDS = int(os.getenv("ADMIN_DIGEST_SECONDS", "300"))
+    ADMIN_ALERT_DEDUP_SECONDS = int(os.getenv("ADMIN_ALERT_DEDUP_SECONDS", "3600"))
+    
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    
+    UPCOMING_COUNT_TTL_SECONDS = int(os.getenv("UPCOMING_COUNT_TTL_SECONDS", "300"))
+    
+    BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "2000"))
+    BACKFILL_PAUSE_MS = int(os.getenv("BACKFILL_PAUSE_MS", "50"))
+    
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "100"))
+    SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "50"))
+    STARTUP_BUDGET_MS = int(os.getenv("STARTUP_BUDGET_MS", "3000"))
+    
     @classmethod
     def validate(cls):
         errors = []
@@ -53,13 +103,58 @@ class Config:
         if cls.SESSION_MINUTES < 1:
             errors.append("SESSION_MINUTES must be at least 1")
         
+        from services.slot_engine import parse_opening_hours, parse_treatments
+        try:
+            parse_opening_hours(cls.OPENING_HOURS)
+        except ValueError as e:
+            errors.append(f"OPENING_HOURS is invalid: {e}")
+        
+        try:
+            parse_treatments(cls.TREATMENTS)
+        except ValueError as e:
+            errors.append(f"TREATMENTS is invalid: {e}")
+        
+        if cls.WEBHOOK_URL:
+            if not cls.WEBHOOK_URL.startswith("https://"):
+                errors.append("WEBHOOK_URL must be an https:// URL")
+            if not cls.WEBHOOK_SECRET:
+                errors.append("WEBHOOK_SECRET is required when WEBHOOK_URL is set")
+            if cls.WEBHOOK_QUEUE_SIZE < 1 or cls.WEBHOOK_WORKERS < 1:
+                errors.append("WEBHOOK_QUEUE_SIZE and WEBHOOK_WORKERS must be at least 1")
+        
+        if cls.LEADER_HEARTBEAT_SECONDS < 1 or cls.LEADER_LEASE_SECONDS <= cls.LEADER_HEARTBEAT_SECONDS:
+            errors.append("LEADER_LEASE_SECONDS must be greater than LEADER_HEARTBEAT_SECONDS (>= 1)")
+        
+        if cls.REMINDER_SWEEP_SECONDS < 1 or cls.REMINDER_BATCH_SIZE < 1:
+            errors.append("REMINDER_SWEEP_SECONDS and REMINDER_BATCH_SIZE must be at least 1")
+        if cls.OUTBOX_SWEEP_SECONDS < 1 or cls.OUTBOX_BATCH_SIZE < 1 or cls.OUTBOX_RATE_PER_SECOND <= 0:
+            errors.append("OUTBOX_SWEEP_SECONDS and OUTBOX_BATCH_SIZE must be at least 1 and OUTBOX_RATE_PER_SECOND > 0")
+        if cls.ADMIN_DIGEST_SECONDS < 1 or cls.ADMIN_ALERT_DEDUP_SECONDS < 0:
+            errors.append("ADMIN_DIGEST_SECONDS must be at least 1 and ADMIN_ALERT_DEDUP_SECONDS >= 0")
+        
+        if cls.ARCHIVE_AFTER_DAYS < 0 or cls.ARCHIVE_BATCH_SIZE < 1:
+            errors.append("ARCHIVE_AFTER_DAYS must be >= 0 and ARCHIVE_BATCH_SIZE at least 1")
+        
+        if cls.EARLIEST_SLOTS_COUNT < 1:
+            errors.append("EARLIEST_SLOTS_COUNT must be at least 1")
+        
+        if cls.GROUP_MAX_PATIENTS < 2:
+            errors.append("GROUP_MAX_PATIENTS must be at least 2")
+        
+        if cls.SERIES_MAX_OCCURRENCES < 2:
+            errors.append("SERIES_MAX_OCCURRENCES must be at least 2")
+        
+        if cls.UPCOMING_COUNT_TTL_SECONDS < 0:
+            errors.append("UPCOMING_COUNT_TTL_SECONDS must be >= 0")
+        
+        if cls.BACKFILL_BATCH_SIZE < 1 or cls.BACKFILL_PAUSE_MS < 0:
+            errors.append("BACKFILL_BATCH_SIZE must be at least 1 and BACKFILL_PAUSE_MS >= 0")
+        
+        if cls.METRICS_PORT < 0 or cls.METRICS_PORT > 65535:
+            errors.append("METRICS_PORT must be between 0 and 65535")
+        
         if errors:
-            print("Configuration errors:")
-            for error in errors:
-                print(f"  - {error}")
+            logger.error("Configuration errors:\n" + "\n".join(f"  - {error}" for error in errors))
             sys.exit(1)
         
-        print("Configuration validated successfully")
-
-
-Config.validate()
+        logger.info("Configuration validated successfully")
@@ -1,38 +1,214 @@
 import aiosqlite
+import asyncio
 import logging
-from datetime import datetime, date
-from typing import Optional
+import sqlite3
+import time
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
 from config import Config
 from database.models import (
     THERAPISTS_TABLE, APPOINTMENTS_TABLE, WAITLIST_TABLE,
     HOLIDAY_WEEKLY_TABLE, HOLIDAY_DATES_TABLE, BROADCASTS_TABLE,
-    DAILY_HEALTH_CONTENT_TABLE, PRAYER_TIMES_CACHE_TABLE,
-    SEED_THERAPISTS, SEED_HOLIDAY_WEEKLY
+    DAILY_HEALTH_CONTENT_TABLE, PRAYER_TIMES_CACHE_TABLE, SCHEDULER_LEASE_TABLE,
+    APPOINTMENTS_ARCHIVE_TABLE, APPOINTMENTS_ARCHIVE_INDEXES,
+    NOTIFICATION_OUTBOX_TABLE, NOTIFICATION_OUTBOX_INDEXES,
+    SEED_THERAPISTS, SEED_HOLIDAY_WEEKLY,
+    Appointment, Therapist, WaitlistEntry, PrayerTimes, UserAppointments, OutboxMessage
 )
-from utils.datetime_helper import now_jakarta, overlaps, from_iso
+from database.migrations import MigrationRunner
+from utils.datetime_helper import now_jakarta, from_iso
+from utils.validators import normalize_phone
+from services.holiday_calendar import HolidayCalendar
+from services.schedule_store import ScheduleStore
+from utils.metrics import TimedConnection, timed_methods
 
 logger = logging.getLogger(__name__)
 
+# Columns shared by appointments and appointments_archive, in table order.
+APPOINTMENT_COLUMNS = (
+    "id, user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, "
+    "status, created_at, reminder_job_id, reminder_claimed_by, reminder_claimed_at, reminder_sent_at, start_ts, end_ts"
+)
+
+# Appointment model columns; `archived` tells callers which table the row came from.
+APPOINTMENT_LIST_SELECT = """
+SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
+       a.start_dt, a.duration_min, a.status, a.created_at, a.reminder_job_id,
+       t.name as therapist_name, {archived} as archived
+FROM {table} a
+LEFT JOIN therapists t ON a.therapist_id = t.id
+"""
+
+# A user's upcoming (confirmed, in the future; soonest first) and past (latest
+# first, hot + archive) appointments in one statement: each section is a
+# LIMITed range scan on the (user_id, start_dt) indexes, and the section
+# totals are uncorrelated COUNT(*) subqueries SQLite evaluates once.
+_USER_SECTION_ROWS = """
+SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
+       a.start_dt, a.duration_min, a.status, a.created_at, a.reminder_job_id,
+       t.name as therapist_name, {archived} as archived
+FROM {table} a
+LEFT JOIN therapists t ON a.therapist_id = t.id
+WHERE a.user_id = :user_id
+"""
+_UPCOMING = "a.status = 'confirmed' AND a.start_dt > :now"
+USER_APPOINTMENT_SECTIONS = f"""
+WITH totals AS (
+    SELECT (SELECT COUNT(*) FROM appointments a WHERE a.user_id = :user_id AND {_UPCOMING}) AS upcoming,
+           (SELECT COUNT(*) FROM appointments WHERE user_id = :user_id)
+           + (SELECT COUNT(*) FROM appointments_archive WHERE user_id = :user_id) AS total
+)
+SELECT * FROM (
+    SELECT u.*, 0 AS section, (SELECT upcoming FROM totals) AS section_total FROM (
+        {_USER_SECTION_ROWS.format(table="appointments", archived=0)} AND {_UPCOMING}
+        ORDER BY a.start_dt ASC LIMIT :upcoming_limit
+    ) u
+)
+UNION ALL
+SELECT * FROM (
+    SELECT p.*, 1 AS section, (SELECT total - upcoming FROM totals) AS section_total FROM (
+        {_USER_SECTION_ROWS.format(table="appointments", archived=0)} AND NOT ({_UPCOMING})
+        UNION ALL
+        {_USER_SECTION_ROWS.format(table="appointments_archive", archived=1)}
+        ORDER BY start_dt DESC LIMIT :past_limit
+    ) p
+)
+"""
+
+THERAPIST_SELECT = "SELECT id, name, gender, active, inactive_start, inactive_end FROM therapists"
+WAITLIST_SELECT = "SELECT id, chat_id, name, phone, gender, requested_date, created_at, phone_normalized FROM waitlist"
+PRAYER_TIMES_SELECT = "SELECT date, fajr, dhuhr, asr, maghrib, isha FROM prayer_times_cache"
+
+# Everything the schedule store holds, in one statement: confirmed appointments
+# from a start_dt cutoff (the (status, start_dt) index) and scheduled leave.
+SCHEDULE_LOAD = """
+SELECT 'appointment', id, therapist_id, start_dt, duration_min, start_ts, end_ts
+FROM appointments WHERE status = 'confirmed' AND start_dt >= ?
+UNION ALL
+SELECT 'leave', NULL, id, inactive_start, NULL, NULL, inactive_end
+FROM therapists WHERE inactive_start IS NOT NULL AND inactive_end IS NOT NULL
+"""
+
+
+# Row-level guard for bookings: the new row is only written if no confirmed
+# appointment of the therapist overlaps it (the idx_appointments_therapist_end
+# index). The schedule store catches conflicts inside this process; this one
+# catches bookings another process committed since the store was loaded.
+NO_OVERLAP = """
+NOT EXISTS (
+    SELECT 1 FROM appointments b
+    WHERE b.therapist_id = {therapist_id} AND b.status = 'confirmed' AND b.end_ts > {start_ts} AND b.start_ts < {end_ts}
+)
+"""
+
+
+def _epoch(start_dt: str) -> int:
+    """start_dt as Unix seconds, for the start_ts/end_ts columns."""
+    return int(from_iso(start_dt).timestamp())
+
+
+class SharedConnection(TimedConnection):
+    """
+    The connection handlers share. Under WAL, a write issued while another
+    coroutine's cursor is still reading fails at once with "database is
+    locked" when another connection (a backfill, the archiver, another bot
+    process) holds or has just released the write lock: SQLite does not wait
+    on a stale read snapshot. If the failed statement opened the transaction
+    itself, nothing else is in it, so it is rolled back and retried once the
+    reader is done, for up to LOCKED_RETRY_SECONDS.
+    """
+    
+    LOCKED_RETRY_SECONDS = 5.0
+    
+    async def _retry_locked(self, run):
+        deadline = time.monotonic() + self.LOCKED_RETRY_SECONDS
+        while True:
+            idle = not self.in_transaction
+            try:
+                return await run()
+            except sqlite3.OperationalError as e:
+                if not idle or "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+                if self.in_transaction:
+                    await self.rollback()
+                await asyncio.sleep(0.01)
+    
+    async def execute(self, sql: str, parameters=None):
+        return await self._retry_locked(lambda: super(SharedConnection, self).execute(sql, parameters))
+    
+    async def executemany(self, sql: str, parameters):
+        parameters = list(parameters)
+        return await self._retry_locked(lambda: super(SharedConnection, self).executemany(sql, parameters))
 
+
+@timed_methods
 class Database:
     def __init__(self, db_path: str = Config.DB_PATH):
         self.db_path = db_path
         self.conn: Optional[aiosqlite.Connection] = None
+        self.holidays = HolidayCalendar()
+        self.schedule = ScheduleStore()
+        self.migrations: Optional[MigrationRunner] = None
+        # user_id -> (upcoming count, valid until epoch seconds); see count_user_upcoming().
+        self._upcoming_counts: Dict[int, Tuple[int, float]] = {}
+    
+    async def _open_connection(self, wrapper=TimedConnection) -> TimedConnection:
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        return wrapper(conn)
     
     async def connect(self):
-        self.conn = await aiosqlite.connect(self.db_path)
-        self.conn.row_factory = aiosqlite.Row
-        await self._create_tables()
-        await self._migrate_add_inactive_columns()
-        await self._migrate_add_waitlist_phone()
-        await self._seed_data()
+        self.conn = await self._open_connection(SharedConnection)
+        # WAL lets several bot processes read while one writes (see services/coordination.py).
+        await self.conn.execute("PRAGMA journal_mode=WAL")
+        self.migrations = MigrationRunner(self.conn, Config.BACKFILL_BATCH_SIZE, Config.BACKFILL_PAUSE_MS / 1000)
+        if await self.migrations.is_current():
+            logger.info(f"Database connected: {self.db_path} (schema current)")
+            return
+        
+        await self._create_schema()
+        await self.migrations.migrate()
+        # Backfills run after startup; readers check backfill_done() before relying on their columns.
+        pending = await self.migrations.pending_backfills()
+        if pending:
+            self.migrations.start_backfills(pending, await self._open_connection())
+        else:
+            await self.migrations.mark_current()
         logger.info(f"Database connected: {self.db_path}")
     
+    async def _fetchall(self, model, query: str, params: tuple = ()):
+        """Run query and build `model` objects straight from the cursor, skipping Row."""
+        cursor = await self.conn.execute(query, params)
+        cursor.row_factory = model.from_row
+        return await cursor.fetchall()
+    
+    async def _fetchone(self, model, query: str, params: tuple = ()):
+        cursor = await self.conn.execute(query, params)
+        cursor.row_factory = model.from_row
+        return await cursor.fetchone()
+    
+    def backfill_done(self, name: str) -> bool:
+        return self.migrations is not None and name in self.migrations.completed
+    
     async def close(self):
+        if self.migrations:
+            await self.migrations.stop()
         if self.conn:
             await self.conn.close()
             logger.info("Database connection closed")
     
+    async def _create_schema(self):
+        """Tables and seed rows in one write transaction (IMMEDIATE, so two starting processes queue up)."""
+        try:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            await self._create_tables()
+            await self._seed_data()
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
+        self.holidays.invalidate()
+    
     async def _create_tables(self):
         await self.conn.execute(THERAPISTS_TABLE)
         await self.conn.execute(APPOINTMENTS_TABLE)
@@ -42,39 +218,13 @@ class Database:
         await self.conn.execute(BROADCASTS_TABLE)
         await self.conn.execute(DAILY_HEALTH_CONTENT_TABLE)
         await self.conn.execute(PRAYER_TIMES_CACHE_TABLE)
-        await self.conn.commit()
-    
-    async def _migrate_add_inactive_columns(self):
-        try:
-            cursor = await self.conn.execute("PRAGMA table_info(therapists)")
-            columns = await cursor.fetchall()
-            column_names = [col[1] for col in columns]
-            
-            if 'inactive_start' not in column_names:
-                await self.conn.execute("ALTER TABLE therapists ADD COLUMN inactive_start TEXT DEFAULT NULL")
-                logger.info("Migration: Added inactive_start column to therapists table")
-            
-            if 'inactive_end' not in column_names:
-                await self.conn.execute("ALTER TABLE therapists ADD COLUMN inactive_end TEXT DEFAULT NULL")
-                logger.info("Migration: Added inactive_end column to therapists table")
-            
-            await self.conn.commit()
-        except Exception as e:
-            logger.error(f"Migration error: {e}")
-    
-    async def _migrate_add_waitlist_phone(self):
-        try:
-            cursor = await self.conn.execute("PRAGMA table_info(waitlist)")
-            columns = await cursor.fetchall()
-            column_names = [col[1] for col in columns]
-            
-            if 'phone' not in column_names:
-                await self.conn.execute("ALTER TABLE waitlist ADD COLUMN phone TEXT")
-                logger.info("Migration: Added phone column to waitlist table")
-            
-            await self.conn.commit()
-        except Exception as e:
-            logger.error(f"Migration error for waitlist: {e}")
+        await self.conn.execute(SCHEDULER_LEASE_TABLE)
+        await self.conn.execute(APPOINTMENTS_ARCHIVE_TABLE)
+        for index in APPOINTMENTS_ARCHIVE_INDEXES:
+            await self.conn.execute(index)
+        await self.conn.execute(NOTIFICATION_OUTBOX_TABLE)
+        for index in NOTIFICATION_OUTBOX_INDEXES:
+            await self.conn.execute(index)
     
     async def _seed_data(self):
         cursor = await self.conn.execute("SELECT COUNT(*) FROM therapists")
@@ -87,30 +237,22 @@ class Database:
             )
             logger.info("Seeded therapists table")
         
-        for weekday in SEED_HOLIDAY_WEEKLY:
-            await self.conn.execute(
-                "INSERT OR IGNORE INTO holiday_weekly (weekday) VALUES (?)",
-                (weekday,)
-            )
-        
-        await self.conn.commit()
+        await self.conn.executemany(
+            "INSERT OR IGNORE INTO holiday_weekly (weekday) VALUES (?)",
+            [(weekday,) for weekday in SEED_HOLIDAY_WEEKLY]
+        )
         logger.info("Database seeding completed")
     
     async def get_therapists(self, active_only: bool = True):
-        query = "SELECT id, name, gender, active, inactive_start, inactive_end FROM therapists"
+        query = THERAPIST_SELECT
         if active_only:
             query += " WHERE active = 1"
         query += " ORDER BY name"
         
-        cursor = await self.conn.execute(query)
-        return await cursor.fetchall()
+        return await self._fetchall(Therapist, query)
     
     async def get_therapist(self, therapist_id: int):
-        cursor = await self.conn.execute(
-            "SELECT id, name, gender, active, inactive_start, inactive_end FROM therapists WHERE id = ?",
-            (therapist_id,)
-        )
-        return await cursor.fetchone()
+        return await self._fetchone(Therapist, THERAPIST_SELECT + " WHERE id = ?", (therapist_id,))
     
     async def add_therapist(self, name: str, gender: str):
         cursor = await self.conn.execute(
@@ -126,6 +268,7 @@ class Database:
             (therapist_id,)
         )
         await self.conn.commit()
+        self.schedule.clear_leave(therapist_id)
     
     async def update_therapist(self, therapist_id: int, name: str = None, gender: str = None):
         updates = []
@@ -165,6 +308,7 @@ class Database:
             (new_status, therapist_id)
         )
         await self.conn.commit()
+        self.schedule.clear_leave(therapist_id)
         return new_status == 1
     
     async def schedule_therapist_inactive(self, therapist_id: int, inactive_start: str, inactive_end: str):
@@ -183,15 +327,16 @@ class Database:
             )
         
         await self.conn.commit()
+        self.schedule.set_leave(therapist_id, _epoch(inactive_start), _epoch(inactive_end))
         logger.info(f"Therapist {therapist_id} scheduled inactive from {inactive_start} to {inactive_end}")
     
     async def get_therapists_to_deactivate(self):
         now = now_jakarta().isoformat()
-        cursor = await self.conn.execute(
-            "SELECT id, name, inactive_start FROM therapists WHERE active = 1 AND inactive_start IS NOT NULL AND inactive_start <= ? AND inactive_end IS NOT NULL",
+        return await self._fetchall(
+            Therapist,
+            THERAPIST_SELECT + " WHERE active = 1 AND inactive_start IS NOT NULL AND inactive_start <= ? AND inactive_end IS NOT NULL",
             (now,)
         )
-        return await cursor.fetchall()
     
     async def deactivate_therapist(self, therapist_id: int):
         await self.conn.execute(
@@ -203,11 +348,11 @@ class Database:
     
     async def get_therapists_to_reactivate(self):
         now = now_jakarta().isoformat()
-        cursor = await self.conn.execute(
-            "SELECT id, name, inactive_end FROM therapists WHERE active = 0 AND inactive_end IS NOT NULL AND inactive_end <= ?",
+        return await self._fetchall(
+            Therapist,
+            THERAPIST_SELECT + " WHERE active = 0 AND inactive_end IS NOT NULL AND inactive_end <= ?",
             (now,)
         )
-        return await cursor.fetchall()
     
     async def reactivate_therapist(self, therapist_id: int):
         await self.conn.execute(
@@ -215,6 +360,7 @@ class Database:
             (therapist_id,)
         )
         await self.conn.commit()
+        self.schedule.clear_leave(therapist_id)
         logger.info(f"Therapist {therapist_id} reactivated")
     
     async def cancel_scheduled_inactive(self, therapist_id: int):
@@ -223,138 +369,531 @@ class Database:
             (therapist_id,)
         )
         await self.conn.commit()
+        self.schedule.clear_leave(therapist_id)
         logger.info(f"Cancelled inactive schedule for therapist {therapist_id}")
     
-    async def therapist_free(self, therapist_id: int, start_iso: str, duration_min: int) -> bool:
-        start_dt = from_iso(start_iso)
-        
+    async def therapist_free(self, therapist_id: int, start_iso: str, duration_min: int,
+                             ignore: Optional[int] = None) -> bool:
+        start_ts = _epoch(start_iso)
+        schedule = await self._schedule_store()
+        return schedule.is_free(therapist_id, start_ts, start_ts + duration_min * 60, ignore)
+    
+    async def get_busy_intervals(self, therapist_ids: List[int], start_iso: str, end_iso: str,
+                                 ignore: Optional[int] = None) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Busy time (confirmed appointments and scheduled leave) of the given
+        therapists overlapping [start_iso, end_iso), as (start_ts, end_ts)
+        Unix-second pairs per therapist sorted by start; appointment `ignore`
+        is left out (the one being rescheduled). Served from the schedule
+        store; no query.
+        """
+        schedule = await self._schedule_store()
+        window_start, window_end = _epoch(start_iso), _epoch(end_iso)
+        return {therapist_id: schedule.busy(therapist_id, window_start, window_end, ignore) for therapist_id in therapist_ids}
+    
+    async def get_slot_neighbours(self, therapist_ids: List[int], start_iso: str,
+                                  duration_min: int) -> Dict[int, Tuple[Optional[int], Optional[int], int]]:
+        """
+        For each therapist free for the session: the end of their busy time
+        just before it, the start of the busy time just after it (Unix
+        seconds, None if nothing that day or later), and the seconds already
+        booked that day. Served from the schedule store; no query.
+        """
+        schedule = await self._schedule_store()
+        start_ts = _epoch(start_iso)
+        end_ts = start_ts + duration_min * 60
+        return {
+            therapist_id: schedule.neighbours(therapist_id, start_ts, end_ts) + (schedule.day_load(therapist_id, start_ts),)
+            for therapist_id in therapist_ids
+        }
+    
+    async def get_series_conflicts(self, therapist_id: int, starts: List[str], duration_min: int) -> List[str]:
+        """The starts (ISO) at which the therapist is busy, for a whole series in one schedule-store call; no query."""
+        schedule = await self._schedule_store()
+        spans = [(_epoch(start_dt), _epoch(start_dt) + duration_min * 60) for start_dt in starts]
+        return [starts[i] for i in schedule.conflicts(therapist_id, spans)]
+    
+    async def _schedule_store(self) -> ScheduleStore:
+        if not self.schedule.loaded:
+            cursor = await self.conn.execute("PRAGMA data_version")
+            data_version = (await cursor.fetchone())[0]
+            # A day of margin on the indexed start_dt range covers other UTC offsets; ended rows are dropped below.
+            cursor = await self.conn.execute(SCHEDULE_LOAD, ((now_jakarta() - timedelta(days=1)).date().isoformat(),))
+            now_ts = time.time()
+            appointments, leave = [], []
+            for kind, appointment_id, therapist_id, start, duration_min, start_ts, end in await cursor.fetchall():
+                if kind == 'leave':
+                    leave.append((therapist_id, _epoch(start), _epoch(end)))
+                    continue
+                if start_ts is None:
+                    start_ts = _epoch(start)
+                    end = start_ts + duration_min * 60
+                if end > now_ts:
+                    appointments.append((appointment_id, therapist_id, start_ts, end))
+            self.schedule.load(appointments, leave, data_version)
+            logger.info(f"Schedule store loaded: {len(appointments)} appointments, {len(leave)} leave windows")
+        return self.schedule
+    
+    async def load_schedule(self):
+        """Load the schedule store now (startup) instead of on the first availability check."""
+        await self._schedule_store()
+    
+    async def sync_schedule(self):
+        """Drop the schedule store if another connection (another bot process) committed since it was loaded."""
+        if self.schedule.loaded:
+            cursor = await self.conn.execute("PRAGMA data_version")
+            if (await cursor.fetchone())[0] != self.schedule.data_version:
+                self.schedule.invalidate()
+    
+    async def _reschedule(self, appointment_id: int):
+        """Re-read an edited appointment's therapist and time into the schedule store."""
         cursor = await self.conn.execute(
-            "SELECT inactive_start, inactive_end FROM therapists WHERE id = ?",
-            (therapist_id,)
+            "SELECT therapist_id, status, start_dt, duration_min FROM appointments WHERE id = ?",
+            (appointment_id,)
         )
-        therapist = await cursor.fetchone()
+        row = await cursor.fetchone()
+        if row and row['status'] == 'confirmed':
+            start_ts = _epoch(row['start_dt'])
+            self.schedule.add(appointment_id, row['therapist_id'], start_ts, start_ts + row['duration_min'] * 60)
+        else:
+            self.schedule.remove(appointment_id)
+    
+    async def add_appointment(
+        self, user_id: int, user_name: str, patient_gender: str,
+        therapist_id: int, start_dt: str, duration_min: int, patient_address: str = ""
+    ) -> Optional[int]:
+        """
+        Book one appointment. The therapist is re-checked and the time
+        reserved in the schedule store before the first await, so two
+        patients confirming the same slot cannot both get it. Returns the
+        new id, or None (nothing written) if the therapist is no longer free.
+        """
+        schedule = await self._schedule_store()
+        start_ts = _epoch(start_dt)
+        end_ts = start_ts + duration_min * 60
+        if not schedule.is_free(therapist_id, start_ts, end_ts):
+            return None
+        reservation = schedule.reserve(therapist_id, start_ts, end_ts)
         
-        if therapist and therapist['inactive_start'] and therapist['inactive_end']:
-            inactive_start_dt = from_iso(therapist['inactive_start'])
-            inactive_end_dt = from_iso(therapist['inactive_end'])
-            inactive_duration = int((inactive_end_dt - inactive_start_dt).total_seconds() / 60)
-            
-            if overlaps(start_dt, duration_min, therapist['inactive_start'], inactive_duration):
-                return False
+        created_at = now_jakarta().isoformat()
+        try:
+            cursor = await self.conn.execute(
+                f"""INSERT INTO appointments 
+                (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, status, created_at,
+                 start_ts, end_ts)
+                SELECT ?, ?, ?, ?, ?, ?, ?, 'confirmed', ?, ?, ?
+                WHERE {NO_OVERLAP.format(therapist_id="?", start_ts="?", end_ts="?")}
+                RETURNING id""",
+                (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, created_at,
+                 start_ts, end_ts, therapist_id, start_ts, end_ts)
+            )
+            # fetchall, not fetchone: the statement must run to completion before the commit.
+            rows = await cursor.fetchall()
+            await self.conn.commit()
+        except Exception:
+            self.schedule.remove(reservation)
+            raise
+        self.schedule.remove(reservation)
+        if not rows:
+            # Booked by another process; the store missed it, so reload it.
+            self.schedule.invalidate()
+            return None
+        self._forget_upcoming(user_id)
+        self.schedule.add(rows[0][0], therapist_id, start_ts, end_ts)
+        return rows[0][0]
+    
+    async def add_group_appointments(
+        self, user_id: int, start_dt: str, patient_address: str,
+        members: List[Tuple[str, str, int, int]]
+    ) -> Optional[List[int]]:
+        """
+        Book a group at one start time, all or nothing. members: (user_name,
+        patient_gender, therapist_id, duration_min), one therapist each.
+        Returns the appointment ids in member order, or None (nothing
+        written) if a therapist is no longer free. The therapists' times are
+        reserved in the schedule store before the first await, and the rows
+        go in as one INSERT ... SELECT that writes every row or none: none
+        when any member overlaps a confirmed row in the database (another
+        bot process's booking the store has not seen yet).
+        """
+        if len({therapist_id for _, _, therapist_id, _ in members}) != len(members):
+            return None
+        schedule = await self._schedule_store()
+        start_ts = _epoch(start_dt)
+        if not all(schedule.is_free(therapist_id, start_ts, start_ts + duration_min * 60)
+                   for _, _, therapist_id, duration_min in members):
+            return None
+        reservations = [schedule.reserve(therapist_id, start_ts, start_ts + duration_min * 60)
+                        for _, _, therapist_id, duration_min in members]
         
-        cursor = await self.conn.execute(
-            "SELECT start_dt, duration_min FROM appointments WHERE therapist_id = ? AND status = 'confirmed'",
-            (therapist_id,)
+        created_at = now_jakarta().isoformat()
+        params = []
+        for user_name, patient_gender, therapist_id, duration_min in members:
+            params.extend((user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min,
+                           created_at, start_ts, start_ts + duration_min * 60))
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, 'confirmed', ?, ?, ?)"] * len(members))
+        columns = (
+            "user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, status, "
+            "created_at, start_ts, end_ts"
         )
-        appointments = await cursor.fetchall()
-        
-        for appt in appointments:
-            if overlaps(start_dt, duration_min, appt['start_dt'], appt['duration_min']):
-                return False
+        try:
+            cursor = await self.conn.execute(
+                f"""WITH new ({columns}) AS (VALUES {placeholders})
+                INSERT INTO appointments ({columns})
+                SELECT {columns} FROM new
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM new n
+                    WHERE NOT {NO_OVERLAP.format(therapist_id="n.therapist_id", start_ts="n.start_ts", end_ts="n.end_ts")}
+                )
+                RETURNING id, therapist_id""",
+                params
+            )
+            rows = await cursor.fetchall()
+            await self.conn.commit()
+        except Exception:
+            for reservation in reservations:
+                self.schedule.remove(reservation)
+            raise
+        for reservation in reservations:
+            self.schedule.remove(reservation)
+        if not rows:
+            # A therapist was booked by another process; the store missed it, so reload it.
+            self.schedule.invalidate()
+            return None
+        self._forget_upcoming(user_id)
         
-        return True
+        ids_by_therapist = {row['therapist_id']: row['id'] for row in rows}
+        ids = []
+        for _, _, therapist_id, duration_min in members:
+            ids.append(ids_by_therapist[therapist_id])
+            self.schedule.add(ids[-1], therapist_id, start_ts, start_ts + duration_min * 60)
+        return ids
     
-    async def add_appointment(
-        self, user_id: int, user_name: str, patient_gender: str,
-        therapist_id: int, start_dt: str, duration_min: int, patient_address: str = ""
-    ):
+    async def add_appointment_series(
+        self, user_id: int, user_name: str, patient_gender: str, therapist_id: int,
+        starts: List[str], duration_min: int, patient_address: str = ""
+    ) -> Tuple[List[Tuple[int, str]], List[str]]:
+        """
+        Book the occurrences of a recurring series with one therapist. All
+        starts are checked against the schedule store in one call and the
+        free ones reserved there before the first await; they go in with one
+        executemany and a single commit, each row skipped if it overlaps a
+        confirmed appointment already in the database (another bot
+        process's). Returns ([(appointment_id, start_dt), ...],
+        [conflicting start_dt, ...]).
+        """
+        schedule = await self._schedule_store()
+        spans = [(_epoch(start_dt), _epoch(start_dt) + duration_min * 60) for start_dt in starts]
+        busy = set(schedule.conflicts(therapist_id, spans))
+        conflicts = [starts[i] for i in sorted(busy)]
+        free = [(start_dt, span) for i, (start_dt, span) in enumerate(zip(starts, spans)) if i not in busy]
+        if not free:
+            return [], conflicts
+        reservations = [schedule.reserve(therapist_id, *span) for _, span in free]
+        
         created_at = now_jakarta().isoformat()
+        try:
+            await self.conn.executemany(
+                f"""INSERT INTO appointments 
+                (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, status, created_at,
+                 start_ts, end_ts)
+                SELECT ?, ?, ?, ?, ?, ?, ?, 'confirmed', ?, ?, ?
+                WHERE {NO_OVERLAP.format(therapist_id="?", start_ts="?", end_ts="?")}""",
+                [(user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, created_at,
+                  start_ts, end_ts, therapist_id, start_ts, end_ts) for start_dt, (start_ts, end_ts) in free]
+            )
+            # executemany leaves lastrowid unset; created_at marks this batch (the (user_id, start_dt) index).
+            placeholders = ", ".join("?" * len(free))
+            cursor = await self.conn.execute(
+                f"""SELECT id, start_dt FROM appointments
+                WHERE user_id = ? AND start_dt IN ({placeholders}) AND therapist_id = ? AND created_at = ?""",
+                (user_id, *[start_dt for start_dt, _ in free], therapist_id, created_at)
+            )
+            ids = {row['start_dt']: row['id'] for row in await cursor.fetchall()}
+            await self.conn.commit()
+        except Exception:
+            # Some rows of the batch may be written; drop them and reload the store from the database.
+            await self.conn.rollback()
+            self.schedule.invalidate()
+            raise
+        for reservation in reservations:
+            self.schedule.remove(reservation)
+        self._forget_upcoming(user_id)
+        
+        booked = []
+        for start_dt, (start_ts, end_ts) in free:
+            if start_dt in ids:
+                self.schedule.add(ids[start_dt], therapist_id, start_ts, end_ts)
+                booked.append((ids[start_dt], start_dt))
+            else:
+                conflicts.append(start_dt)
+        if len(booked) < len(free):
+            # Skipped by the database guard: another process booked the therapist; the store missed it.
+            self.schedule.invalidate()
+            conflicts.sort(key=starts.index)
+        return booked, conflicts
+    
+    async def get_therapist_appointments_between(self, therapist_id: int, start_iso: str, end_iso: str):
+        """
+        A therapist's confirmed appointments overlapping [start_iso, end_iso),
+        soonest first: one range scan on idx_appointments_therapist_end
+        (therapist_id, end_ts), bounded above by start_ts. Until the epoch
+        backfill is done, start_dt with a session of margin stands in.
+        """
+        select = APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0)
+        if self.backfill_done("index:idx_appointments_therapist_end"):
+            return await self._fetchall(
+                Appointment,
+                select + """ WHERE a.therapist_id = ? AND a.status = 'confirmed' AND a.end_ts > ? AND a.start_ts < ?
+                ORDER BY a.start_ts""",
+                (therapist_id, _epoch(start_iso), _epoch(end_iso))
+            )
+        rows = await self._fetchall(
+            Appointment,
+            select + """ WHERE a.therapist_id = ? AND a.status = 'confirmed' AND a.start_dt >= ? AND a.start_dt < ?
+            ORDER BY a.start_dt""",
+            (therapist_id, (from_iso(start_iso) - timedelta(days=1)).isoformat(), end_iso)
+        )
+        window_start = from_iso(start_iso)
+        return [appt for appt in rows if appt.end > window_start]
+    
+    async def get_confirmed_appointments_between(self, start_iso: str, end_iso: Optional[str] = None):
+        """
+        Confirmed appointments starting in [start_iso, end_iso), open-ended
+        without end_iso, soonest first: one range scan on
+        idx_appointments_status_start (status, start_dt).
+        """
+        query = APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0) + " WHERE a.status = 'confirmed' AND a.start_dt >= ?"
+        params = [start_iso]
+        if end_iso is not None:
+            query += " AND a.start_dt < ?"
+            params.append(end_iso)
+        return await self._fetchall(Appointment, query + " ORDER BY a.start_dt", tuple(params))
+    
+    async def get_availability_matrix(self, therapist_ids: List[int],
+                                      sessions: List[Tuple[str, int]]) -> Dict[int, List[bool]]:
+        """Whether each therapist is free for each (start_iso, duration_min) session; served from the schedule store."""
+        schedule = await self._schedule_store()
+        spans = [(_epoch(start_dt), _epoch(start_dt) + duration_min * 60) for start_dt, duration_min in sessions]
+        return {
+            therapist_id: [schedule.is_free(therapist_id, start, end) for start, end in spans]
+            for therapist_id in therapist_ids
+        }
+    
+    async def reassign_appointments(self, changes: List[Tuple[int, int]]) -> List[int]:
+        """
+        Move appointments to other therapists, (appointment_id, therapist_id)
+        pairs, in one transaction. Each new therapist is re-checked against
+        the schedule store (including moves earlier in the batch); the ones
+        no longer free are left alone. Returns the ids that moved.
+        """
+        schedule = await self._schedule_store()
+        moved = []
+        for appointment_id, therapist_id in changes:
+            entry = schedule.span(appointment_id)
+            if entry and schedule.is_free(therapist_id, *entry):
+                schedule.add(appointment_id, therapist_id, *entry)
+                moved.append((therapist_id, appointment_id))
+        if not moved:
+            return []
+        
+        try:
+            await self.conn.executemany(
+                "UPDATE appointments SET therapist_id = ? WHERE id = ? AND status = 'confirmed'",
+                moved
+            )
+            await self.conn.commit()
+        except Exception:
+            # The store already holds the moves; reload it from the database.
+            self.schedule.invalidate()
+            raise
+        self._forget_upcoming()
+        return [appointment_id for _, appointment_id in moved]
+    
+    async def move_appointments(self, moves: List[Tuple[int, int, str]]) -> List[int]:
+        """
+        Move appointments to a new (therapist_id, start_dt), keeping their
+        length, as (appointment_id, therapist_id, start_dt) triples in one
+        transaction. Each target is re-checked against the schedule store
+        (including moves earlier in the batch, but not the appointment's own
+        current time); the ones no longer free are left alone. Reminders of
+        moved rows are reset. Returns the ids that moved.
+        """
+        schedule = await self._schedule_store()
+        moved = []
+        for appointment_id, therapist_id, start_dt in moves:
+            entry = schedule.span(appointment_id)
+            if not entry:
+                continue
+            start_ts = _epoch(start_dt)
+            end_ts = start_ts + entry[1] - entry[0]
+            if schedule.is_free(therapist_id, start_ts, end_ts, ignore=appointment_id):
+                schedule.add(appointment_id, therapist_id, start_ts, end_ts)
+                moved.append((therapist_id, start_dt, start_ts, end_ts, appointment_id))
+        if not moved:
+            return []
+        
+        try:
+            await self.conn.executemany(
+                """UPDATE appointments SET therapist_id = ?, start_dt = ?, start_ts = ?, end_ts = ?,
+                reminder_claimed_by = NULL, reminder_claimed_at = NULL, reminder_sent_at = NULL
+                WHERE id = ? AND status = 'confirmed'""",
+                moved
+            )
+            await self.conn.commit()
+        except Exception:
+            # The store already holds the moves; reload it from the database.
+            self.schedule.invalidate()
+            raise
+        self._forget_upcoming()
+        return [row[-1] for row in moved]
+    
+    async def cancel_appointments(self, appointment_ids: List[int]) -> List[int]:
+        """Cancel many confirmed appointments in one statement; returns the ids that were still confirmed."""
+        if not appointment_ids:
+            return []
+        placeholders = ", ".join("?" * len(appointment_ids))
         cursor = await self.conn.execute(
-            """INSERT INTO appointments 
-            (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, status, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 'confirmed', ?)""",
-            (user_id, user_name, patient_gender, patient_address, therapist_id, start_dt, duration_min, created_at)
+            f"UPDATE appointments SET status = 'cancelled' WHERE id IN ({placeholders}) AND status = 'confirmed' RETURNING id",
+            tuple(appointment_ids)
         )
+        cancelled = [row[0] for row in await cursor.fetchall()]
         await self.conn.commit()
-        return cursor.lastrowid
+        self._forget_upcoming()
+        for appointment_id in cancelled:
+            self.schedule.remove(appointment_id)
+        return cancelled
     
-    async def get_appointments(self, status: Optional[str] = None):
-        query = """
-        SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
-               a.start_dt, a.duration_min, a.status, a.created_at,
-               t.name as therapist_name
-        FROM appointments a
-        LEFT JOIN therapists t ON a.therapist_id = t.id
-        """
-        if status:
-            query += " WHERE a.status = ?"
-            cursor = await self.conn.execute(query, (status,))
-        else:
-            cursor = await self.conn.execute(query)
+    async def set_reminder_jobs(self, jobs: List[Tuple[int, str]]):
+        """Record (appointment_id, reminder_job_id) pairs in one executemany."""
+        if not jobs:
+            return
+        await self.conn.executemany(
+            "UPDATE appointments SET reminder_job_id = ? WHERE id = ?",
+            [(job_id, appointment_id) for appointment_id, job_id in jobs]
+        )
+        await self.conn.commit()
+    
+    async def get_appointments(self, status: Optional[str] = None, include_archive: bool = False):
+        """Hot table only by default; include_archive adds appointments_archive (exports, history)."""
+        tables = [("appointments", 0)]
+        if include_archive:
+            tables.append(("appointments_archive", 1))
         
-        return await cursor.fetchall()
+        parts = []
+        params = []
+        for table, archived in tables:
+            query = APPOINTMENT_LIST_SELECT.format(table=table, archived=archived)
+            if status:
+                query += " WHERE a.status = ?"
+                params.append(status)
+            parts.append(query)
+        
+        return await self._fetchall(Appointment, " UNION ALL ".join(parts), tuple(params))
     
     async def get_upcoming_appointments(self):
         now = now_jakarta().isoformat()
-        cursor = await self.conn.execute(
-            """
-            SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
-                   a.start_dt, a.duration_min, a.status, a.created_at,
-                   t.name as therapist_name
-            FROM appointments a
-            LEFT JOIN therapists t ON a.therapist_id = t.id
-            WHERE a.status = 'confirmed' AND a.start_dt > ?
-            ORDER BY a.start_dt ASC
-            """,
+        return await self._fetchall(
+            Appointment,
+            APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0)
+            + " WHERE a.status = 'confirmed' AND a.start_dt > ? ORDER BY a.start_dt ASC",
             (now,)
         )
-        return await cursor.fetchall()
     
     async def get_all_appointments_for_admin(self, limit: int = 50, offset: int = 0):
-        cursor = await self.conn.execute(
-            """
-            SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
-                   a.start_dt, a.duration_min, a.status, a.created_at,
-                   t.name as therapist_name
-            FROM appointments a
-            LEFT JOIN therapists t ON a.therapist_id = t.id
-            ORDER BY a.start_dt DESC
-            LIMIT ? OFFSET ?
-            """,
+        return await self._fetchall(
+            Appointment,
+            APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0)
+            + " UNION ALL "
+            + APPOINTMENT_LIST_SELECT.format(table="appointments_archive", archived=1)
+            + " ORDER BY start_dt DESC LIMIT ? OFFSET ?",
             (limit, offset)
         )
-        return await cursor.fetchall()
     
     async def get_user_appointments(self, user_id: int, limit: int = 20, offset: int = 0):
+        return await self._fetchall(
+            Appointment,
+            APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0)
+            + " WHERE a.user_id = ? UNION ALL "
+            + APPOINTMENT_LIST_SELECT.format(table="appointments_archive", archived=1)
+            + " WHERE a.user_id = ? ORDER BY start_dt DESC LIMIT ? OFFSET ?",
+            (user_id, user_id, limit, offset)
+        )
+    
+    async def get_user_appointment_sections(self, user_id: int, upcoming_limit: int = 5,
+                                            past_limit: int = 5) -> UserAppointments:
+        """Upcoming and past appointments of a user, already partitioned, ordered and limited, in one query."""
+        cursor = await self.conn.execute(
+            USER_APPOINTMENT_SECTIONS,
+            {"user_id": user_id, "now": now_jakarta().isoformat(),
+             "upcoming_limit": upcoming_limit, "past_limit": past_limit}
+        )
+        cursor.row_factory = lambda _cursor, row: (row[13], row[14], Appointment(*row[:13]))
+        result = UserAppointments()
+        for section, total, appt in await cursor.fetchall():
+            if section == 0:
+                result.upcoming.append(appt)
+                result.upcoming_total = total
+            else:
+                result.past.append(appt)
+                result.past_total = total
+        self._remember_upcoming(user_id, result.upcoming_total, result.upcoming[0] if result.upcoming else None)
+        return result
+    
+    async def count_user_upcoming(self, user_id: int) -> int:
+        """
+        Number of upcoming confirmed appointments, for the main menu badge.
+        Cached per user until the soonest of them starts or
+        UPCOMING_COUNT_TTL_SECONDS pass (other processes' writes), and dropped
+        whenever this process books, cancels or moves an appointment.
+        """
+        cached = self._upcoming_counts.get(user_id)
+        if cached and cached[1] > time.time():
+            return cached[0]
         cursor = await self.conn.execute(
             """
-            SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
-                   a.start_dt, a.duration_min, a.status, a.created_at,
-                   t.name as therapist_name
-            FROM appointments a
-            LEFT JOIN therapists t ON a.therapist_id = t.id
-            WHERE a.user_id = ?
-            ORDER BY a.start_dt DESC
-            LIMIT ? OFFSET ?
+            SELECT COUNT(*), MIN(start_dt) FROM appointments
+            WHERE user_id = ? AND status = 'confirmed' AND start_dt > ?
             """,
-            (user_id, limit, offset)
+            (user_id, now_jakarta().isoformat())
         )
-        return await cursor.fetchall()
+        count, first_start = await cursor.fetchone()
+        self._remember_upcoming(user_id, count, from_iso(first_start) if first_start else None)
+        return count
+    
+    def _remember_upcoming(self, user_id: int, count: int, first):
+        valid_until = time.time() + Config.UPCOMING_COUNT_TTL_SECONDS
+        if first is not None:
+            first_start = first.start if isinstance(first, Appointment) else first
+            valid_until = min(valid_until, first_start.timestamp())
+        self._upcoming_counts[user_id] = (count, valid_until)
+    
+    def _forget_upcoming(self, user_id: Optional[int] = None):
+        if user_id is None:
+            self._upcoming_counts.clear()
+        else:
+            self._upcoming_counts.pop(user_id, None)
     
     async def get_user_upcoming_appointments(self, user_id: int):
         now = now_jakarta().isoformat()
-        cursor = await self.conn.execute(
-            """
-            SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
-                   a.start_dt, a.duration_min, a.status, a.created_at,
-                   t.name as therapist_name
-            FROM appointments a
-            LEFT JOIN therapists t ON a.therapist_id = t.id
-            WHERE a.user_id = ? AND a.status = 'confirmed' AND a.start_dt > ?
-            ORDER BY a.start_dt ASC
-            """,
+        return await self._fetchall(
+            Appointment,
+            APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0)
+            + " WHERE a.user_id = ? AND a.status = 'confirmed' AND a.start_dt > ? ORDER BY a.start_dt ASC",
             (user_id, now)
         )
-        return await cursor.fetchall()
     
     async def cancel_appointment(self, appointment_id: int):
         appt = await self.get_appointment_by_id(appointment_id)
-        if appt and appt['status'] != 'cancelled':
+        # Archived appointments are long past; there is nothing left to cancel.
+        if appt and appt.status != 'cancelled' and not appt.archived:
             await self.conn.execute(
                 "UPDATE appointments SET status = 'cancelled' WHERE id = ?",
                 (appointment_id,)
             )
             await self.conn.commit()
+            self._forget_upcoming(appt.user_id)
+            self.schedule.remove(appointment_id)
             return appt
         return None
     
@@ -363,31 +902,87 @@ class Database:
             "DELETE FROM appointments WHERE id = ?",
             (appointment_id,)
         )
+        await self.conn.execute(
+            "DELETE FROM appointments_archive WHERE id = ?",
+            (appointment_id,)
+        )
         await self.conn.commit()
+        self._forget_upcoming()
+        self.schedule.remove(appointment_id)
     
     async def get_appointment_by_id(self, appointment_id: int):
+        for table, archived in (("appointments", 0), ("appointments_archive", 1)):
+            appt = await self._fetchone(
+                Appointment,
+                APPOINTMENT_LIST_SELECT.format(table=table, archived=archived) + " WHERE a.id = ?",
+                (appointment_id,)
+            )
+            if appt:
+                return appt
+        return None
+    
+    async def archive_appointments(self, before: str, batch_size: int = 500) -> int:
+        """
+        Move one batch of appointments starting before `before` from the hot
+        table to appointments_archive in a single transaction. Returns the
+        number of rows moved (0 when nothing is left to archive).
+        
+        The batch runs on its own connection: a rollback there cannot undo
+        statements handlers issued on the shared one in the meantime, and
+        WAL lets handlers keep reading while it writes.
+        """
+        conn = await self._open_connection()
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            cursor = await conn.execute(
+                "SELECT id FROM appointments WHERE start_dt < ? ORDER BY id LIMIT ?",
+                (before, batch_size)
+            )
+            ids = [row[0] for row in await cursor.fetchall()]
+            if ids:
+                placeholders = ", ".join("?" * len(ids))
+                await conn.execute(
+                    f"""
+                    INSERT OR REPLACE INTO appointments_archive ({APPOINTMENT_COLUMNS}, archived_at)
+                    SELECT {APPOINTMENT_COLUMNS}, ? FROM appointments WHERE id IN ({placeholders})
+                    """,
+                    (now_jakarta().isoformat(), *ids)
+                )
+                await conn.execute(f"DELETE FROM appointments WHERE id IN ({placeholders})", tuple(ids))
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            await conn.close()
+        for appointment_id in ids:
+            self.schedule.remove(appointment_id)
+        return len(ids)
+    
+    async def count_appointments(self):
         cursor = await self.conn.execute(
-            """
-            SELECT a.id, a.user_id, a.user_name, a.patient_gender, a.patient_address, a.therapist_id,
-                   a.start_dt, a.duration_min, a.status, a.created_at, a.reminder_job_id,
-                   t.name as therapist_name
-            FROM appointments a
-            LEFT JOIN therapists t ON a.therapist_id = t.id
-            WHERE a.id = ?
-            """,
-            (appointment_id,)
+            "SELECT (SELECT COUNT(*) FROM appointments), (SELECT COUNT(*) FROM appointments_archive)"
         )
-        return await cursor.fetchone()
+        hot, archived = await cursor.fetchone()
+        return {"hot": hot, "archived": archived}
     
     async def update_appointment_status(self, appointment_id: int, new_status: str):
         appt = await self.get_appointment_by_id(appointment_id)
-        old_status = appt['status'] if appt else None
+        old_status = appt.status if appt else None
+        table = "appointments_archive" if appt and appt.archived else "appointments"
         
         await self.conn.execute(
-            "UPDATE appointments SET status = ? WHERE id = ?",
+            f"UPDATE {table} SET status = ? WHERE id = ?",
             (new_status, appointment_id)
         )
         await self.conn.commit()
+        if appt:
+            self._forget_upcoming(appt.user_id)
+            if new_status == 'confirmed' and not appt.archived:
+                start_ts = int(appt.start.timestamp())
+                self.schedule.add(appointment_id, appt.therapist_id, start_ts, start_ts + appt.duration_min * 60)
+            else:
+                self.schedule.remove(appointment_id)
         
         if appt and old_status != 'cancelled' and new_status == 'cancelled':
             return appt
@@ -412,6 +1007,20 @@ class Database:
         if start_dt is not None:
             updates.append("start_dt = ?")
             params.append(start_dt)
+            # A moved appointment gets a fresh reminder for its new time.
+            updates.append("reminder_claimed_by = NULL, reminder_claimed_at = NULL, reminder_sent_at = NULL")
+            start_ts = _epoch(start_dt)
+            updates.append("start_ts = ?")
+            params.append(start_ts)
+            if duration_min is not None:
+                updates.append("end_ts = ?")
+                params.append(start_ts + duration_min * 60)
+            else:
+                updates.append("end_ts = ? + duration_min * 60")
+                params.append(start_ts)
+        elif duration_min is not None:
+            updates.append("end_ts = start_ts + ?")
+            params.append(duration_min * 60)
         if duration_min is not None:
             updates.append("duration_min = ?")
             params.append(duration_min)
@@ -424,28 +1033,167 @@ class Database:
             query = f"UPDATE appointments SET {', '.join(updates)} WHERE id = ?"
             await self.conn.execute(query, tuple(params))
             await self.conn.commit()
+            if start_dt is not None:
+                self._forget_upcoming()
+            if therapist_id is not None or start_dt is not None or duration_min is not None:
+                await self._reschedule(appointment_id)
+    
+    async def claim_reminder(self, appointment_id: int, worker_id: str, start_dt: str) -> bool:
+        """Claim one appointment's reminder; False if it was cancelled, moved, sent or claimed elsewhere."""
+        cursor = await self.conn.execute(
+            """
+            UPDATE appointments SET reminder_claimed_by = ?, reminder_claimed_at = ?
+            WHERE id = ? AND start_dt = ? AND status = 'confirmed'
+              AND reminder_claimed_by IS NULL AND reminder_sent_at IS NULL
+            """,
+            (worker_id, now_jakarta().isoformat(), appointment_id, start_dt)
+        )
+        await self.conn.commit()
+        return cursor.rowcount == 1
+    
+    async def claim_due_reminders(self, worker_id: str, due_before: str, limit: int = 50):
+        """
+        Claim up to `limit` upcoming confirmed appointments starting at or
+        before due_before whose reminder is neither sent nor claimed, and
+        return them. Every worker can call this concurrently; each row is
+        claimed by exactly one.
+        """
+        now = now_jakarta().isoformat()
+        await self.conn.execute(
+            """
+            UPDATE appointments SET reminder_claimed_by = ?, reminder_claimed_at = ?
+            WHERE id IN (
+                SELECT id FROM appointments
+                WHERE status = 'confirmed' AND reminder_sent_at IS NULL AND reminder_claimed_by IS NULL
+                  AND start_dt > ? AND start_dt <= ?
+                ORDER BY start_dt
+                LIMIT ?
+            ) AND reminder_claimed_by IS NULL
+            """,
+            (worker_id, now, now, due_before, limit)
+        )
+        await self.conn.commit()
+        return await self._fetchall(
+            Appointment,
+            APPOINTMENT_LIST_SELECT.format(table="appointments", archived=0)
+            + " WHERE a.reminder_claimed_by = ? AND a.reminder_claimed_at = ? AND a.reminder_sent_at IS NULL"
+            + " ORDER BY a.start_dt",
+            (worker_id, now)
+        )
+    
+    async def mark_reminder_sent(self, appointment_id: int, worker_id: str):
+        await self.conn.execute(
+            "UPDATE appointments SET reminder_sent_at = ? WHERE id = ? AND reminder_claimed_by = ?",
+            (now_jakarta().isoformat(), appointment_id, worker_id)
+        )
+        await self.conn.commit()
+    
+    async def release_reminder_claim(self, appointment_id: int, worker_id: str):
+        await self.conn.execute(
+            """
+            UPDATE appointments SET reminder_claimed_by = NULL, reminder_claimed_at = NULL
+            WHERE id = ? AND reminder_claimed_by = ? AND reminder_sent_at IS NULL
+            """,
+            (appointment_id, worker_id)
+        )
+        await self.conn.commit()
+    
+    async def release_stale_reminder_claims(self, claimed_before: str) -> int:
+        """Free claims left behind by a worker that died between claiming and sending."""
+        cursor = await self.conn.execute(
+            """
+            UPDATE appointments SET reminder_claimed_by = NULL, reminder_claimed_at = NULL
+            WHERE status = 'confirmed' AND reminder_sent_at IS NULL
+              AND reminder_claimed_by IS NOT NULL AND reminder_claimed_at < ?
+            """,
+            (claimed_before,)
+        )
+        await self.conn.commit()
+        return cursor.rowcount
+    
+    async def enqueue_notifications(self, kind: str, messages: List[Tuple[int, str]]):
+        """Queue (chat_id, text) notifications for jobs/outbox.py in one executemany."""
+        if not messages:
+            return
+        created_at = now_jakarta().isoformat()
+        await self.conn.executemany(
+            "INSERT INTO notification_outbox (kind, chat_id, message, created_at) VALUES (?, ?, ?, ?)",
+            [(kind, chat_id, message, created_at) for chat_id, message in messages]
+        )
+        await self.conn.commit()
+    
+    async def claim_notifications(self, worker_id: str, limit: int, max_attempts: int):
+        """Claim up to `limit` unsent, unclaimed notifications (oldest first) and return them; each row goes to one worker."""
+        now = now_jakarta().isoformat()
+        await self.conn.execute(
+            """
+            UPDATE notification_outbox SET claimed_by = ?, claimed_at = ?
+            WHERE id IN (
+                SELECT id FROM notification_outbox
+                WHERE sent_at IS NULL AND claimed_by IS NULL AND attempts < ?
+                ORDER BY id
+                LIMIT ?
+            ) AND claimed_by IS NULL
+            """,
+            (worker_id, now, max_attempts, limit)
+        )
+        await self.conn.commit()
+        return await self._fetchall(
+            OutboxMessage,
+            """SELECT id, kind, chat_id, message, attempts FROM notification_outbox
+            WHERE claimed_by = ? AND claimed_at = ? AND sent_at IS NULL ORDER BY id""",
+            (worker_id, now)
+        )
+    
+    async def mark_notifications_sent(self, notification_ids: List[int], worker_id: str):
+        if not notification_ids:
+            return
+        sent_at = now_jakarta().isoformat()
+        await self.conn.executemany(
+            "UPDATE notification_outbox SET sent_at = ? WHERE id = ? AND claimed_by = ?",
+            [(sent_at, notification_id, worker_id) for notification_id in notification_ids]
+        )
+        await self.conn.commit()
+    
+    async def release_notifications(self, notification_ids: List[int], worker_id: str, failed: bool = True):
+        """Put claimed notifications back in the queue; `failed` counts an attempt against them."""
+        if not notification_ids:
+            return
+        await self.conn.executemany(
+            """
+            UPDATE notification_outbox SET claimed_by = NULL, claimed_at = NULL, attempts = attempts + ?
+            WHERE id = ? AND claimed_by = ? AND sent_at IS NULL
+            """,
+            [(int(failed), notification_id, worker_id) for notification_id in notification_ids]
+        )
+        await self.conn.commit()
+    
+    async def release_stale_notification_claims(self, claimed_before: str) -> int:
+        cursor = await self.conn.execute(
+            """
+            UPDATE notification_outbox SET claimed_by = NULL, claimed_at = NULL
+            WHERE sent_at IS NULL AND claimed_by IS NOT NULL AND claimed_at < ?
+            """,
+            (claimed_before,)
+        )
+        await self.conn.commit()
+        return cursor.rowcount
     
     async def add_to_waitlist(self, chat_id: int, name: str, gender: str, phone: Optional[str] = None, requested_date: Optional[str] = None):
         created_at = now_jakarta().isoformat()
         cursor = await self.conn.execute(
-            "INSERT INTO waitlist (chat_id, name, phone, gender, requested_date, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (chat_id, name, phone, gender, requested_date or "", created_at)
+            """INSERT INTO waitlist (chat_id, name, phone, gender, requested_date, created_at, phone_normalized)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (chat_id, name, phone, gender, requested_date or "", created_at, normalize_phone(phone) or None)
         )
         await self.conn.commit()
         return cursor.lastrowid
     
     async def get_waitlist(self):
-        cursor = await self.conn.execute(
-            "SELECT id, chat_id, name, phone, gender, requested_date, created_at FROM waitlist ORDER BY created_at"
-        )
-        return await cursor.fetchall()
+        return await self._fetchall(WaitlistEntry, WAITLIST_SELECT + " ORDER BY created_at")
     
     async def get_waitlist_entry(self, waitlist_id: int):
-        cursor = await self.conn.execute(
-            "SELECT id, chat_id, name, phone, gender, requested_date, created_at FROM waitlist WHERE id = ?",
-            (waitlist_id,)
-        )
-        return await cursor.fetchone()
+        return await self._fetchone(WaitlistEntry, WAITLIST_SELECT + " WHERE id = ?", (waitlist_id,))
     
     async def delete_waitlist_entry(self, waitlist_id: int):
         await self.conn.execute(
@@ -455,30 +1203,41 @@ class Database:
         await self.conn.commit()
     
     async def get_waitlist_by_date(self, date_iso: str):
-        cursor = await self.conn.execute(
-            """
-            SELECT id, chat_id, user_id, name, gender, requested_date, created_at
-            FROM waitlist
-            WHERE requested_date = ?
-            ORDER BY created_at ASC
-            """,
+        return await self._fetchall(
+            WaitlistEntry,
+            WAITLIST_SELECT + " WHERE requested_date = ? ORDER BY created_at ASC",
             (date_iso,)
         )
-        return await cursor.fetchall()
+    
+    async def _holiday_calendar(self) -> HolidayCalendar:
+        if not self.holidays.loaded:
+            cursor = await self.conn.execute("SELECT weekday FROM holiday_weekly")
+            weekdays = [row[0] for row in await cursor.fetchall()]
+            cursor = await self.conn.execute("SELECT date FROM holiday_dates")
+            dates = []
+            for row in await cursor.fetchall():
+                try:
+                    dates.append(date.fromisoformat(row[0]))
+                except ValueError:
+                    logger.warning(f"Ignoring invalid holiday date: {row[0]}")
+            self.holidays.load(weekdays, dates)
+        return self.holidays
     
     async def is_weekly_holiday(self, date_obj: date) -> bool:
-        cursor = await self.conn.execute(
-            "SELECT 1 FROM holiday_weekly WHERE weekday = ?",
-            (date_obj.weekday(),)
-        )
-        return await cursor.fetchone() is not None
+        holidays = await self._holiday_calendar()
+        return holidays.is_weekly_holiday(date_obj)
     
     async def is_date_holiday(self, date_obj: date) -> bool:
-        cursor = await self.conn.execute(
-            "SELECT 1 FROM holiday_dates WHERE date = ?",
-            (date_obj.isoformat(),)
-        )
-        return await cursor.fetchone() is not None
+        holidays = await self._holiday_calendar()
+        return holidays.is_date_holiday(date_obj)
+    
+    async def get_month_holidays(self, year: int, month: int):
+        holidays = await self._holiday_calendar()
+        return holidays.month_holidays(year, month)
+    
+    async def get_month_date_holidays(self, year: int, month: int):
+        holidays = await self._holiday_calendar()
+        return holidays.month_date_holidays(year, month)
     
     async def add_holiday_date(self, date_obj: date):
         await self.conn.execute(
@@ -486,6 +1245,7 @@ class Database:
             (date_obj.isoformat(),)
         )
         await self.conn.commit()
+        self.holidays.invalidate()
     
     async def remove_holiday_date(self, date_obj: date):
         await self.conn.execute(
@@ -493,6 +1253,7 @@ class Database:
             (date_obj.isoformat(),)
         )
         await self.conn.commit()
+        self.holidays.invalidate()
     
     async def add_holiday_weekly(self, weekday: int):
         await self.conn.execute(
@@ -500,6 +1261,7 @@ class Database:
             (weekday,)
         )
         await self.conn.commit()
+        self.holidays.invalidate()
     
     async def remove_holiday_weekly(self, weekday: int):
         await self.conn.execute(
@@ -507,6 +1269,7 @@ class Database:
             (weekday,)
         )
         await self.conn.commit()
+        self.holidays.invalidate()
     
     async def get_holiday_dates(self):
         cursor = await self.conn.execute("SELECT date FROM holiday_dates ORDER BY date")
@@ -542,7 +1305,8 @@ class Database:
     
     async def get_all_user_chat_ids(self):
         cursor = await self.conn.execute(
-            "SELECT DISTINCT user_id FROM appointments UNION SELECT DISTINCT chat_id FROM waitlist"
+            "SELECT DISTINCT user_id FROM appointments UNION SELECT DISTINCT user_id FROM appointments_archive "
+            "UNION SELECT DISTINCT chat_id FROM waitlist"
         )
         rows = await cursor.fetchall()
         return [row[0] for row in rows]
@@ -570,21 +1334,17 @@ class Database:
             (date_str, fajr, dhuhr, asr, maghrib, isha, created_at)
         )
         await self.conn.commit()
-        logger.debug(f"Saved prayer times for {date_str}")
+        logger.debug("Saved prayer times for %s", date_str)
     
     async def get_prayer_times_for_date(self, date_str: str):
-        cursor = await self.conn.execute(
-            "SELECT date, fajr, dhuhr, asr, maghrib, isha FROM prayer_times_cache WHERE date = ?",
-            (date_str,)
-        )
-        return await cursor.fetchone()
+        return await self._fetchone(PrayerTimes, PRAYER_TIMES_SELECT + " WHERE date = ?", (date_str,))
     
     async def get_prayer_times_range(self, start_date: str, end_date: str):
-        cursor = await self.conn.execute(
-            "SELECT date, fajr, dhuhr, asr, maghrib, isha FROM prayer_times_cache WHERE date >= ? AND date <= ? ORDER BY date",
+        return await self._fetchall(
+            PrayerTimes,
+            PRAYER_TIMES_SELECT + " WHERE date >= ? AND date <= ? ORDER BY date",
             (start_date, end_date)
         )
-        return await cursor.fetchall()
     
     async def clear_old_prayer_times(self, before_date: str):
         await self.conn.execute(
@@ -593,6 +1353,60 @@ class Database:
         )
         await self.conn.commit()
         logger.info(f"Cleared prayer times cache before {before_date}")
+    
+    async def acquire_lease(self, name: str, holder: str, ttl_seconds: float) -> Optional[int]:
+        """
+        Take or renew the named lease for `holder`. Returns the fencing token
+        while the lease is held, None if another holder's lease is still live.
+        The token only increases when ownership changes or a lapsed lease is
+        re-taken, so a stale leader can detect that it was replaced.
+        """
+        now = time.time()
+        await self.conn.execute(
+            "INSERT OR IGNORE INTO scheduler_lease (name, holder, fencing_token, expires_at) VALUES (?, NULL, 0, 0)",
+            (name,)
+        )
+        cursor = await self.conn.execute(
+            """
+            UPDATE scheduler_lease
+            SET fencing_token = CASE WHEN holder = ? AND expires_at >= ? THEN fencing_token ELSE fencing_token + 1 END,
+                holder = ?, expires_at = ?, heartbeat_at = ?
+            WHERE name = ? AND (holder = ? OR holder IS NULL OR expires_at < ?)
+            """,
+            (holder, now, holder, now + ttl_seconds, now, name, holder, now)
+        )
+        acquired = cursor.rowcount == 1
+        await self.conn.commit()
+        if not acquired:
+            return None
+        
+        cursor = await self.conn.execute(
+            "SELECT fencing_token FROM scheduler_lease WHERE name = ? AND holder = ?",
+            (name, holder)
+        )
+        row = await cursor.fetchone()
+        return row[0] if row else None
+    
+    async def check_lease(self, name: str, holder: str, fencing_token: int) -> bool:
+        cursor = await self.conn.execute(
+            "SELECT 1 FROM scheduler_lease WHERE name = ? AND holder = ? AND fencing_token = ? AND expires_at >= ?",
+            (name, holder, fencing_token, time.time())
+        )
+        return await cursor.fetchone() is not None
+    
+    async def release_lease(self, name: str, holder: str):
+        await self.conn.execute(
+            "UPDATE scheduler_lease SET holder = NULL, expires_at = 0 WHERE name = ? AND holder = ?",
+            (name, holder)
+        )
+        await self.conn.commit()
+    
+    async def get_lease(self, name: str):
+        cursor = await self.conn.execute(
+            "SELECT name, holder, fencing_token, expires_at, heartbeat_at FROM scheduler_lease WHERE name = ?",
+            (name,)
+        )
+        return await cursor.fetchone()
 
 
 db = Database()
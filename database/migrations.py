@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import zlib
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional, Set
+
+from config import Config
+from database import models
+from database.models import SCHEMA_VERSION_TABLE, SCHEMA_BACKFILL_TABLE, INDEXES
+from utils.datetime_helper import now_jakarta
+from utils.validators import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+
+class Migration:
+    """A schema change applied once, inside one transaction, and recorded in schema_version."""
+
+    def __init__(self, version: int, name: str, apply: Callable[..., Awaitable[None]]):
+        self.version = version
+        self.name = name
+        self.apply = apply
+
+
+class Backfill:
+    """
+    A resumable data change run in small chunks after the schema migrations.
+    `step(conn, last_id, batch_size)` processes the rows after last_id and
+    returns the new last_id, or None once nothing is left. Progress is
+    stored in schema_backfill after every chunk, so a restart resumes where
+    it stopped.
+    """
+
+    def __init__(self, name: str, step: Callable[..., Awaitable[Optional[int]]]):
+        self.name = name
+        self.step = step
+
+
+async def _columns(conn, table: str) -> Set[str]:
+    cursor = await conn.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in await cursor.fetchall()}
+
+
+async def _add_columns(conn, table: str, columns: List[tuple]):
+    existing = await _columns(conn, table)
+    for name, ddl in columns:
+        if name not in existing:
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+            logger.info(f"Migration: Added {name} column to {table} table")
+
+
+# --- schema migrations (append only; never edit a released one) ---
+
+async def _v1_therapist_inactive_schedule(conn):
+    await _add_columns(conn, "therapists", [
+        ("inactive_start", "TEXT DEFAULT NULL"),
+        ("inactive_end", "TEXT DEFAULT NULL"),
+    ])
+
+
+async def _v2_waitlist_phone(conn):
+    await _add_columns(conn, "waitlist", [("phone", "TEXT")])
+
+
+async def _v3_reminder_claims(conn):
+    existing = await _columns(conn, "appointments")
+    await _add_columns(conn, "appointments", [
+        ("reminder_claimed_by", "TEXT DEFAULT NULL"),
+        ("reminder_claimed_at", "TEXT DEFAULT NULL"),
+        ("reminder_sent_at", "TEXT DEFAULT NULL"),
+    ])
+    await _add_columns(conn, "appointments_archive", [
+        ("reminder_claimed_by", "TEXT DEFAULT NULL"),
+        ("reminder_claimed_at", "TEXT DEFAULT NULL"),
+        ("reminder_sent_at", "TEXT DEFAULT NULL"),
+    ])
+    if 'reminder_sent_at' not in existing:
+        # Reminders already due were sent by the old in-memory jobs; only upcoming rows matter to the dispatcher.
+        now = now_jakarta()
+        await conn.execute(
+            "UPDATE appointments SET reminder_sent_at = created_at WHERE start_dt > ? AND start_dt <= ?",
+            (now.isoformat(), (now + timedelta(minutes=Config.REMINDER_MINUTES_BEFORE)).isoformat())
+        )
+
+
+async def _v4_time_and_phone_columns(conn):
+    for table in ("appointments", "appointments_archive"):
+        await _add_columns(conn, table, [
+            ("start_ts", "INTEGER DEFAULT NULL"),
+            ("end_ts", "INTEGER DEFAULT NULL"),
+        ])
+    await _add_columns(conn, "waitlist", [("phone_normalized", "TEXT DEFAULT NULL")])
+
+
+async def _v5_notification_outbox(conn):
+    await conn.execute(models.NOTIFICATION_OUTBOX_TABLE)
+    for index in models.NOTIFICATION_OUTBOX_INDEXES:
+        await conn.execute(index)
+
+
+MIGRATIONS = [
+    Migration(1, "therapist inactive schedule columns", _v1_therapist_inactive_schedule),
+    Migration(2, "waitlist phone column", _v2_waitlist_phone),
+    Migration(3, "reminder claim columns", _v3_reminder_claims),
+    Migration(4, "epoch time columns and normalized waitlist phone", _v4_time_and_phone_columns),
+    Migration(5, "notification outbox", _v5_notification_outbox),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# --- backfills ---
+
+# start_dt is stored with its UTC offset; naive values are Asia/Jakarta like from_iso() assumes.
+_EPOCH_SQL = (
+    "CAST(CASE WHEN start_dt GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR start_dt GLOB '*Z' "
+    "THEN strftime('%s', start_dt) ELSE strftime('%s', start_dt, '-7 hours') END AS INTEGER)"
+)
+
+
+def _epoch_backfill(table: str):
+    async def step(conn, last_id: int, batch_size: int) -> Optional[int]:
+        cursor = await conn.execute(f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)",
+                                    (last_id, batch_size))
+        upper = (await cursor.fetchone())[0]
+        if upper is None:
+            return None
+        await conn.execute(
+            f"""
+            UPDATE {table} SET start_ts = {_EPOCH_SQL}, end_ts = {_EPOCH_SQL} + duration_min * 60
+            WHERE id > ? AND id <= ? AND (start_ts IS NULL OR end_ts IS NULL)
+            """,
+            (last_id, upper)
+        )
+        return upper
+    return step
+
+
+async def _waitlist_phone_step(conn, last_id: int, batch_size: int) -> Optional[int]:
+    cursor = await conn.execute(
+        "SELECT id, phone FROM waitlist WHERE id > ? ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    )
+    rows = await cursor.fetchall()
+    if not rows:
+        return None
+    await conn.executemany(
+        "UPDATE waitlist SET phone_normalized = ? WHERE id = ? AND phone_normalized IS NULL",
+        [(normalize_phone(row[1]) or None, row[0]) for row in rows]
+    )
+    return rows[-1][0]
+
+
+def _index_backfill(name: str):
+    async def step(conn, last_id: int, batch_size: int) -> Optional[int]:
+        # An index build cannot be chunked; it is one statement, run after the data backfills.
+        await conn.execute(INDEXES[name])
+        return None
+    return step
+
+
+BACKFILLS = [
+    Backfill("appointments_epoch_columns", _epoch_backfill("appointments")),
+    Backfill("appointments_archive_epoch_columns", _epoch_backfill("appointments_archive")),
+    Backfill("waitlist_phone_normalized", _waitlist_phone_step),
+] + [Backfill(f"index:{name}", _index_backfill(name)) for name in INDEXES]
+
+
+def schema_fingerprint() -> int:
+    """
+    Checksum of every DDL statement, seed row, migration and backfill this
+    build knows about, stored in PRAGMA user_version once the database is
+    fully up to date. A matching value lets Database.connect skip schema
+    work entirely; any code change to the schema changes the value.
+    """
+    parts = [value for name, value in sorted(vars(models).items())
+             if name.endswith(("_TABLE", "_INDEXES")) or name.startswith("SEED_")]
+    parts += [INDEXES, [(m.version, m.name) for m in MIGRATIONS], [b.name for b in BACKFILLS]]
+    # user_version is a signed 32-bit integer and 0 means "never set".
+    return zlib.crc32(repr(parts).encode()) & 0x7FFFFFFF or 1
+
+
+class MigrationRunner:
+    """
+    Applies pending MIGRATIONS at connect time (one cheap version query when
+    the schema is current) and runs BACKFILLS in a background task that
+    commits every chunk and pauses between chunks, so handlers are never
+    locked out for long. The backfill task gets a connection of its own:
+    its commits must not close out a transaction a handler has open on
+    the shared one.
+    """
+
+    def __init__(self, conn, batch_size: int = 2000, pause_seconds: float = 0.05):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.completed: Set[str] = set()
+        self.fingerprint = schema_fingerprint()
+        self._task: Optional[asyncio.Task] = None
+        self._backfill_conn = None
+
+    async def is_current(self) -> bool:
+        """True if the file was fully migrated and backfilled by this schema; one PRAGMA read."""
+        cursor = await self.conn.execute("PRAGMA user_version")
+        if (await cursor.fetchone())[0] != self.fingerprint:
+            return False
+        self.completed = {b.name for b in BACKFILLS}
+        return True
+
+    async def mark_current(self, conn=None):
+        await (conn or self.conn).execute(f"PRAGMA user_version = {self.fingerprint}")
+
+    async def current_version(self) -> int:
+        await self.conn.execute(SCHEMA_VERSION_TABLE)
+        cursor = await self.conn.execute("SELECT MAX(version) FROM schema_version")
+        row = await cursor.fetchone()
+        return row[0] or 0
+
+    async def migrate(self) -> int:
+        """Apply pending migrations in order; returns how many ran. Failures abort startup."""
+        version = await self.current_version()
+        pending = [m for m in MIGRATIONS if m.version > version]
+        for migration in pending:
+            try:
+                await self.conn.execute("BEGIN")
+                await migration.apply(self.conn)
+                await self.conn.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (migration.version, migration.name, now_jakarta().isoformat())
+                )
+                await self.conn.commit()
+            except Exception as e:
+                await self.conn.rollback()
+                logger.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+                raise
+            logger.info(f"Migration {migration.version} applied: {migration.name}")
+        return len(pending)
+
+    async def pending_backfills(self) -> List[Backfill]:
+        await self.conn.execute(SCHEMA_BACKFILL_TABLE)
+        cursor = await self.conn.execute("SELECT name FROM schema_backfill WHERE done = 1")
+        self.completed = {row[0] for row in await cursor.fetchall()}
+        return [b for b in BACKFILLS if b.name not in self.completed]
+
+    def start_backfills(self, backfills: List[Backfill], conn):
+        """Run backfills in the background on `conn`, which the runner closes once they finish or stop."""
+        if backfills and self._task is None:
+            self._backfill_conn = conn
+            self._task = asyncio.create_task(self._run_backfills(backfills), name="schema-backfills")
+
+    async def wait_for_backfills(self):
+        if self._task:
+            await self._task
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Cancelled before it got to run, the task never reached its own close.
+        await self._close_backfill_conn()
+
+    async def _close_backfill_conn(self):
+        conn, self._backfill_conn = self._backfill_conn, None
+        if conn is not None:
+            await conn.close()
+
+    async def _run_backfills(self, backfills: List[Backfill]):
+        conn = self._backfill_conn
+        try:
+            for backfill in backfills:
+                try:
+                    await self._run_backfill(conn, backfill)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Left unfinished; the next start resumes it from the last committed chunk.
+                    logger.error(f"Backfill {backfill.name} failed: {e}")
+                    return
+            await self.mark_current(conn)
+        finally:
+            await self._close_backfill_conn()
+
+    async def _run_backfill(self, conn, backfill: Backfill):
+        await conn.execute("INSERT OR IGNORE INTO schema_backfill (name) VALUES (?)", (backfill.name,))
+        await conn.commit()
+        cursor = await conn.execute("SELECT last_id FROM schema_backfill WHERE name = ?", (backfill.name,))
+        last_id = (await cursor.fetchone())[0]
+        if last_id:
+            logger.info(f"Resuming backfill {backfill.name} after id {last_id}")
+
+        chunks = 0
+        while True:
+            next_id = await backfill.step(conn, last_id, self.batch_size)
+            done = next_id is None
+            await conn.execute(
+                "UPDATE schema_backfill SET last_id = ?, done = ?, updated_at = ? WHERE name = ?",
+                (last_id if done else next_id, int(done), now_jakarta().isoformat(), backfill.name)
+            )
+            await conn.commit()
+            if done:
+                break
+            last_id = next_id
+            chunks += 1
+            await asyncio.sleep(self.pause_seconds)
+
+        self.completed.add(backfill.name)
+        logger.info(f"Backfill {backfill.name} completed ({chunks} chunks)")
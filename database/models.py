@@ -1,3 +1,7 @@
+from datetime import datetime, timedelta
+
+from utils.datetime_helper import from_iso
+
 THERAPISTS_TABLE = """
 CREATE TABLE IF NOT EXISTS therapists (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -22,6 +26,11 @@ CREATE TABLE IF NOT EXISTS appointments (
     status TEXT NOT NULL DEFAULT 'confirmed',
     created_at TEXT NOT NULL,
     reminder_job_id TEXT DEFAULT NULL,
+    reminder_claimed_by TEXT DEFAULT NULL,
+    reminder_claimed_at TEXT DEFAULT NULL,
+    reminder_sent_at TEXT DEFAULT NULL,
+    start_ts INTEGER DEFAULT NULL,
+    end_ts INTEGER DEFAULT NULL,
     FOREIGN KEY (therapist_id) REFERENCES therapists(id)
 )
 """
@@ -34,7 +43,8 @@ CREATE TABLE IF NOT EXISTS waitlist (
     phone TEXT,
     gender TEXT NOT NULL,
     requested_date TEXT,
-    created_at TEXT NOT NULL
+    created_at TEXT NOT NULL,
+    phone_normalized TEXT DEFAULT NULL
 )
 """
 
@@ -83,6 +93,98 @@ CREATE TABLE IF NOT EXISTS prayer_times_cache (
 )
 """
 
+APPOINTMENTS_ARCHIVE_TABLE = """
+CREATE TABLE IF NOT EXISTS appointments_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    user_name TEXT NOT NULL,
+    patient_gender TEXT NOT NULL,
+    patient_address TEXT DEFAULT '',
+    therapist_id INTEGER NOT NULL,
+    start_dt TEXT NOT NULL,
+    duration_min INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    reminder_job_id TEXT DEFAULT NULL,
+    reminder_claimed_by TEXT DEFAULT NULL,
+    reminder_claimed_at TEXT DEFAULT NULL,
+    reminder_sent_at TEXT DEFAULT NULL,
+    start_ts INTEGER DEFAULT NULL,
+    end_ts INTEGER DEFAULT NULL,
+    archived_at TEXT NOT NULL
+)
+"""
+
+APPOINTMENTS_ARCHIVE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_appointments_archive_start ON appointments_archive (start_dt)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_archive_user ON appointments_archive (user_id, start_dt)",
+]
+
+SCHEDULER_LEASE_TABLE = """
+CREATE TABLE IF NOT EXISTS scheduler_lease (
+    name TEXT PRIMARY KEY,
+    holder TEXT DEFAULT NULL,
+    fencing_token INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL NOT NULL DEFAULT 0,
+    heartbeat_at REAL DEFAULT NULL
+)
+"""
+
+# Patient notifications sent by jobs/outbox.py (leave reassignments, ...),
+# claimed per row like reminders so every process can help send them.
+NOTIFICATION_OUTBOX_TABLE = """
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    claimed_by TEXT DEFAULT NULL,
+    claimed_at TEXT DEFAULT NULL,
+    sent_at TEXT DEFAULT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+NOTIFICATION_OUTBOX_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending ON notification_outbox (id) WHERE sent_at IS NULL",
+]
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+)
+"""
+
+SCHEMA_BACKFILL_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_backfill (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+)
+"""
+
+# Built in the background by database/migrations.py once their columns are backfilled.
+INDEXES = {
+    "idx_appointments_reminder_due": """
+        CREATE INDEX IF NOT EXISTS idx_appointments_reminder_due
+        ON appointments (start_dt)
+        WHERE status = 'confirmed' AND reminder_sent_at IS NULL
+    """,
+    "idx_appointments_therapist_end": """
+        CREATE INDEX IF NOT EXISTS idx_appointments_therapist_end
+        ON appointments (therapist_id, end_ts)
+        WHERE status = 'confirmed'
+    """,
+    "idx_appointments_user_start": "CREATE INDEX IF NOT EXISTS idx_appointments_user_start ON appointments (user_id, start_dt)",
+    "idx_appointments_status_start": "CREATE INDEX IF NOT EXISTS idx_appointments_status_start ON appointments (status, start_dt)",
+    "idx_waitlist_requested_date": "CREATE INDEX IF NOT EXISTS idx_waitlist_requested_date ON waitlist (requested_date)",
+    "idx_waitlist_phone": "CREATE INDEX IF NOT EXISTS idx_waitlist_phone ON waitlist (phone_normalized)",
+}
+
 SEED_THERAPISTS = [
     ("Pak Marsudi", "Laki-laki"),
     ("Mba Tyas", "Perempuan"),
@@ -91,3 +193,126 @@ SEED_THERAPISTS = [
 ]
 
 SEED_HOLIDAY_WEEKLY = [2]
+
+
+# --- row models ---
+#
+# Database methods build these straight from the sqlite cursor (see
+# Record.from_row), so each row is one small slotted object whose datetime
+# columns are parsed exactly once. Every SELECT feeding a model lists its
+# columns in the model's `__init__` order.
+
+class Record:
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, cursor, row: tuple):
+        """sqlite3 row_factory: cursor.row_factory = Model.from_row."""
+        return cls(*row)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Therapist(Record):
+    __slots__ = ("id", "name", "gender", "active", "inactive_start", "inactive_end", "inactive_from", "inactive_until")
+
+    def __init__(self, id, name, gender, active=1, inactive_start=None, inactive_end=None):
+        self.id = id
+        self.name = name
+        self.gender = gender
+        self.active = bool(active)
+        self.inactive_start = inactive_start
+        self.inactive_end = inactive_end
+        self.inactive_from = from_iso(inactive_start) if inactive_start else None
+        self.inactive_until = from_iso(inactive_end) if inactive_end else None
+
+    @property
+    def has_inactive_schedule(self) -> bool:
+        return self.inactive_from is not None and self.inactive_until is not None
+
+
+class Appointment(Record):
+    __slots__ = ("id", "user_id", "user_name", "patient_gender", "patient_address", "therapist_id",
+                 "start_dt", "duration_min", "status", "created_at", "reminder_job_id",
+                 "therapist_name", "archived", "start")
+
+    def __init__(self, id, user_id, user_name, patient_gender, patient_address, therapist_id,
+                 start_dt, duration_min, status, created_at, reminder_job_id=None,
+                 therapist_name=None, archived=0):
+        self.id = id
+        self.user_id = user_id
+        self.user_name = user_name
+        self.patient_gender = patient_gender
+        self.patient_address = patient_address
+        self.therapist_id = therapist_id
+        self.start_dt = start_dt
+        self.duration_min = duration_min
+        self.status = status
+        self.created_at = created_at
+        self.reminder_job_id = reminder_job_id
+        self.therapist_name = therapist_name
+        self.archived = bool(archived)
+        self.start = from_iso(start_dt)
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(minutes=self.duration_min)
+
+
+class WaitlistEntry(Record):
+    __slots__ = ("id", "chat_id", "name", "phone", "gender", "requested_date", "created_at", "phone_normalized")
+
+    def __init__(self, id, chat_id, name, phone, gender, requested_date, created_at, phone_normalized=None):
+        self.id = id
+        self.chat_id = chat_id
+        self.name = name
+        self.phone = phone
+        self.gender = gender
+        self.requested_date = requested_date
+        self.created_at = created_at
+        self.phone_normalized = phone_normalized
+
+
+class PrayerTimes(Record):
+    __slots__ = ("date", "fajr", "dhuhr", "asr", "maghrib", "isha")
+
+    def __init__(self, date, fajr, dhuhr, asr, maghrib, isha):
+        self.date = date
+        self.fajr = fajr
+        self.dhuhr = dhuhr
+        self.asr = asr
+        self.maghrib = maghrib
+        self.isha = isha
+
+    def as_dict(self) -> dict:
+        """Keyed like the aladhan.com `timings` object."""
+        return {"Fajr": self.fajr, "Dhuhr": self.dhuhr, "Asr": self.asr, "Maghrib": self.maghrib, "Isha": self.isha}
+
+
+class OutboxMessage(Record):
+    __slots__ = ("id", "kind", "chat_id", "message", "attempts")
+
+    def __init__(self, id, kind, chat_id, message, attempts=0):
+        self.id = id
+        self.kind = kind
+        self.chat_id = chat_id
+        self.message = message
+        self.attempts = attempts
+
+
+class UserAppointments:
+    """A user's appointments split into upcoming (soonest first) and past (latest first), with section totals."""
+    __slots__ = ("upcoming", "past", "upcoming_total", "past_total")
+
+    def __init__(self, upcoming=None, past=None, upcoming_total=0, past_total=0):
+        self.upcoming = upcoming if upcoming is not None else []
+        self.past = past if past is not None else []
+        self.upcoming_total = upcoming_total
+        self.past_total = past_total
+
+    @property
+    def hidden(self) -> int:
+        """Appointments beyond the per-section limits."""
+        return self.upcoming_total + self.past_total - len(self.upcoming) - len(self.past)
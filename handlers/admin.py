@@ -1,23 +1,22 @@
 import logging
-import io
-import csv
 from datetime import date
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
+from telegram.helpers import escape_markdown
 from database.db import db
 from config import Config
 from utils.datetime_helper import format_datetime_id, format_date_id, parse_date, WEEKDAY_NAMES_ID
 from utils.validators import is_valid_therapist_name
+from handlers.admin_states import (
+    A_MENU, A_ADD_TH_NAME, A_ADD_TH_GENDER, A_DELETE_TH_SELECT,
+    A_DELETE_APPT, A_HOLIDAY_MENU, A_ADD_HOL_DATE, A_ADD_HOL_WEEKLY,
+    A_VIEW_APPT, A_MANAGE_APPT, A_EDIT_APPT_FIELD, A_EDIT_APPT_VALUE, A_WAITLIST_MANAGE,
+    A_TH_DETAIL, A_EDIT_TH_NAME, A_EDIT_TH_GENDER, A_SCHEDULE_INACTIVE,
+    A_INACTIVE_CUSTOM_DAYS
+)
 
 logger = logging.getLogger(__name__)
 
-(A_MENU, A_ADD_TH_NAME, A_ADD_TH_GENDER, A_DELETE_TH_SELECT,
- A_DELETE_APPT, A_HOLIDAY_MENU, A_ADD_HOL_DATE, A_ADD_HOL_WEEKLY,
- A_DEL_HOL_DATE_SELECT, A_DEL_HOL_WEEKLY_SELECT, A_VIEW_APPT, A_MANAGE_APPT,
- A_EDIT_APPT_FIELD, A_EDIT_APPT_VALUE, A_WAITLIST_MANAGE,
- A_TH_DETAIL, A_EDIT_TH_NAME, A_EDIT_TH_GENDER, A_SCHEDULE_INACTIVE,
- A_INACTIVE_CUSTOM_DAYS, A_BROADCAST_COMPOSE, A_BROADCAST_CONFIRM) = range(10, 32)
-
 
 async def is_admin(user_id: int) -> bool:
     return user_id in Config.ADMIN_IDS
@@ -31,11 +30,11 @@ async def admin_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
         await query.edit_message_text("❌ Anda tidak memiliki akses admin.")
         return ConversationHandler.END
     
-    from utils.datetime_helper import now_jakarta, from_iso
+    from utils.datetime_helper import now_jakarta
     now = now_jakarta()
     
     appointments = await db.get_appointments(status='confirmed')
-    upcoming_count = sum(1 for a in appointments if from_iso(a['start_dt']) > now)
+    upcoming_count = sum(1 for a in appointments if a.start > now)
     
     waitlist_entries = await db.get_waitlist()
     waitlist_count = len(list(waitlist_entries))
@@ -69,13 +68,13 @@ async def admin_therapists_callback(update: Update, context: ContextTypes.DEFAUL
     
     kb = []
     for t in therapists:
-        status_icon = "✅" if t['active'] else "❌"
-        gender_icon = "👨" if t['gender'] == "Laki-laki" else "👩"
+        status_icon = "✅" if t.active else "❌"
+        gender_icon = "👨" if t.gender == "Laki-laki" else "👩"
         
         therapist_row = [
             InlineKeyboardButton(
-                f"{status_icon} {gender_icon} {t['name']}", 
-                callback_data=f"th_detail_{t['id']}"
+                f"{status_icon} {gender_icon} {t.name}", 
+                callback_data=f"th_detail_{t.id}"
             )
         ]
         kb.append(therapist_row)
@@ -180,7 +179,7 @@ async def delete_therapist_callback(update: Update, context: ContextTypes.DEFAUL
         )
         return A_MENU
     
-    kb = [[InlineKeyboardButton(f"{t['name']} ({t['gender']})", callback_data=f"delther_{t['id']}")] 
+    kb = [[InlineKeyboardButton(f"{t.name} ({t.gender})", callback_data=f"delther_{t.id}")] 
           for t in therapists]
     kb.append([InlineKeyboardButton("🔙 Kembali ke Admin", callback_data="admin_menu")])
     kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
@@ -212,10 +211,10 @@ async def delete_therapist_confirm_callback(update: Update, context: ContextType
         ]
         
         await query.edit_message_text(
-            f"✅ Terapis {therapist['name']} berhasil dihapus.",
+            f"✅ Terapis {therapist.name} berhasil dihapus.",
             reply_markup=InlineKeyboardMarkup(kb)
         )
-        logger.info(f"Therapist deleted: {therapist['name']}")
+        logger.info(f"Therapist deleted: {therapist.name}")
     except Exception as e:
         logger.error(f"Error deleting therapist: {e}")
         kb = [
@@ -245,22 +244,22 @@ async def therapist_detail_callback(update: Update, context: ContextTypes.DEFAUL
         )
         return A_MENU
     
-    status = "✅ Aktif" if therapist['active'] else "❌ Nonaktif"
-    gender_icon = "👨" if therapist['gender'] == "Laki-laki" else "👩"
+    status = "✅ Aktif" if therapist.active else "❌ Nonaktif"
+    gender_icon = "👨" if therapist.gender == "Laki-laki" else "👩"
     
     msg = (
         f"👨‍⚕️ *DETAIL TERAPIS*\n\n"
-        f"{gender_icon} *Nama:* {therapist['name']}\n"
-        f"👤 *Jenis Kelamin:* {therapist['gender']}\n"
+        f"{gender_icon} *Nama:* {therapist.name}\n"
+        f"👤 *Jenis Kelamin:* {therapist.gender}\n"
         f"📊 *Status:* {status}\n"
     )
     
-    if therapist['inactive_start'] and therapist['inactive_end']:
+    if therapist.has_inactive_schedule:
         msg += f"\n📅 *Jadwal Nonaktif:*\n"
-        msg += f"Mulai: {format_date_id(parse_date(therapist['inactive_start'][:10]), include_year=True)}\n"
-        msg += f"Sampai: {format_date_id(parse_date(therapist['inactive_end'][:10]), include_year=True)}\n"
+        msg += f"Mulai: {format_date_id(therapist.inactive_from.date(), include_year=True)}\n"
+        msg += f"Sampai: {format_date_id(therapist.inactive_until.date(), include_year=True)}\n"
     
-    toggle_text = "❌ Nonaktifkan" if therapist['active'] else "✅ Aktifkan"
+    toggle_text = "❌ Nonaktifkan" if therapist.active else "✅ Aktifkan"
     
     kb = [
         [InlineKeyboardButton("✏️ Edit Nama", callback_data=f"edit_th_name_{therapist_id}")],
@@ -268,7 +267,7 @@ async def therapist_detail_callback(update: Update, context: ContextTypes.DEFAUL
         [InlineKeyboardButton(toggle_text, callback_data=f"toggle_th_{therapist_id}")]
     ]
     
-    if therapist['inactive_start'] and therapist['inactive_end']:
+    if therapist.has_inactive_schedule:
         kb.append([InlineKeyboardButton("❌ Batalkan Jadwal Nonaktif", callback_data=f"cancel_inactive_{therapist_id}")])
     else:
         kb.append([InlineKeyboardButton("📅 Jadwalkan Nonaktif", callback_data=f"schedule_inactive_{therapist_id}")])
@@ -299,12 +298,12 @@ async def toggle_therapist_callback(update: Update, context: ContextTypes.DEFAUL
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data=f"th_detail_{therapist_id}")]]
         
         await query.edit_message_text(
-            f"✅ Terapis *{therapist['name']}* berhasil {status}.",
+            f"✅ Terapis *{therapist.name}* berhasil {status}.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
         
-        logger.info(f"Therapist toggled: {therapist['name']} - Active: {is_active}")
+        logger.info(f"Therapist toggled: {therapist.name} - Active: {is_active}")
     except Exception as e:
         logger.error(f"Error toggling therapist: {e}")
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data="admin_therapists")]]
@@ -328,7 +327,7 @@ async def edit_therapist_name_callback(update: Update, context: ContextTypes.DEF
     kb = [[InlineKeyboardButton("🔙 Batal", callback_data=f"th_detail_{therapist_id}")]]
     
     await query.edit_message_text(
-        f"Ketik nama baru untuk terapis *{therapist['name']}*:",
+        f"Ketik nama baru untuk terapis *{therapist.name}*:",
         parse_mode='Markdown',
         reply_markup=InlineKeyboardMarkup(kb)
     )
@@ -360,12 +359,12 @@ async def edit_therapist_name_text(update: Update, context: ContextTypes.DEFAULT
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data=f"th_detail_{therapist_id}")]]
         
         await update.message.reply_text(
-            f"✅ Nama terapis berhasil diubah dari *{old_therapist['name']}* menjadi *{name}*.",
+            f"✅ Nama terapis berhasil diubah dari *{old_therapist.name}* menjadi *{name}*.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
         
-        logger.info(f"Therapist name updated: {old_therapist['name']} -> {name}")
+        logger.info(f"Therapist name updated: {old_therapist.name} -> {name}")
     except Exception as e:
         logger.error(f"Error updating therapist name: {e}")
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data="admin_therapists")]]
@@ -393,7 +392,7 @@ async def edit_therapist_gender_callback(update: Update, context: ContextTypes.D
     ]
     
     await query.edit_message_text(
-        f"Pilih jenis kelamin baru untuk terapis *{therapist['name']}*:",
+        f"Pilih jenis kelamin baru untuk terapis *{therapist.name}*:",
         parse_mode='Markdown',
         reply_markup=InlineKeyboardMarkup(kb)
     )
@@ -418,12 +417,12 @@ async def set_therapist_gender_callback(update: Update, context: ContextTypes.DE
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data=f"th_detail_{therapist_id}")]]
         
         await query.edit_message_text(
-            f"✅ Jenis kelamin terapis *{old_therapist['name']}* berhasil diubah menjadi *{gender}*.",
+            f"✅ Jenis kelamin terapis *{old_therapist.name}* berhasil diubah menjadi *{gender}*.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
         
-        logger.info(f"Therapist gender updated: {old_therapist['name']} - {old_therapist['gender']} -> {gender}")
+        logger.info(f"Therapist gender updated: {old_therapist.name} - {old_therapist.gender} -> {gender}")
     except Exception as e:
         logger.error(f"Error updating therapist gender: {e}")
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data="admin_therapists")]]
@@ -446,9 +445,9 @@ async def admin_appointments_callback(update: Update, context: ContextTypes.DEFA
     else:
         msg = "📅 *KELOLA JANJI*\n\n"
         for appt in appointments[:10]:
-            datetime_str = format_datetime_id(appt['start_dt'])
-            status_icon = "✅" if appt['status'] == 'confirmed' else "⏳"
-            msg += f"{status_icon} {appt['user_name']} - {appt['therapist_name']} - {datetime_str}\n"
+            datetime_str = format_datetime_id(appt.start)
+            status_icon = "✅" if appt.status == 'confirmed' else "⏳"
+            msg += f"{status_icon} {appt.user_name} - {appt.therapist_name} - {datetime_str}\n"
         
         if len(appointments) > 10:
             msg += f"\n_...dan {len(appointments) - 10} janji lainnya_"
@@ -484,9 +483,9 @@ async def delete_appointment_callback(update: Update, context: ContextTypes.DEFA
     
     kb = []
     for appt in appointments[:20]:
-        datetime_str = format_datetime_id(appt['start_dt'])
-        label = f"{appt['user_name']} - {datetime_str}"
-        kb.append([InlineKeyboardButton(label, callback_data=f"delappt_{appt['id']}")])
+        datetime_str = format_datetime_id(appt.start)
+        label = f"{appt.user_name} - {datetime_str}"
+        kb.append([InlineKeyboardButton(label, callback_data=f"delappt_{appt.id}")])
     
     kb.append([InlineKeyboardButton("🔙 Kembali ke Admin", callback_data="admin_menu")])
     kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
@@ -572,10 +571,10 @@ async def view_appointment_callback(update: Update, context: ContextTypes.DEFAUL
     
     kb = []
     for appt in display_appointments:
-        datetime_str = format_datetime_id(appt['start_dt'])
-        status_icon = "✅" if appt['status'] == 'confirmed' else "✔" if appt['status'] == 'completed' else "❌"
-        label = f"{status_icon} {appt['user_name']} - {datetime_str}"
-        kb.append([InlineKeyboardButton(label, callback_data=f"mgappt_{appt['id']}")])
+        datetime_str = format_datetime_id(appt.start)
+        status_icon = "✅" if appt.status == 'confirmed' else "✔" if appt.status == 'completed' else "❌"
+        label = f"{status_icon} {appt.user_name} - {datetime_str}"
+        kb.append([InlineKeyboardButton(label, callback_data=f"mgappt_{appt.id}")])
     
     nav_buttons = []
     if page > 0:
@@ -631,21 +630,25 @@ async def manage_appointment_callback(update: Update, context: ContextTypes.DEFA
     
     context.user_data['manage_appt_id'] = appointment_id
     
-    datetime_str = format_datetime_id(appt['start_dt'])
-    status_emoji = "✅" if appt['status'] == 'confirmed' else "✔" if appt['status'] == 'completed' else "❌"
+    datetime_str = format_datetime_id(appt.start)
+    status_emoji = "✅" if appt.status == 'confirmed' else "✔" if appt.status == 'completed' else "❌"
     
     msg = f"📋 *DETAIL JANJI*\n\n"
-    msg += f"ID: {appt['id']}\n"
-    msg += f"Nama: {appt['user_name']}\n"
-    msg += f"Gender: {appt['patient_gender']}\n"
-    msg += f"Alamat: {appt['patient_address']}\n"
-    msg += f"Terapis: {appt['therapist_name']}\n"
+    msg += f"ID: {appt.id}\n"
+    msg += f"Nama: {appt.user_name}\n"
+    msg += f"Gender: {appt.patient_gender}\n"
+    msg += f"Alamat: {appt.patient_address}\n"
+    msg += f"Terapis: {appt.therapist_name}\n"
     msg += f"Waktu: {datetime_str}\n"
-    msg += f"Durasi: {appt['duration_min']} menit\n"
-    msg += f"Status: {status_emoji} {appt['status']}\n"
+    msg += f"Durasi: {appt.duration_min} menit\n"
+    msg += f"Status: {status_emoji} {appt.status}\n"
     
-    kb = [
-        [InlineKeyboardButton("✏️ Edit Janji", callback_data="edit_appt_menu")],
+    kb = []
+    if appt.archived:
+        msg += "\n📦 _Janji ini sudah diarsipkan._\n"
+    else:
+        kb.append([InlineKeyboardButton("✏️ Edit Janji", callback_data="edit_appt_menu")])
+    kb += [
         [InlineKeyboardButton("🔄 Ubah Status", callback_data="change_status_menu")],
         [InlineKeyboardButton("🗑 Hapus Janji", callback_data=f"delappt_{appointment_id}")],
         [InlineKeyboardButton("🔙 Kembali ke Daftar", callback_data="view_appointment")],
@@ -749,7 +752,7 @@ async def edit_field_select_callback(update: Update, context: ContextTypes.DEFAU
         
         kb = []
         for t in therapists:
-            kb.append([InlineKeyboardButton(f"{t['name']} ({t['gender']})", callback_data=f"settherapist_{t['id']}")])
+            kb.append([InlineKeyboardButton(f"{t.name} ({t.gender})", callback_data=f"settherapist_{t.id}")])
         
         kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="edit_appt_menu")])
         
@@ -798,7 +801,7 @@ async def edit_therapist_confirm_callback(update: Update, context: ContextTypes.
         ]
         
         await query.edit_message_text(
-            f"✅ Terapis berhasil diubah menjadi *{therapist['name']}*.",
+            f"✅ Terapis berhasil diubah menjadi *{therapist.name}*.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
@@ -841,23 +844,20 @@ async def edit_appt_value_text(update: Update, context: ContextTypes.DEFAULT_TYP
         
         elif field == 'time':
             from datetime import datetime
-            from utils.datetime_helper import tz_jakarta
+            from utils.datetime_helper import JAKARTA_TZ
             
             try:
-                dt = datetime.strptime(new_value, "%Y-%m-%d %H:%M")
-                dt = tz_jakarta.localize(dt)
-                await db.update_appointment(appointment_id, start_dt=dt.isoformat())
-                await update.message.reply_text(
-                    f"✅ Waktu berhasil diubah menjadi *{new_value}*.",
-                    parse_mode='Markdown',
-                    reply_markup=InlineKeyboardMarkup(kb)
-                )
-                logger.info(f"Appointment {appointment_id} time changed to {new_value}")
+                dt = datetime.strptime(new_value, "%Y-%m-%d %H:%M").replace(tzinfo=JAKARTA_TZ)
             except ValueError:
                 await update.message.reply_text(
                     "❌ Format waktu salah. Gunakan format: YYYY-MM-DD HH:MM"
                 )
                 return A_EDIT_APPT_VALUE
+            
+            text, kb, moved = await _reschedule(context, appointment_id, dt.isoformat())
+            await update.message.reply_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(kb))
+            if not moved:
+                return A_EDIT_APPT_VALUE
     
     except Exception as e:
         logger.error(f"Error updating appointment: {e}")
@@ -866,6 +866,61 @@ async def edit_appt_value_text(update: Update, context: ContextTypes.DEFAULT_TYP
     return A_MANAGE_APPT
 
 
+async def _reschedule(context: ContextTypes.DEFAULT_TYPE, appointment_id: int, start_iso: str):
+    """Move an appointment through services.reschedule; returns (text, keyboard, moved) for the admin."""
+    from services.reschedule import reschedule_appointment
+    from utils.datetime_helper import format_datetime_short, from_iso
+    
+    bot_data = context.application.bot_data
+    result = await reschedule_appointment(
+        appointment_id, start_iso,
+        bot_data.get('schedule_reminder'), bot_data.get('cancel_reminder'), context.application
+    )
+    kb = [
+        [InlineKeyboardButton("📋 Lihat Detail", callback_data=f"mgappt_{appointment_id}")],
+        [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+    ]
+    if result.moved:
+        return f"✅ Waktu berhasil diubah menjadi *{format_datetime_short(start_iso)}*. Pasien diberi tahu otomatis.", kb, True
+    
+    text = f"❌ Waktu {format_datetime_short(start_iso)} tidak bisa dipakai: {result.reason}."
+    if result.alternatives:
+        text += "\n\nWaktu kosong terdekat untuk terapis yang sama (atau ketik waktu lain):"
+        kb = [
+            [InlineKeyboardButton(f"🕒 {format_datetime_short(start)}", callback_data=f"resched_{int(from_iso(start).timestamp())}")]
+            for start in result.alternatives
+        ] + kb
+    else:
+        text += "\n\nKetik waktu lain dalam format YYYY-MM-DD HH:MM."
+    return text, kb, False
+
+
+async def reschedule_alternative_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """One of the suggested starts (resched_{unix seconds}) was picked; it is checked again before moving."""
+    from datetime import datetime
+    from utils.datetime_helper import JAKARTA_TZ
+    
+    query = update.callback_query
+    await query.answer()
+    
+    appointment_id = context.user_data.get('manage_appt_id')
+    start_iso = datetime.fromtimestamp(int(query.data.split("_")[1]), JAKARTA_TZ).isoformat()
+    try:
+        text, kb, moved = await _reschedule(context, appointment_id, start_iso)
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(kb))
+        logger.info(f"Appointment {appointment_id} reschedule to {start_iso}: {'moved' if moved else 'refused'}")
+    except Exception as e:
+        logger.error(f"Error rescheduling appointment: {e}")
+        kb = [
+            [InlineKeyboardButton("📋 Lihat Detail", callback_data=f"mgappt_{appointment_id}")],
+            [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+        ]
+        await query.edit_message_text("❌ Terjadi kesalahan. Silakan coba lagi.", reply_markup=InlineKeyboardMarkup(kb))
+        return A_MANAGE_APPT
+    
+    return A_MANAGE_APPT if moved else A_EDIT_APPT_VALUE
+
+
 async def admin_waitlist_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -883,11 +938,9 @@ async def admin_waitlist_callback(update: Update, context: ContextTypes.DEFAULT_
         kb = []
         
         for i, item in enumerate(waitlist, 1):
-            item_dict = dict(item)
-            date_str = item_dict.get('requested_date') or "Tidak ditentukan"
-            phone_display = item_dict.get('phone') or 'Tidak ada'
-            label = f"{i}. {item_dict['name']} ({item_dict['gender']}) - {phone_display}"
-            kb.append([InlineKeyboardButton(label, callback_data=f"wl_view_{item_dict['id']}")])
+            phone_display = item.phone or 'Tidak ada'
+            label = f"{i}. {item.name} ({item.gender}) - {phone_display}"
+            kb.append([InlineKeyboardButton(label, callback_data=f"wl_view_{item.id}")])
         
         kb.append([InlineKeyboardButton("🔙 Kembali ke Admin", callback_data="admin_menu")])
         kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
@@ -924,6 +977,7 @@ async def admin_holidays_callback(update: Update, context: ContextTypes.DEFAULT_
     
     kb = [
         [InlineKeyboardButton("➕ Tambah Libur Tanggal", callback_data="add_holiday_date")],
+        [InlineKeyboardButton("➕ Tambah Libur Mingguan", callback_data="add_holiday_weekly")],
         [InlineKeyboardButton("🔙 Kembali ke Admin", callback_data="admin_menu")],
         [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
     ]
@@ -938,16 +992,16 @@ async def show_holiday_calendar(update: Update, context: ContextTypes.DEFAULT_TY
     
     from datetime import date
     from utils.date_picker import create_calendar_keyboard
+    from utils.datetime_helper import now_jakarta
     import calendar
     
-    today = date.today()
+    today = now_jakarta().date()
     if year is None or month is None:
         year, month = today.year, today.month
     
     max_date = date(today.year + 2, 12, 31)
     
-    existing_holidays = await db.get_holiday_dates()
-    holiday_set = {parse_date(h['date']) for h in existing_holidays if parse_date(h['date'])}
+    holiday_set = await db.get_month_date_holidays(year, month)
     
     available_dates = set()
     for day in range(1, calendar.monthrange(year, month)[1] + 1):
@@ -955,7 +1009,7 @@ async def show_holiday_calendar(update: Update, context: ContextTypes.DEFAULT_TY
         if check_date >= today and check_date not in holiday_set:
             available_dates.add(check_date)
     
-    kb, header_text = create_calendar_keyboard(year, month, available_dates, max_date)
+    kb, header_text = create_calendar_keyboard(year, month, available_dates, max_date, today)
     
     msg = (
         f"📅 *TAMBAH HARI LIBUR*\n\n"
@@ -1023,15 +1077,11 @@ async def add_holiday_date_selected_callback(update: Update, context: ContextTyp
     
     try:
         await db.add_holiday_date(date_obj)
-        
-        kb = [
-            [InlineKeyboardButton("🏖 Kembali ke Holidays", callback_data="admin_holidays")],
-            [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
-        ]
+        impact_text, kb = await _holiday_impact_view(context, "date", date_obj.isoformat())
         
         date_formatted = format_date_id(date_obj, include_year=True)
         await query.edit_message_text(
-            f"✅ *Hari libur ditambahkan*\n\n📅 Tanggal: {date_formatted}",
+            f"✅ *Hari libur ditambahkan*\n\n📅 Tanggal: {date_formatted}" + impact_text,
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
@@ -1057,30 +1107,163 @@ async def add_holiday_date_text(update: Update, context: ContextTypes.DEFAULT_TY
     
     try:
         await db.add_holiday_date(date_obj)
-        
-        kb = [
-            [InlineKeyboardButton("⚙️ Kembali ke Admin", callback_data="admin_menu")],
-            [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
-        ]
+        impact_text, kb = await _holiday_impact_view(context, "date", date_obj.isoformat())
         
         await update.message.reply_text(
-            f"✅ Tanggal {date_obj.isoformat()} ditambahkan sebagai hari libur.",
+            f"✅ Tanggal {date_obj.isoformat()} ditambahkan sebagai hari libur." + impact_text,
+            parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
         logger.info(f"Holiday date added: {date_obj.isoformat()}")
     except Exception as e:
         logger.error(f"Error adding holiday date: {e}")
         await update.message.reply_text("❌ Terjadi kesalahan. Silakan coba lagi.")
+        return A_MENU
     
-    return A_MENU
+    return A_HOLIDAY_MENU
+
+
+async def add_holiday_weekly_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    
+    weekly = {w['weekday'] for w in await db.get_holiday_weekly()}
+    kb = [
+        [InlineKeyboardButton(f"📅 {name}", callback_data=f"holweekly_{weekday}")]
+        for weekday, name in enumerate(WEEKDAY_NAMES_ID) if weekday not in weekly
+    ]
+    kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="admin_holidays")])
+    kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+    
+    await query.edit_message_text(
+        "📅 *TAMBAH LIBUR MINGGUAN*\n\nPilih hari yang libur setiap minggu:",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    
+    return A_ADD_HOL_WEEKLY
+
+
+async def add_holiday_weekly_selected_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    
+    weekday = int(query.data.split("_")[1])
+    
+    try:
+        await db.add_holiday_weekly(weekday)
+        impact_text, kb = await _holiday_impact_view(context, "weekly", weekday)
+        
+        await query.edit_message_text(
+            f"✅ *Libur mingguan ditambahkan*\n\n📅 Setiap {WEEKDAY_NAMES_ID[weekday]}" + impact_text,
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+        logger.info(f"Weekly holiday added: {WEEKDAY_NAMES_ID[weekday]}")
+    except Exception as e:
+        logger.error(f"Error adding weekly holiday: {e}")
+        kb = [[InlineKeyboardButton("🔙 Kembali", callback_data="admin_holidays")]]
+        await query.edit_message_text(
+            "❌ Terjadi kesalahan. Silakan coba lagi.",
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+    
+    return A_HOLIDAY_MENU
+
+
+async def _holiday_impact_view(context: ContextTypes.DEFAULT_TYPE, kind: str, value):
+    """List the upcoming bookings on a new holiday and offer to move or cancel them all; returns (text, keyboard)."""
+    from services.holiday_impact import affected_appointments
+    from utils.datetime_helper import format_datetime_short
+    
+    affected = await affected_appointments(kind, value)
+    if not affected:
+        context.user_data.pop('holiday_impact', None)
+        return "\n\nTidak ada janji yang terdampak.", [
+            [InlineKeyboardButton("🏖 Kembali ke Holidays", callback_data="admin_holidays")],
+            [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+        ]
+    
+    context.user_data['holiday_impact'] = (kind, value)
+    # Patient names are free text; escape them for the Markdown the callers send this with.
+    lines = [f"• {escape_markdown(appt.user_name)} - {format_datetime_short(appt.start_dt)} ({escape_markdown(appt.therapist_name or '')})"
+             for appt in affected]
+    text = f"\n\n⚠️ *{len(affected)} janji terkonfirmasi jatuh pada hari libur ini:*\n" + "\n".join(lines[:15])
+    if len(lines) > 15:
+        text += f"\n_...dan {len(lines) - 15} janji lainnya_"
+    text += "\n\nPindahkan semuanya ke hari buka berikutnya (jam yang sama) atau batalkan semuanya? Pasien diberi tahu otomatis."
+    kb = [
+        [InlineKeyboardButton("🔁 Pindahkan Semua", callback_data="hol_move")],
+        [InlineKeyboardButton("❌ Batalkan Semua", callback_data="hol_cancel")],
+        [InlineKeyboardButton("⏭ Biarkan Dulu", callback_data="admin_holidays")],
+        [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+    ]
+    return text, kb
+
+
+async def holiday_impact_action_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Move (hol_move) or cancel (hol_cancel) every booking still on the holiday, in one transaction."""
+    from services.holiday_impact import SEARCH_DAYS, affected_appointments, cancel_for_holiday, move_for_holiday
+    from utils.datetime_helper import format_datetime_short
+    
+    query = update.callback_query
+    await query.answer()
+    
+    impact = context.user_data.get('holiday_impact')
+    if not impact:
+        return await admin_holidays_callback(update, context)
+    
+    kb = [
+        [InlineKeyboardButton("🏖 Kembali ke Holidays", callback_data="admin_holidays")],
+        [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+    ]
+    try:
+        affected = await affected_appointments(*impact)
+        if query.data == "hol_move":
+            result = await move_for_holiday(
+                affected, context.application.bot_data.get('schedule_reminder'), context.application
+            )
+            lines = [f"⚠️ {escape_markdown(appt.user_name)} - {format_datetime_short(appt.start_dt)} (tidak ada slot)"
+                     for appt in result.unmoved]
+            lines += [f"🔁 {escape_markdown(appt.user_name)} → {format_datetime_short(start_iso)} ({escape_markdown(therapist.name)})"
+                      for appt, therapist, start_iso in result.moved]
+            text = (
+                f"✅ *{len(result.moved)} janji dipindah*, {len(result.unmoved)} tidak mendapat slot "
+                f"dalam {SEARCH_DAYS} hari. Pasien yang dipindah diberi tahu otomatis.\n\n"
+            )
+            text += "\n".join(lines[:15])
+            if len(lines) > 15:
+                text += f"\n_...dan {len(lines) - 15} janji lainnya_"
+            if result.unmoved:
+                kb.insert(0, [InlineKeyboardButton("❌ Batalkan Sisanya", callback_data="hol_cancel")])
+            else:
+                context.user_data.pop('holiday_impact', None)
+        else:
+            cancelled = await cancel_for_holiday(affected, context.application.bot_data.get('cancel_reminder'))
+            text = f"✅ *{len(cancelled)} janji dibatalkan.* Pasien diberi tahu otomatis."
+            context.user_data.pop('holiday_impact', None)
+        
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(kb))
+        logger.info(f"Holiday impact handled ({query.data}): {impact}, {len(affected)} appointments")
+    except Exception as e:
+        logger.error(f"Error handling holiday impact: {e}")
+        await query.edit_message_text(
+            "❌ Terjadi kesalahan. Silakan coba lagi.",
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+    
+    return A_HOLIDAY_MENU
 
 
 async def admin_export_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    import csv
+    import io
+    
     query = update.callback_query
     await query.answer()
     
     try:
-        appointments = await db.get_appointments()
+        appointments = await db.get_appointments(include_archive=True)
         
         output = io.StringIO()
         writer = csv.writer(output)
@@ -1089,16 +1272,16 @@ async def admin_export_callback(update: Update, context: ContextTypes.DEFAULT_TY
         
         for appt in appointments:
             writer.writerow([
-                appt['id'],
-                appt['user_id'],
-                appt['user_name'],
-                appt['patient_gender'],
-                appt.get('patient_address', ''),
-                appt['therapist_name'],
-                appt['start_dt'],
-                appt['duration_min'],
-                appt['status'],
-                appt['created_at']
+                appt.id,
+                appt.user_id,
+                appt.user_name,
+                appt.patient_gender,
+                appt.patient_address or '',
+                appt.therapist_name,
+                appt.start_dt,
+                appt.duration_min,
+                appt.status,
+                appt.created_at
             ])
         
         output.seek(0)
@@ -1150,22 +1333,20 @@ async def view_waitlist_entry_callback(update: Update, context: ContextTypes.DEF
         )
         return A_MENU
     
-    entry_dict = dict(entry)
-    
     context.user_data['wl_id'] = waitlist_id
-    context.user_data['wl_chat_id'] = entry_dict['chat_id']
-    context.user_data['wl_name'] = entry_dict['name']
+    context.user_data['wl_chat_id'] = entry.chat_id
+    context.user_data['wl_name'] = entry.name
     
-    date_str = entry_dict.get('requested_date') or "Tidak ditentukan"
-    phone_str = entry_dict.get('phone') or 'Tidak ada'
+    date_str = entry.requested_date or "Tidak ditentukan"
+    phone_str = entry.phone or 'Tidak ada'
     
     msg = (
         f"⏳ *DETAIL DAFTAR TUNGGU*\n\n"
-        f"👤 Nama: {entry_dict['name']}\n"
-        f"🚻 Jenis Kelamin: {entry_dict['gender']}\n"
+        f"👤 Nama: {entry.name}\n"
+        f"🚻 Jenis Kelamin: {entry.gender}\n"
         f"📞 Nomor Telepon: {phone_str}\n"
         f"📅 Tanggal Request: {date_str}\n"
-        f"📝 Dibuat: {entry_dict['created_at'][:10]}\n\n"
+        f"📝 Dibuat: {entry.created_at[:10]}\n\n"
         f"*Pilih aksi follow-up:*"
     )
     
@@ -1200,14 +1381,14 @@ async def confirm_slot_available_callback(update: Update, context: ContextTypes.
     try:
         notification_msg = (
             f"✅ *Kabar Gembira!*\n\n"
-            f"Halo {entry['name']},\n\n"
+            f"Halo {entry.name},\n\n"
             f"Kami ingin memberitahu bahwa *SLOT BEKAM SUDAH TERSEDIA*!\n\n"
             f"Silakan booking sekarang dengan mengetik /start\n\n"
             f"Terima kasih sudah menunggu 🙏"
         )
         
         await context.bot.send_message(
-            chat_id=entry['chat_id'],
+            chat_id=entry.chat_id,
             text=notification_msg,
             parse_mode='Markdown'
         )
@@ -1216,12 +1397,12 @@ async def confirm_slot_available_callback(update: Update, context: ContextTypes.
         
         kb = [[InlineKeyboardButton("🔙 Kembali ke Waitlist", callback_data="admin_waitlist")]]
         await query.edit_message_text(
-            f"✅ Notifikasi berhasil dikirim ke *{entry['name']}*.\n\nEntry telah dihapus dari waitlist.",
+            f"✅ Notifikasi berhasil dikirim ke *{entry.name}*.\n\nEntry telah dihapus dari waitlist.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
         
-        logger.info(f"Waitlist notification sent to {entry['chat_id']}")
+        logger.info(f"Waitlist notification sent to {entry.chat_id}")
         
     except Exception as e:
         logger.error(f"Error sending waitlist notification: {e}")
@@ -1253,26 +1434,26 @@ async def inform_waitlist_full_callback(update: Update, context: ContextTypes.DE
     try:
         notification_msg = (
             f"📋 *Info Daftar Tunggu*\n\n"
-            f"Halo {entry['name']},\n\n"
+            f"Halo {entry.name},\n\n"
             f"Terima kasih sudah sabar menunggu. Untuk saat ini slot bekam masih *PENUH*.\n\n"
             f"Anda akan tetap di daftar tunggu dan kami akan menghubungi ketika ada slot tersedia.\n\n"
             f"Terima kasih atas pengertiannya 🙏"
         )
         
         await context.bot.send_message(
-            chat_id=entry['chat_id'],
+            chat_id=entry.chat_id,
             text=notification_msg,
             parse_mode='Markdown'
         )
         
         kb = [[InlineKeyboardButton("🔙 Kembali ke Waitlist", callback_data="admin_waitlist")]]
         await query.edit_message_text(
-            f"✅ Notifikasi 'penuh' berhasil dikirim ke *{entry['name']}*.\n\nEntry masih di waitlist.",
+            f"✅ Notifikasi 'penuh' berhasil dikirim ke *{entry.name}*.\n\nEntry masih di waitlist.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
         
-        logger.info(f"Full notification sent to {entry['chat_id']}")
+        logger.info(f"Full notification sent to {entry.chat_id}")
         
     except Exception as e:
         logger.error(f"Error sending full notification: {e}")
@@ -1305,7 +1486,7 @@ async def delete_waitlist_entry_callback(update: Update, context: ContextTypes.D
     
     kb = [[InlineKeyboardButton("🔙 Kembali ke Waitlist", callback_data="admin_waitlist")]]
     await query.edit_message_text(
-        f"✅ *{entry['name']}* berhasil dihapus dari waitlist.",
+        f"✅ *{entry.name}* berhasil dihapus dari waitlist.",
         parse_mode='Markdown',
         reply_markup=InlineKeyboardMarkup(kb)
     )
@@ -1344,7 +1525,7 @@ async def schedule_inactive_callback(update: Update, context: ContextTypes.DEFAU
     
     msg = (
         f"📅 *JADWALKAN NONAKTIF*\n\n"
-        f"Terapis: *{therapist['name']}*\n\n"
+        f"Terapis: *{therapist.name}*\n\n"
         f"Pilih durasi nonaktif (mulai sekarang):"
     )
     
@@ -1353,6 +1534,32 @@ async def schedule_inactive_callback(update: Update, context: ContextTypes.DEFAU
     return A_SCHEDULE_INACTIVE
 
 
+async def _apply_leave(context: ContextTypes.DEFAULT_TYPE, therapist_id: int, start_iso: str, end_iso: str) -> str:
+    """Reassign the bookings inside a new leave window and describe the result for the admin."""
+    from services.leave_impact import reassign_for_leave
+    from utils.datetime_helper import format_datetime_short
+    
+    impact = await reassign_for_leave(
+        therapist_id, start_iso, end_iso,
+        context.application.bot_data.get('schedule_reminder'), context.application
+    )
+    if not impact.affected:
+        return "\n\nTidak ada janji yang terdampak."
+    
+    lines = [f"⚠️ {escape_markdown(appt.user_name)} - {format_datetime_short(appt.start_dt)} (tidak ada pengganti)"
+             for appt in impact.unassigned]
+    lines += [f"🔁 {escape_markdown(appt.user_name)} - {format_datetime_short(appt.start_dt)} → {escape_markdown(therapist.name)}"
+              for appt, therapist in impact.reassigned]
+    text = (
+        f"\n\n📋 *{impact.affected} janji terdampak*: {len(impact.reassigned)} dipindah, "
+        f"{len(impact.unassigned)} tanpa pengganti. Pasien diberi tahu otomatis.\n"
+    )
+    text += "\n".join(lines[:15])
+    if len(lines) > 15:
+        text += f"\n_...dan {len(lines) - 15} janji lainnya_"
+    return text
+
+
 async def schedule_inactive_duration_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -1374,14 +1581,16 @@ async def schedule_inactive_duration_callback(update: Update, context: ContextTy
             start_time.isoformat(),
             end_time.isoformat()
         )
+        impact_text = await _apply_leave(context, therapist_id, start_time.isoformat(), end_time.isoformat())
         
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data=f"th_detail_{therapist_id}")]]
         
         await query.edit_message_text(
-            f"✅ Terapis *{therapist['name']}* dijadwalkan nonaktif selama *{days} hari*.\n\n"
+            f"✅ Terapis *{therapist.name}* dijadwalkan nonaktif selama *{days} hari*.\n\n"
             f"Mulai: {format_datetime_id(start_time.isoformat())}\n"
             f"Sampai: {format_datetime_id(end_time.isoformat())}\n\n"
-            f"Status akan otomatis berubah pada waktu yang dijadwalkan.",
+            f"Status akan otomatis berubah pada waktu yang dijadwalkan."
+            f"{impact_text}",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
@@ -1447,14 +1656,16 @@ async def schedule_inactive_custom_days_text(update: Update, context: ContextTyp
             start_time.isoformat(),
             end_time.isoformat()
         )
+        impact_text = await _apply_leave(context, therapist_id, start_time.isoformat(), end_time.isoformat())
         
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data=f"th_detail_{therapist_id}")]]
         
         await update.message.reply_text(
-            f"✅ Terapis *{therapist['name']}* dijadwalkan nonaktif selama *{days} hari*.\n\n"
+            f"✅ Terapis *{therapist.name}* dijadwalkan nonaktif selama *{days} hari*.\n\n"
             f"Mulai: {format_datetime_id(start_time.isoformat())}\n"
             f"Sampai: {format_datetime_id(end_time.isoformat())}\n\n"
-            f"Status akan otomatis berubah pada waktu yang dijadwalkan.",
+            f"Status akan otomatis berubah pada waktu yang dijadwalkan."
+            f"{impact_text}",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
@@ -1491,7 +1702,7 @@ async def cancel_inactive_schedule_callback(update: Update, context: ContextType
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data=f"th_detail_{therapist_id}")]]
         
         await query.edit_message_text(
-            f"✅ Jadwal nonaktif untuk terapis *{therapist['name']}* telah dibatalkan.",
+            f"✅ Jadwal nonaktif untuk terapis *{therapist.name}* telah dibatalkan.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup(kb)
         )
@@ -1506,3 +1717,17 @@ async def cancel_inactive_schedule_callback(update: Update, context: ContextType
         )
     
     return A_TH_DETAIL
+
+
+async def stats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not await is_admin(update.effective_user.id):
+        await update.message.reply_text("❌ Anda tidak memiliki akses admin.")
+        return
+    
+    from utils.metrics import metrics
+    
+    summary = metrics.render_summary()
+    await update.message.reply_text(
+        f"📈 *STATISTIK PERFORMA*\n```\n{summary[:3800]}\n```",
+        parse_mode="Markdown"
+    )
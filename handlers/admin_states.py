@@ -0,0 +1,8 @@
+# Conversation states of the admin screens. Kept apart from handlers/admin.py so
+# main.py can build the ConversationHandler without importing the admin module.
+(A_MENU, A_ADD_TH_NAME, A_ADD_TH_GENDER, A_DELETE_TH_SELECT,
+ A_DELETE_APPT, A_HOLIDAY_MENU, A_ADD_HOL_DATE, A_ADD_HOL_WEEKLY,
+ A_DEL_HOL_DATE_SELECT, A_DEL_HOL_WEEKLY_SELECT, A_VIEW_APPT, A_MANAGE_APPT,
+ A_EDIT_APPT_FIELD, A_EDIT_APPT_VALUE, A_WAITLIST_MANAGE,
+ A_TH_DETAIL, A_EDIT_TH_NAME, A_EDIT_TH_GENDER, A_SCHEDULE_INACTIVE,
+ A_INACTIVE_CUSTOM_DAYS, A_BROADCAST_COMPOSE, A_BROADCAST_CONFIRM) = range(10, 32)
@@ -10,9 +10,20 @@ S_START = 0
 
 async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
+    
+    my_appointments_label = "📋 Lihat Janji Saya"
+    if user:
+        from database.db import db
+        try:
+            upcoming_count = await db.count_user_upcoming(user.id)
+            if upcoming_count:
+                my_appointments_label += f" ({upcoming_count})"
+        except Exception as e:
+            logger.error(f"Error counting upcoming appointments: {e}")
+    
     kb = [
         [InlineKeyboardButton("🩺 Buat Janji Baru", callback_data="make")],
-        [InlineKeyboardButton("📋 Lihat Janji Saya", callback_data="my_appointments")]
+        [InlineKeyboardButton(my_appointments_label, callback_data="my_appointments")]
     ]
     
     if user and user.id in Config.ADMIN_IDS:
@@ -26,7 +37,7 @@ async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         next_sunnah = get_upcoming_sunnah_date()
         days_until = get_days_until_next_sunnah(next_sunnah)
 
-        logger.info(f"DEBUG >> next_sunnah={next_sunnah}, days_until={days_until}")
+        logger.debug("next_sunnah=%s, days_until=%s", next_sunnah, days_until)
 
         sunnah_info = ""
         if next_sunnah and days_until >= 0:
@@ -219,7 +230,7 @@ async def global_callback_handler(update: Update, context: ContextTypes.DEFAULT_
     try:
         await query.message.edit_text(msg, parse_mode='Markdown')
     except Exception as e:
-        logger.debug(f"Could not edit message, sending new message: {e}")
+        logger.debug("Could not edit message, sending new message: %s", e)
         try:
             await query.message.reply_text(msg, parse_mode='Markdown')
         except Exception as e2:
@@ -0,0 +1,371 @@
+import logging
+from datetime import date, datetime, timedelta
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from database.db import db
+from config import Config
+from utils.datetime_helper import JAKARTA_TZ, format_date_id, format_datetime_id, parse_date, now_jakarta
+from utils.formatters import escape_markdown_v2
+from utils.validators import is_valid_patient_name, is_valid_address
+from utils.date_picker import create_calendar_keyboard, get_next_month, get_prev_month
+from handlers.user import S_START, log_error_with_context
+
+logger = logging.getLogger(__name__)
+
+# After the admin states (10-31) and S_CHOOSE_TREATMENT (32).
+(S_GROUP_MEMBERS, S_GROUP_DATE, S_GROUP_TIME, S_GROUP_NAMES,
+ S_GROUP_ADDRESS, S_GROUP_CONFIRM) = range(33, 39)
+
+GENDERS = {"m": "Laki-laki", "f": "Perempuan"}
+
+
+def _members(context: ContextTypes.DEFAULT_TYPE):
+    """The group so far as GroupMember objects (user_data keeps plain dicts for the pickle persistence)."""
+    from services.group_booking import GroupMember
+    return [GroupMember(m['gender'], m['minutes'], m['treatment']) for m in context.user_data.get('group_members', [])]
+
+
+def _local_date(start_iso: str) -> date:
+    return datetime.fromisoformat(start_iso).astimezone(JAKARTA_TZ).date()
+
+
+def _member_label(index: int, member) -> str:
+    icon = "👨" if member.gender == "Laki-laki" else "👩"
+    treatment = f" – {member.treatment}" if member.treatment else ""
+    return f"{index + 1}. {icon} {member.gender}{treatment} ({member.minutes} menit)"
+
+
+async def group_start_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Start a family/group booking: patients are added one by one with their gender (and treatment)."""
+    context.user_data['group_members'] = []
+    return await _show_members(update, context)
+
+
+async def _show_members(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from services.slot_engine import treatments
+
+    query = update.callback_query
+    await query.answer()
+
+    members = _members(context)
+    options = treatments()
+    kb = []
+    if len(members) < Config.GROUP_MAX_PATIENTS:
+        for code, gender in GENDERS.items():
+            icon = "👨" if code == "m" else "👩"
+            if len(options) == 1:
+                kb.append([InlineKeyboardButton(f"➕ {icon} {gender}", callback_data=f"grp_add_{code}_0")])
+            else:
+                kb.extend([InlineKeyboardButton(f"➕ {icon} {t.name} ({t.minutes} menit)", callback_data=f"grp_add_{code}_{i}")]
+                          for i, t in enumerate(options))
+    if members:
+        kb.append([InlineKeyboardButton("↩️ Hapus Terakhir", callback_data="grp_undo")])
+    if len(members) >= 2:
+        kb.append([InlineKeyboardButton("📅 Lanjut Pilih Tanggal", callback_data="grp_done")])
+    kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="make"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+
+    listing = "\n".join(_member_label(i, m) for i, m in enumerate(members)) or "_(belum ada)_"
+    msg = (
+        f"👨‍👩‍👧 *BOOKING KELUARGA / GRUP*\n\n"
+        f"Tambahkan setiap pasien (maksimal {Config.GROUP_MAX_PATIENTS}). Semua pasien dilayani "
+        f"pada jam yang sama, masing-masing dengan terapis sesuai jenis kelamin.\n\n"
+        f"*Pasien:*\n{listing}"
+    )
+
+    await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(kb))
+    return S_GROUP_MEMBERS
+
+
+async def group_member_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from services.slot_engine import treatments
+
+    query = update.callback_query
+    members = context.user_data.setdefault('group_members', [])
+
+    if query.data == "grp_undo":
+        if members:
+            members.pop()
+        return await _show_members(update, context)
+
+    _, _, code, index = query.data.split("_")
+    options = treatments()
+    index = int(index)
+    if index < len(options) and len(members) < Config.GROUP_MAX_PATIENTS:
+        treatment = options[index]
+        members.append({
+            'gender': GENDERS[code],
+            'minutes': treatment.minutes,
+            'treatment': treatment.name if len(options) > 1 else None,
+        })
+    return await _show_members(update, context)
+
+
+async def group_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE, year: int = None, month: int = None):
+    """Month calendar where a day is available only if the whole group fits at some time on it."""
+    from services.group_booking import find_group_starts
+    import calendar
+
+    query = update.callback_query
+    await query.answer()
+
+    today = now_jakarta().date()
+    if year is None or month is None:
+        year, month = today.year, today.month
+    context.user_data['cal_year'] = year
+    context.user_data['cal_month'] = month
+
+    max_date = today + timedelta(days=Config.MAX_DAYS_AHEAD)
+    members = _members(context)
+    therapists = await db.get_therapists(active_only=True)
+    closed_dates = await db.get_month_holidays(year, month)
+
+    available_dates = set()
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        check_date = date(year, month, day)
+        if check_date < today or check_date > max_date or check_date in closed_dates:
+            continue
+        if await find_group_starts(members, check_date, therapists):
+            available_dates.add(check_date)
+
+    kb, header_text = create_calendar_keyboard(year, month, available_dates, max_date, today)
+    kb.append([InlineKeyboardButton("🔙 Ubah Pasien", callback_data="grp_members"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+
+    msg = (
+        f"📅 *PILIH TANGGAL (GRUP {len(members)} PASIEN)*\n\n"
+        f"Angka = Semua pasien bisa dilayani | \\[Angka] = Penuh atau Libur | (Angka) = Lewat\n\n"
+        f"{header_text}"
+    )
+
+    await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(kb))
+    return S_GROUP_DATE
+
+
+async def group_done_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.callback_query.data == "grp_members":
+        return await _show_members(update, context)
+    return await group_calendar(update, context)
+
+
+async def group_calendar_nav_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    _, direction, year, month = update.callback_query.data.split("_")
+    year, month = int(year), int(month)
+    if direction == "next":
+        year, month = get_next_month(year, month)
+    else:
+        year, month = get_prev_month(year, month)
+    return await group_calendar(update, context, year, month)
+
+
+async def group_date_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """All times of the chosen day where the group fits, found in one pass over the day."""
+    from services.group_booking import find_group_starts
+
+    query = update.callback_query
+    await query.answer()
+
+    if query.data.startswith("date_"):
+        context.user_data['group_date'] = query.data.split("_", 1)[1]
+    date_obj = parse_date(context.user_data.get('group_date', ''))
+    if not date_obj:
+        return await group_calendar(update, context)
+
+    starts = await find_group_starts(_members(context), date_obj)
+
+    kb = []
+    row = []
+    for start, _ in starts:
+        row.append(InlineKeyboardButton(datetime.fromtimestamp(start, JAKARTA_TZ).strftime("%H:%M"), callback_data=f"grp_time_{start}"))
+        if len(row) >= 3:
+            kb.append(row)
+            row = []
+    if row:
+        kb.append(row)
+    kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="grp_back_date"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+
+    if starts:
+        body = "Pilih jam mulai (semua pasien dilayani bersamaan):"
+    else:
+        body = "Maaf, tidak ada jam di mana semua pasien bisa dilayani bersamaan. Silakan pilih tanggal lain."
+
+    await query.edit_message_text(
+        f"⏰ *PILIH WAKTU GRUP*\n\n"
+        f"📅 Tanggal: {format_date_id(date_obj, include_year=True)}\n"
+        f"👥 Pasien: {len(context.user_data.get('group_members', []))}\n\n"
+        f"{body}",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    return S_GROUP_TIME
+
+
+async def group_back_date_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    return await group_calendar(update, context, context.user_data.get('cal_year'), context.user_data.get('cal_month'))
+
+
+async def group_time_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    start = int(query.data.split("_")[2])
+    context.user_data['group_start'] = datetime.fromtimestamp(start, JAKARTA_TZ).isoformat()
+
+    members = _members(context)
+    listing = "\n".join(_member_label(i, m) for i, m in enumerate(members))
+    kb = [
+        [InlineKeyboardButton("🔙 Kembali", callback_data="grp_back_time")],
+        [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+    ]
+
+    await query.edit_message_text(
+        f"✏️ *NAMA PASIEN*\n\n"
+        f"Waktu: {format_datetime_id(context.user_data['group_start'])}\n\n"
+        f"{listing}\n\n"
+        f"Ketik nama lengkap {len(members)} pasien, *satu nama per baris*, urut sesuai daftar di atas.",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    return S_GROUP_NAMES
+
+
+async def group_names_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    names = [line.strip() for line in update.message.text.splitlines() if line.strip()]
+    count = len(context.user_data.get('group_members', []))
+
+    if len(names) != count:
+        await update.message.reply_text(
+            f"❌ Dibutuhkan {count} nama (satu per baris), diterima {len(names)}.\n\n"
+            f"Silakan ketik ulang atau ketik /cancel untuk membatalkan:"
+        )
+        return S_GROUP_NAMES
+
+    for name in names:
+        valid, error_msg = is_valid_patient_name(name)
+        if not valid:
+            await update.message.reply_text(f"❌ {name}: {error_msg}\n\nSilakan ketik ulang semua nama:")
+            return S_GROUP_NAMES
+
+    context.user_data['group_names'] = names
+    kb = [
+        [InlineKeyboardButton("🔙 Kembali", callback_data="grp_back_time")],
+        [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+    ]
+    await update.message.reply_text(
+        "📍 *ALAMAT*\n\nSilakan ketik alamat lengkap (satu alamat untuk seluruh grup):",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    return S_GROUP_ADDRESS
+
+
+async def group_address_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from services.group_booking import find_group_starts
+
+    address = update.message.text.strip()
+    valid, error_msg = is_valid_address(address)
+    if not valid:
+        await update.message.reply_text(f"❌ {error_msg}\n\nSilakan masukkan alamat yang valid atau ketik /cancel untuk membatalkan:")
+        return S_GROUP_ADDRESS
+    context.user_data['group_address'] = address
+
+    members = _members(context)
+    start_iso = context.user_data['group_start']
+    start = int(datetime.fromisoformat(start_iso).timestamp())
+    therapists = {t.id: t for t in await db.get_therapists(active_only=True)}
+    assignment = dict(await find_group_starts(members, _local_date(start_iso), list(therapists.values()))).get(start)
+
+    if not assignment:
+        kb = [[InlineKeyboardButton("⏰ Pilih Waktu Lain", callback_data="grp_back_time")],
+              [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]]
+        await update.message.reply_text("⚠️ Jam tersebut baru saja terisi. Silakan pilih waktu lain.", reply_markup=InlineKeyboardMarkup(kb))
+        return S_GROUP_TIME
+    context.user_data['group_assignment'] = assignment
+
+    lines = []
+    for name, member, therapist_id in zip(context.user_data['group_names'], members, assignment):
+        treatment = f", {member.treatment}" if member.treatment else ""
+        lines.append(escape_markdown_v2(
+            f"• {name} ({member.gender}{treatment}, {member.minutes} menit) – terapis {therapists[therapist_id].name}"
+        ))
+
+    msg = (
+        f"✅ *KONFIRMASI BOOKING GRUP*\n\n"
+        f"🕒 *Waktu:* {escape_markdown_v2(format_datetime_id(start_iso))}\n"
+        f"📍 *Alamat:* {escape_markdown_v2(address)}\n\n"
+        + "\n".join(lines) +
+        "\n\n_Semua janji dibuat sekaligus, atau tidak sama sekali\\._"
+    )
+    kb = [
+        [InlineKeyboardButton("✅ Ya, Konfirmasi Semua", callback_data="grp_confirm_yes")],
+        [InlineKeyboardButton("❌ Batalkan", callback_data="grp_confirm_no"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+    ]
+    await update.message.reply_text(msg, parse_mode='MarkdownV2', reply_markup=InlineKeyboardMarkup(kb))
+    return S_GROUP_CONFIRM
+
+
+async def group_confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    if query.data == "grp_confirm_no":
+        kb = [
+            [InlineKeyboardButton("🩺 Buat Janji Baru", callback_data="make")],
+            [InlineKeyboardButton("🏠 Kembali ke Menu Utama", callback_data="back_to_start")]
+        ]
+        await query.edit_message_text("❌ Booking grup dibatalkan.", reply_markup=InlineKeyboardMarkup(kb))
+        return S_START
+
+    try:
+        user_id = update.effective_user.id
+        members = _members(context)
+        names = context.user_data['group_names']
+        assignment = context.user_data['group_assignment']
+        start_iso = context.user_data['group_start']
+
+        ids = await db.add_group_appointments(
+            user_id, start_iso, context.user_data.get('group_address', ''),
+            [(name, member.gender, therapist_id, member.minutes)
+             for name, member, therapist_id in zip(names, members, assignment)]
+        )
+        if ids is None:
+            kb = [[InlineKeyboardButton("⏰ Pilih Waktu Lain", callback_data="grp_back_time")],
+                  [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]]
+            await query.edit_message_text(
+                "⚠️ Salah satu terapis baru saja terisi, tidak ada janji yang dibuat. Silakan pilih waktu lain.",
+                reply_markup=InlineKeyboardMarkup(kb)
+            )
+            return S_GROUP_TIME
+
+        schedule_reminder = context.application.bot_data.get('schedule_reminder')
+        therapists = {t.id: t for t in await db.get_therapists(active_only=False)}
+        if schedule_reminder:
+            reminders = []
+            for appt_id, name, therapist_id in zip(ids, names, assignment):
+                job_id = schedule_reminder(
+                    context.application, appt_id, user_id, name, therapists[therapist_id].name, start_iso
+                )
+                if job_id:
+                    reminders.append((appt_id, job_id))
+            await db.set_reminder_jobs(reminders)
+
+        kb = [
+            [InlineKeyboardButton("📋 Lihat Janji Saya", callback_data="my_appointments")],
+            [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+        ]
+        listing = "\n".join(f"• {name} – {therapists[tid].name}" for name, tid in zip(names, assignment))
+        await query.edit_message_text(
+            f"🎉 Booking grup berhasil!\n\n🕒 {format_datetime_id(start_iso)}\n\n{listing}",
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+        logger.info("Group booking created - User: %s, %d patients, Time: %s, Appointments: %s",
+                    user_id, len(ids), start_iso, ids)
+        for key in ('group_members', 'group_names', 'group_assignment', 'group_start', 'group_address', 'group_date'):
+            context.user_data.pop(key, None)
+        return S_START
+    except Exception as e:
+        log_error_with_context(e, update, context, "group_confirm_callback")
+        kb = [[InlineKeyboardButton("🏠 Kembali ke Menu Utama", callback_data="back_to_start")]]
+        await query.edit_message_text(
+            "❌ Terjadi kesalahan saat membuat janji grup. Silakan coba lagi atau hubungi admin.",
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+        return S_START
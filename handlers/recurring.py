@@ -0,0 +1,150 @@
+import logging
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from database.db import db
+from config import Config
+from utils.datetime_helper import format_datetime_id
+from handlers.user import S_START, log_error_with_context
+
+logger = logging.getLogger(__name__)
+
+# After the group booking states (33-38).
+S_SERIES_RULE, S_SERIES_COUNT, S_SERIES_CONFIRM = range(39, 42)
+
+COUNT_CHOICES = (4, 8, 12)
+
+
+def _session_minutes(context: ContextTypes.DEFAULT_TYPE) -> int:
+    return context.user_data.get('duration_min', Config.SESSION_MINUTES)
+
+
+def _count_choices():
+    return sorted({n for n in COUNT_CHOICES if n <= Config.SERIES_MAX_OCCURRENCES} | {Config.SERIES_MAX_OCCURRENCES})
+
+
+async def series_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Offer the recurrence rules for the booking being confirmed."""
+    from services.recurrence import RULES
+
+    query = update.callback_query
+    await query.answer()
+
+    kb = [[InlineKeyboardButton(f"🔁 {label}", callback_data=f"series_rule_{code}")] for code, label in RULES.items()]
+    kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="back_to_confirm"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+
+    await query.edit_message_text(
+        f"🔁 *JADWAL RUTIN*\n\n"
+        f"Mulai: {format_datetime_id(context.user_data.get('requested_start', ''))}\n"
+        f"Terapis: {context.user_data.get('therapist_name', '?')}\n\n"
+        f"Pilih jadwal pengulangan (jam dan terapis sama):",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    return S_SERIES_RULE
+
+
+async def series_rule_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from services.recurrence import RULES
+
+    query = update.callback_query
+    await query.answer()
+
+    rule = query.data.split("_", 2)[2]
+    if rule not in RULES:
+        return await series_menu_callback(update, context)
+    context.user_data['series_rule'] = rule
+
+    kb = [[InlineKeyboardButton(f"{n} kali", callback_data=f"series_count_{n}") for n in _count_choices()]]
+    kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="series_menu"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+
+    await query.edit_message_text(
+        f"🔁 *{RULES[rule]}*\n\nBerapa kali pertemuan (termasuk jadwal pertama)?",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    return S_SERIES_COUNT
+
+
+async def series_count_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Expand the series and check every occurrence before anything is booked."""
+    from services.recurrence import RULES, expand_starts, plan_series
+
+    query = update.callback_query
+    await query.answer()
+
+    count = min(int(query.data.split("_")[2]), Config.SERIES_MAX_OCCURRENCES)
+    rule = context.user_data.get('series_rule', 'weekly')
+    starts = expand_starts(rule, context.user_data['requested_start'], count)
+    free, conflicts = await plan_series(context.user_data['therapist_id'], starts, _session_minutes(context))
+    context.user_data['series_starts'] = free
+
+    reasons = dict(conflicts)
+    lines = [
+        f"{'✅' if start not in reasons else '❌'} {format_datetime_id(start)}"
+        + (f" – {reasons[start]}" if start in reasons else "")
+        for start in starts
+    ]
+
+    kb = []
+    if free:
+        kb.append([InlineKeyboardButton(f"✅ Konfirmasi {len(free)} Janji", callback_data="series_confirm")])
+    kb.append([InlineKeyboardButton("🔙 Kembali", callback_data=f"series_rule_{rule}"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+
+    summary = f"{len(free)} dari {len(starts)} jadwal bisa dipesan."
+    if conflicts:
+        summary += " Jadwal bertanda ❌ tidak ikut dipesan."
+    await query.edit_message_text(
+        f"🔁 {RULES[rule]} – {context.user_data.get('therapist_name', '?')}\n\n"
+        + "\n".join(lines) +
+        f"\n\n{summary}",
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    return S_SERIES_CONFIRM
+
+
+async def series_confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    try:
+        user_id = update.effective_user.id
+        patient_name = context.user_data.get('patient_name', 'Unknown')
+        therapist_name = context.user_data.get('therapist_name', '?')
+        starts = context.user_data.get('series_starts', [])
+
+        booked, conflicts = await db.add_appointment_series(
+            user_id, patient_name, context.user_data.get('patient_gender', 'Unknown'),
+            context.user_data['therapist_id'], starts, _session_minutes(context),
+            context.user_data.get('patient_address', '')
+        )
+
+        schedule_reminders = context.application.bot_data.get('schedule_reminders')
+        if schedule_reminders and booked:
+            jobs = schedule_reminders(context.application, [
+                (appt_id, user_id, patient_name, therapist_name, start) for appt_id, start in booked
+            ])
+            await db.set_reminder_jobs(jobs)
+
+        lines = [f"✅ {format_datetime_id(start)}" for _, start in booked]
+        lines += [f"❌ {format_datetime_id(start)} – terapis sudah terisi" for start in conflicts]
+        kb = [
+            [InlineKeyboardButton("📋 Lihat Janji Saya", callback_data="my_appointments")],
+            [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
+        ]
+        await query.edit_message_text(
+            f"🎉 {len(booked)} janji rutin berhasil dibuat dengan {therapist_name}.\n\n" + "\n".join(lines),
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+        logger.info("Recurring series created - User: %s, Rule: %s, Booked: %s, Conflicts: %s",
+                    user_id, context.user_data.get('series_rule'), [appt_id for appt_id, _ in booked], len(conflicts))
+        context.user_data.pop('series_starts', None)
+        context.user_data.pop('series_rule', None)
+        return S_START
+    except Exception as e:
+        log_error_with_context(e, update, context, "series_confirm_callback")
+        kb = [[InlineKeyboardButton("🏠 Kembali ke Menu Utama", callback_data="back_to_start")]]
+        await query.edit_message_text(
+            "❌ Terjadi kesalahan saat membuat jadwal rutin. Silakan coba lagi atau hubungi admin.",
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+        return S_START
@@ -1,12 +1,12 @@
 import logging
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from database.db import db
 from config import Config
 from utils.datetime_helper import (
     format_date_id, format_datetime_id, format_datetime_short,
-    parse_date, generate_time_slots, from_iso
+    parse_date, generate_time_slots, from_iso, now_jakarta, JAKARTA_TZ
 )
 from utils.formatters import format_confirmation_message, format_success_message
 from utils.validators import is_valid_patient_name, is_valid_address, is_valid_phone
@@ -21,18 +21,25 @@ def log_error_with_context(error: Exception, update: Update, context: ContextTyp
     username = update.effective_user.username if update.effective_user else "Unknown"
     callback_data = update.callback_query.data if update.callback_query else "No callback"
     
+    # Only the keys: user_data holds patient names and addresses, and can be large.
+    user_data_keys = sorted(context.user_data.keys()) if context.user_data else []
+    
     logger.error(
-        f"ERROR in {function_name}\n"
-        f"  User ID: {user_id} (@{username})\n"
-        f"  Callback Data: {callback_data}\n"
-        f"  User Data: {context.user_data}\n"
-        f"  Error: {str(error)}",
+        "ERROR in %s\n  User ID: %s (@%s)\n  Callback Data: %s\n  User Data keys: %s\n  Error: %s",
+        function_name, user_id, username, callback_data, user_data_keys, error,
         exc_info=True
     )
 
 (S_START, S_PAT_GENDER, S_CHOOSE_DATE, S_CHOOSE_TIME,
  S_CHOOSE_THER, S_ASK_NAME, S_ASK_ADDRESS, S_CONFIRM,
  S_WAITLIST_NAME, S_WAITLIST_PHONE) = range(10)
+# Added after the admin states (handlers/admin_states.py, 10-31).
+S_CHOOSE_TREATMENT = 32
+
+
+def _session_minutes(context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Duration of the treatment picked in this booking (older conversations: SESSION_MINUTES)."""
+    return context.user_data.get('duration_min', Config.SESSION_MINUTES)
 
 
 async def make_appointment_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -43,6 +50,7 @@ async def make_appointment_callback(update: Update, context: ContextTypes.DEFAUL
         kb = [
             [InlineKeyboardButton("👨 Laki-laki", callback_data="pat_m")],
             [InlineKeyboardButton("👩 Perempuan", callback_data="pat_f")],
+            [InlineKeyboardButton("👨‍👩‍👧 Booking Keluarga / Grup", callback_data="group_make")],
             [InlineKeyboardButton("🔙 Kembali", callback_data="back_to_start")]
         ]
         
@@ -71,21 +79,20 @@ async def show_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE, year
     """
     query = update.callback_query
     
+    today = now_jakarta().date()
     if year is None or month is None:
-        today = date.today()
         year = today.year
         month = today.month
     
     context.user_data['cal_year'] = year
     context.user_data['cal_month'] = month
     
-    today = date.today()
     max_date = today + timedelta(days=Config.MAX_DAYS_AHEAD)
     
     available_dates = set()
-    check_date = date(year, month, 1)
     import calendar
     last_day_of_month = calendar.monthrange(year, month)[1]
+    closed_dates = await db.get_month_holidays(year, month)
     
     for day in range(1, last_day_of_month + 1):
         check_date = date(year, month, day)
@@ -93,24 +100,28 @@ async def show_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE, year
         if check_date < today or check_date > max_date:
             continue
         
-        if await db.is_weekly_holiday(check_date) or await db.is_date_holiday(check_date):
+        if check_date in closed_dates:
             continue
         
-        slots = await generate_time_slots(check_date)
+        slots = await generate_time_slots(check_date, _session_minutes(context))
         if slots:
             available_dates.add(check_date)
     
-    kb, header_text = create_calendar_keyboard(year, month, available_dates, max_date)
+    kb, header_text = create_calendar_keyboard(year, month, available_dates, max_date, today)
     
     gender = context.user_data.get('patient_gender', '')
+    treatment = context.user_data.get('treatment')
+    treatment_line = f"💆 Terapi: {treatment} ({_session_minutes(context)} menit)\n" if treatment else ""
     
     msg = (
         f"📅 *PILIH TANGGAL KUNJUNGAN*\n\n"
         f"👤 Pasien: {gender}\n"
+        f"{treatment_line}"
         f"Angka = Tersedia | \\[Angka] = Penuh atau Libur | (Angka) = Lewat\n\n"
         f"{header_text}"
     )
     
+    kb.append([InlineKeyboardButton("⚡ Jadwal Tercepat", callback_data="earliest_slots")])
     kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="back_to_gender"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
     
     await query.edit_message_text(
@@ -122,6 +133,68 @@ async def show_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE, year
     return S_CHOOSE_DATE
 
 
+async def earliest_slots_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, notice: str = ""):
+    """
+    "Jadwal Tercepat": the first free (therapist, slot) pairs for the
+    patient's gender over the whole booking window, on one screen.
+    """
+    from services.earliest_slots import find_earliest_slots
+    
+    query = update.callback_query
+    await query.answer()
+    
+    gender = context.user_data.get('patient_gender', '')
+    hits = await find_earliest_slots(gender, Config.EARLIEST_SLOTS_COUNT, duration_min=_session_minutes(context))
+    
+    kb = [
+        [InlineKeyboardButton(f"🕒 {format_datetime_short(hit.start_iso)} • {hit.therapist.name}",
+                              callback_data=f"quick_{hit.therapist.id}_{hit.start_iso}")]
+        for hit in hits
+    ]
+    kb.append([InlineKeyboardButton("📅 Pilih Tanggal Sendiri", callback_data="back_to_choose_date")])
+    kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+    
+    if hits:
+        body = "Jadwal kosong paling awal, pilih salah satu:"
+    else:
+        body = f"Maaf, tidak ada jadwal kosong dalam {Config.MAX_DAYS_AHEAD} hari ke depan."
+    
+    msg = (
+        f"{notice}"
+        f"⚡ *JADWAL TERCEPAT*\n\n"
+        f"👤 Pasien: {gender}\n\n"
+        f"{body}"
+    )
+    
+    await query.edit_message_text(
+        msg,
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    
+    return S_CHOOSE_DATE
+
+
+async def quick_slot_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Book a slot picked from Jadwal Tercepat: straight to the patient name prompt."""
+    query = update.callback_query
+    
+    _, therapist_id, slot_iso = query.data.split("_", 2)
+    therapist_id = int(therapist_id)
+    
+    # The list may be stale by the time it is tapped; show a fresh one if the slot was taken.
+    if not await db.therapist_free(therapist_id, slot_iso, _session_minutes(context)):
+        return await earliest_slots_callback(
+            update, context, notice="⚠️ Jadwal tersebut baru saja terisi.\n\n"
+        )
+    
+    context.user_data['requested_date'] = from_iso(slot_iso).date().isoformat()
+    context.user_data['requested_start'] = slot_iso
+    
+    await query.answer()
+    return await _ask_patient_name(query, context, therapist_id)
+
+
 async def calendar_noop_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle no-op calendar callbacks to avoid 'query is too old' errors"""
     query = update.callback_query
@@ -156,7 +229,7 @@ async def patient_gender_callback(update: Update, context: ContextTypes.DEFAULT_
         context.user_data['patient_gender'] = gender
         
         therapists = await db.get_therapists(active_only=True)
-        gender_therapists = [t for t in therapists if t['gender'] == gender]
+        gender_therapists = [t for t in therapists if t.gender == gender]
         
         if not gender_therapists:
             kb = [
@@ -180,26 +253,58 @@ async def patient_gender_callback(update: Update, context: ContextTypes.DEFAULT_
                 reply_markup=InlineKeyboardMarkup(kb)
             )
             
-            from config import Config
-            for admin_id in Config.ADMIN_IDS:
-                try:
-                    await query.bot.send_message(
-                        chat_id=admin_id,
-                        text=f"⚠️ *PERINGATAN*\n\nUser mencoba booking terapis {gender.lower()} tapi tidak ada yang aktif.\n\nUser: {query.from_user.username or query.from_user.first_name}",
-                        parse_mode='Markdown'
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to notify admin {admin_id}: {e}")
+            # Collected into the periodic admin digest (jobs/admin_digest.py), not sent from here.
+            from services.admin_alerts import admin_alerts
+            admin_alerts.record(
+                f"no_therapist:{gender}",
+                f"User mencoba booking terapis {gender.lower()} tapi tidak ada yang aktif.",
+                query.from_user.username or query.from_user.first_name
+            )
             
             return S_PAT_GENDER
         
-        return await show_calendar(update, context)
+        from services.slot_engine import treatments
+        options = treatments()
+        if len(options) == 1:
+            context.user_data['treatment'] = None
+            context.user_data['duration_min'] = options[0].minutes
+            return await show_calendar(update, context)
+        
+        kb = [[InlineKeyboardButton(f"💆 {t.name} ({t.minutes} menit)", callback_data=f"treat_{i}")]
+              for i, t in enumerate(options)]
+        kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="back_to_gender"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
+        
+        await query.edit_message_text(
+            f"💆 *PILIH JENIS TERAPI*\n\n"
+            f"👤 Pasien: {gender}\n\n"
+            f"Durasi terapi menentukan jam yang tersedia:",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup(kb)
+        )
+        return S_CHOOSE_TREATMENT
     except Exception as e:
         log_error_with_context(e, update, context, "patient_gender_callback")
         await query.edit_message_text("❌ Terjadi kesalahan. Silakan coba lagi atau hubungi admin.")
         return S_START
 
 
+async def treatment_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from services.slot_engine import treatments
+    
+    query = update.callback_query
+    await query.answer()
+    
+    options = treatments()
+    index = int(query.data.split("_")[1])
+    if index >= len(options):
+        # A button from before TREATMENTS was changed.
+        return await back_to_gender_callback(update, context)
+    
+    context.user_data['treatment'] = options[index].name
+    context.user_data['duration_min'] = options[index].minutes
+    return await show_calendar(update, context)
+
+
 async def date_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -217,7 +322,7 @@ async def date_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     context.user_data['requested_date'] = date_obj.isoformat()
     
-    slots = await generate_time_slots(date_obj)
+    slots = await _time_choices(context, date_obj)
     if not slots:
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data="back_to_choose_date"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]]
         await query.edit_message_text(
@@ -264,6 +369,15 @@ async def date_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return S_CHOOSE_TIME
 
 
+async def _time_choices(context: ContextTypes.DEFAULT_TYPE, date_obj: date):
+    """Start times offered for the date, for the patient's gender and the picked treatment's duration."""
+    from services.slot_engine import bookable_starts
+    
+    gender = context.user_data.get('patient_gender')
+    therapist_ids = [t.id for t in await db.get_therapists(active_only=True) if t.gender == gender]
+    return await bookable_starts(therapist_ids, date_obj, _session_minutes(context))
+
+
 async def view_therapists_for_date_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -282,7 +396,7 @@ async def view_therapists_for_date_callback(update: Update, context: ContextType
     date_obj = parse_date(date_iso)
     therapists = await db.get_therapists(active_only=True)
     
-    gender_therapists = [t for t in therapists if t['gender'] == gender]
+    gender_therapists = [t for t in therapists if t.gender == gender]
     
     if not gender_therapists:
         kb = [[InlineKeyboardButton("🔙 Kembali", callback_data="back_to_choose_date")]]
@@ -294,19 +408,16 @@ async def view_therapists_for_date_callback(update: Update, context: ContextType
         )
         return S_CHOOSE_DATE
     
-    slots = await generate_time_slots(date_obj)
+    from services.slot_engine import therapist_starts
+    starts = await therapist_starts([t.id for t in gender_therapists], date_obj, _session_minutes(context))
     
     therapist_availability = {}
     for t in gender_therapists:
-        free_slots = []
-        for slot in slots:
-            is_free = await db.therapist_free(t['id'], slot, Config.SESSION_MINUTES)
-            if is_free:
-                free_slots.append(slot)
+        free_slots = starts[t.id]
         
-        therapist_availability[t['id']] = {
-            'name': t['name'],
-            'gender': t['gender'],
+        therapist_availability[t.id] = {
+            'name': t.name,
+            'gender': t.gender,
             'free_slots': free_slots,
             'earliest': free_slots[0] if free_slots else None
         }
@@ -325,7 +436,7 @@ async def view_therapists_for_date_callback(update: Update, context: ContextType
         
         if info['earliest']:
             has_availability = True
-            earliest_time = from_iso(info['earliest']).strftime("%H:%M")
+            earliest_time = datetime.fromtimestamp(info['earliest'], JAKARTA_TZ).strftime("%H:%M")
             msg += f"{gender_icon} *{info['name']}*\n"
             msg += f"   └ Tersedia dari: {earliest_time} ({len(info['free_slots'])} slot)\n\n"
         else:
@@ -371,8 +482,8 @@ async def time_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     available = []
     for therapist in therapists:
-        if therapist['gender'] == gender:
-            is_free = await db.therapist_free(therapist['id'], slot_iso, Config.SESSION_MINUTES)
+        if therapist.gender == gender:
+            is_free = await db.therapist_free(therapist.id, slot_iso, _session_minutes(context))
             if is_free:
                 available.append(therapist)
     
@@ -390,7 +501,10 @@ async def time_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return S_CHOOSE_TIME
     
-    kb = [[InlineKeyboardButton(f"✅ {t['name']}", callback_data=f"ther_{t['id']}")] for t in available]
+    if Config.AUTO_ASSIGN_THERAPIST:
+        return await _auto_assign(query, context, available)
+    
+    kb = _therapist_keyboard(available)
     kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="back_to_choose_time"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
     
     msg = (
@@ -442,8 +556,8 @@ async def show_any_or_waitlist_callback(update: Update, context: ContextTypes.DE
         available = []
         
         for therapist in therapists:
-            if therapist['gender'] == gender:
-                is_free = await db.therapist_free(therapist['id'], slot_iso, Config.SESSION_MINUTES)
+            if therapist.gender == gender:
+                is_free = await db.therapist_free(therapist.id, slot_iso, _session_minutes(context))
                 if is_free:
                     available.append(therapist)
         
@@ -455,8 +569,10 @@ async def show_any_or_waitlist_callback(update: Update, context: ContextTypes.DE
             )
             return S_START
         
-        kb = [[InlineKeyboardButton(f"✅ {t['name']}", callback_data=f"ther_{t['id']}")] 
-              for t in available]
+        if Config.AUTO_ASSIGN_THERAPIST:
+            return await _auto_assign(query, context, available)
+        
+        kb = _therapist_keyboard(available)
         kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="back_to_choose_time"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
         
         await query.edit_message_text(
@@ -471,11 +587,51 @@ async def show_any_or_waitlist_callback(update: Update, context: ContextTypes.DE
     return S_START
 
 
+def _therapist_keyboard(available):
+    """Therapist picker rows, led by an automatic pick when there is a choice to make."""
+    kb = [[InlineKeyboardButton(f"✅ {t.name}", callback_data=f"ther_{t.id}")] for t in available]
+    if len(available) > 1:
+        kb.insert(0, [InlineKeyboardButton("🤖 Pilihkan Otomatis", callback_data="ther_auto")])
+    return kb
+
+
+async def _auto_assign(query, context: ContextTypes.DEFAULT_TYPE, available):
+    """Book the free therapist whose day the session fragments least (services.assignment)."""
+    from services.assignment import pick_therapist
+    
+    therapist = await pick_therapist(available, context.user_data['requested_start'], _session_minutes(context))
+    return await _ask_patient_name(query, context, therapist.id, auto=True)
+
+
 async def therapist_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
+    if query.data == "ther_auto":
+        slot_iso = context.user_data.get('requested_start')
+        gender = context.user_data.get('patient_gender')
+        available = [
+            t for t in await db.get_therapists(active_only=True)
+            if t.gender == gender and await db.therapist_free(t.id, slot_iso, _session_minutes(context))
+        ]
+        if not available:
+            kb = [
+                [InlineKeyboardButton("🔙 Pilih waktu lain", callback_data="back_to_choose_time")],
+                [InlineKeyboardButton("🏠 Kembali ke Menu Utama", callback_data="back_to_start")]
+            ]
+            await query.edit_message_text(
+                f"Maaf, tidak ada terapis {gender.lower()} kosong pada {format_datetime_short(slot_iso)}.",
+                reply_markup=InlineKeyboardMarkup(kb)
+            )
+            return S_CHOOSE_THER
+        return await _auto_assign(query, context, available)
+    
     therapist_id = int(query.data.split("_")[1])
+    return await _ask_patient_name(query, context, therapist_id)
+
+
+async def _ask_patient_name(query, context: ContextTypes.DEFAULT_TYPE, therapist_id: int, auto: bool = False):
+    """Remember the chosen therapist and prompt for the patient's name."""
     context.user_data['therapist_id'] = therapist_id
     
     therapist = await db.get_therapist(therapist_id)
@@ -487,7 +643,7 @@ async def therapist_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return S_START
     
-    context.user_data['therapist_name'] = therapist['name']
+    context.user_data['therapist_name'] = therapist.name
     
     time_str = format_datetime_short(context.user_data.get('requested_start', ''))
     
@@ -498,7 +654,7 @@ async def therapist_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     msg = (
         f"✏️ *MASUKKAN NAMA PASIEN*\n\n"
-        f"Terapis: {therapist['name']}\n"
+        f"Terapis: {therapist.name}{' (dipilih otomatis)' if auto else ''}\n"
         f"Waktu: {time_str}\n\n"
         f"Silakan ketik nama lengkap pasien:\n\n"
         f"_Atau klik tombol di bawah untuk kembali_"
@@ -551,28 +707,46 @@ async def patient_address_text(update: Update, context: ContextTypes.DEFAULT_TYP
     
     context.user_data['patient_address'] = address
     
+    msg, kb = _confirmation_view(context)
+    await update.message.reply_text(
+        msg,
+        parse_mode='MarkdownV2',
+        reply_markup=InlineKeyboardMarkup(kb)
+    )
+    
+    return S_CONFIRM
+
+
+def _confirmation_view(context: ContextTypes.DEFAULT_TYPE):
+    """Booking summary and buttons of the confirmation screen."""
     name = context.user_data.get('patient_name', '?')
     gender = context.user_data.get('patient_gender', '?')
     time_iso = context.user_data.get('requested_start', '?')
     therapist_name = context.user_data.get('therapist_name', '?')
+    address = context.user_data.get('patient_address', '')
     
     datetime_str = format_datetime_id(time_iso)
     
     msg = format_confirmation_message(
-        name, gender, therapist_name, datetime_str, Config.SESSION_MINUTES, address
+        name, gender, therapist_name, datetime_str, _session_minutes(context), address
     )
     
     kb = [
         [InlineKeyboardButton("✅ Ya, Konfirmasi Booking", callback_data="confirm_yes")],
+        [InlineKeyboardButton("🔁 Jadikan Jadwal Rutin", callback_data="series_menu")],
         [InlineKeyboardButton("✏️ Edit Data", callback_data="back_to_address")],
         [InlineKeyboardButton("❌ Batalkan", callback_data="confirm_no"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
     ]
+    return msg, kb
+
+
+async def back_to_confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle back to the booking confirmation screen"""
+    query = update.callback_query
+    await query.answer()
     
-    await update.message.reply_text(
-        msg,
-        parse_mode='MarkdownV2',
-        reply_markup=InlineKeyboardMarkup(kb)
-    )
+    msg, kb = _confirmation_view(context)
+    await query.edit_message_text(msg, parse_mode='MarkdownV2', reply_markup=InlineKeyboardMarkup(kb))
     
     return S_CONFIRM
 
@@ -606,8 +780,16 @@ async def confirmation_callback(update: Update, context: ContextTypes.DEFAULT_TY
         try:
             appt_id = await db.add_appointment(
                 user_id, patient_name, patient_gender,
-                therapist_id, start_iso, Config.SESSION_MINUTES, patient_address
+                therapist_id, start_iso, _session_minutes(context), patient_address
             )
+            if appt_id is None:
+                kb = [[InlineKeyboardButton("⏰ Pilih Waktu Lain", callback_data="back_to_choose_time")],
+                      [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]]
+                await query.edit_message_text(
+                    f"⚠️ {therapist_name} baru saja terisi pada waktu tersebut, janji belum dibuat. Silakan pilih waktu lain.",
+                    reply_markup=InlineKeyboardMarkup(kb)
+                )
+                return S_CHOOSE_TIME
             
             schedule_reminder = context.application.bot_data.get('schedule_reminder')
             if schedule_reminder:
@@ -620,7 +802,7 @@ async def confirmation_callback(update: Update, context: ContextTypes.DEFAULT_TY
             
             datetime_str = format_datetime_id(start_iso)
             success_msg = format_success_message(
-                patient_name, therapist_name, datetime_str, Config.SESSION_MINUTES, patient_address
+                patient_name, therapist_name, datetime_str, _session_minutes(context), patient_address
             )
             
             kb = [
@@ -634,7 +816,8 @@ async def confirmation_callback(update: Update, context: ContextTypes.DEFAULT_TY
                 reply_markup=InlineKeyboardMarkup(kb)
             )
             
-            logger.info(f"Booking created - User: {user_id} (@{update.effective_user.username}), Patient: {patient_name}, Therapist: {therapist_name}, Time: {start_iso}")
+            logger.info("Booking created - User: %s (@%s), Patient: %s, Therapist: %s, Time: %s",
+                        user_id, update.effective_user.username, patient_name, therapist_name, start_iso)
             
         except Exception as e:
             log_error_with_context(e, update, context, "confirmation_callback - database operation")
@@ -656,9 +839,10 @@ async def my_appointments_callback(update: Update, context: ContextTypes.DEFAULT
     await query.answer()
     
     user_id = update.effective_user.id
-    appointments = await db.get_user_appointments(user_id, limit=20)
+    sections = await db.get_user_appointment_sections(user_id, upcoming_limit=5, past_limit=5)
+    upcoming, past = sections.upcoming, sections.past
     
-    if not appointments:
+    if not upcoming and not past:
         kb = [
             [InlineKeyboardButton("🩺 Buat Janji Baru", callback_data="make")],
             [InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]
@@ -678,37 +862,32 @@ async def my_appointments_callback(update: Update, context: ContextTypes.DEFAULT
         )
         return S_START
     
-    from utils.datetime_helper import now_jakarta
-    now = now_jakarta()
-    upcoming = [a for a in appointments if a['status'] == 'confirmed' and from_iso(a['start_dt']) > now]
-    past = [a for a in appointments if a not in upcoming]
-    
     msg = "📋 *JANJI SAYA*\n" + "━" * 17 + "\n\n"
     
     if upcoming:
         msg += "🔜 *Janji Mendatang:*\n\n"
-        for appt in upcoming[:5]:
-            datetime_str = format_datetime_short(appt['start_dt'])
+        for appt in upcoming:
+            datetime_str = format_datetime_short(appt.start)
             status_icon = "✅"
             msg += f"{status_icon} {datetime_str}\n"
-            msg += f"   👨‍⚕️ {appt['therapist_name']}\n"
-            msg += f"   👤 {appt['user_name']}\n\n"
+            msg += f"   👨‍⚕️ {appt.therapist_name}\n"
+            msg += f"   👤 {appt.user_name}\n\n"
     
     if past:
         msg += "📅 *Riwayat Janji:*\n\n"
-        for appt in past[:5]:
-            datetime_str = format_datetime_short(appt['start_dt'])
-            status_icon = "✅" if appt['status'] == 'confirmed' else "✔️" if appt['status'] == 'completed' else "❌"
-            msg += f"{status_icon} {datetime_str} - {appt['therapist_name']}\n"
+        for appt in past:
+            datetime_str = format_datetime_short(appt.start)
+            status_icon = "✅" if appt.status == 'confirmed' else "✔️" if appt.status == 'completed' else "❌"
+            msg += f"{status_icon} {datetime_str} - {appt.therapist_name}\n"
     
-    if len(appointments) > 10:
-        msg += f"\n_...dan {len(appointments) - 10} janji lainnya_"
+    if sections.hidden > 0:
+        msg += f"\n_...dan {sections.hidden} janji lainnya_"
     
     kb = []
     
     for appt in upcoming[:3]:
-        datetime_str = format_datetime_short(appt['start_dt'])
-        kb.append([InlineKeyboardButton(f"📝 {datetime_str} - {appt['therapist_name']}", callback_data=f"view_my_appt_{appt['id']}")])
+        datetime_str = format_datetime_short(appt.start)
+        kb.append([InlineKeyboardButton(f"📝 {datetime_str} - {appt.therapist_name}", callback_data=f"view_my_appt_{appt.id}")])
     
     kb.append([InlineKeyboardButton("🩺 Buat Janji Baru", callback_data="make")])
     kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
@@ -729,7 +908,7 @@ async def view_my_appointment_callback(update: Update, context: ContextTypes.DEF
     appointment_id = int(query.data.split("_")[-1])
     appt = await db.get_appointment_by_id(appointment_id)
     
-    if not appt or appt['user_id'] != update.effective_user.id:
+    if not appt or appt.user_id != update.effective_user.id:
         kb = [[InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")]]
         await query.edit_message_text(
             "❌ Janji tidak ditemukan atau Anda tidak memiliki akses.",
@@ -737,25 +916,25 @@ async def view_my_appointment_callback(update: Update, context: ContextTypes.DEF
         )
         return S_START
     
-    datetime_str = format_datetime_id(appt['start_dt'])
-    status_emoji = "✅" if appt['status'] == 'confirmed' else "✔️" if appt['status'] == 'completed' else "❌"
+    datetime_str = format_datetime_id(appt.start)
+    status_emoji = "✅" if appt.status == 'confirmed' else "✔️" if appt.status == 'completed' else "❌"
     
     msg = (
         "📋 *DETAIL JANJI*\n"
         + "━" * 17 + "\n\n"
-        f"👤 *Nama:* {appt['user_name']}\n"
-        f"⚧ *Jenis Kelamin:* {appt['patient_gender']}\n"
-        f"📍 *Alamat:* {appt['patient_address']}\n"
-        f"👨‍⚕️ *Terapis:* {appt['therapist_name']}\n"
+        f"👤 *Nama:* {appt.user_name}\n"
+        f"⚧ *Jenis Kelamin:* {appt.patient_gender}\n"
+        f"📍 *Alamat:* {appt.patient_address}\n"
+        f"👨‍⚕️ *Terapis:* {appt.therapist_name}\n"
         f"🕒 *Waktu:* {datetime_str}\n"
-        f"⏱ *Durasi:* {appt['duration_min']} menit\n"
-        f"📊 *Status:* {status_emoji} {appt['status']}"
+        f"⏱ *Durasi:* {appt.duration_min} menit\n"
+        f"📊 *Status:* {status_emoji} {appt.status}"
     )
     
     kb = []
     
-    if appt['status'] == 'confirmed':
-        kb.append([InlineKeyboardButton("❌ Batalkan Janji", callback_data=f"cancel_my_appt_{appt['id']}")])
+    if appt.status == 'confirmed':
+        kb.append([InlineKeyboardButton("❌ Batalkan Janji", callback_data=f"cancel_my_appt_{appt.id}")])
     
     kb.append([InlineKeyboardButton("🔙 Lihat Semua Janji", callback_data="my_appointments")])
     kb.append([InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
@@ -778,7 +957,7 @@ async def cancel_my_appointment_callback(update: Update, context: ContextTypes.D
     try:
         appt = await db.get_appointment_by_id(appointment_id)
         
-        if not appt or appt['user_id'] != update.effective_user.id:
+        if not appt or appt.user_id != update.effective_user.id:
             logger.warning(f"Cancel attempt - appointment {appointment_id} not found or unauthorized by user {update.effective_user.id}")
             kb = [
                 [InlineKeyboardButton("📋 Lihat Janji Saya", callback_data="my_appointments")],
@@ -790,7 +969,7 @@ async def cancel_my_appointment_callback(update: Update, context: ContextTypes.D
             )
             return S_START
         
-        logger.info(f"User {update.effective_user.id} initiating cancel for appointment {appointment_id}")
+        logger.info("User %s initiating cancel for appointment %s", update.effective_user.id, appointment_id)
         
         cancelled_appt = await db.cancel_appointment(appointment_id)
         
@@ -809,11 +988,11 @@ async def cancel_my_appointment_callback(update: Update, context: ContextTypes.D
         try:
             if context.application and context.application.bot_data:
                 cancel_reminder = context.application.bot_data.get('cancel_reminder')
-                if cancel_reminder and appt.get('reminder_job_id'):
-                    cancel_reminder(appt['reminder_job_id'])
-                    logger.info(f"Cancelled reminder job {appt['reminder_job_id']} for appointment {appointment_id}")
+                if cancel_reminder and appt.reminder_job_id:
+                    cancel_reminder(appt.reminder_job_id)
+                    logger.info("Cancelled reminder job %s for appointment %s", appt.reminder_job_id, appointment_id)
                 else:
-                    logger.debug(f"No reminder job to cancel for appointment {appointment_id}")
+                    logger.debug("No reminder job to cancel for appointment %s", appointment_id)
             else:
                 logger.warning("context.application or bot_data not available for reminder cancellation")
         except Exception as e:
@@ -831,14 +1010,14 @@ async def cancel_my_appointment_callback(update: Update, context: ContextTypes.D
             reply_markup=InlineKeyboardMarkup(kb)
         )
         
-        logger.info(f"Appointment {appointment_id} successfully cancelled by user {update.effective_user.id}")
+        logger.info("Appointment %s successfully cancelled by user %s", appointment_id, update.effective_user.id)
         
         try:
             from utils.waitlist_notify import notify_waitlist_for_slot
             
             if context.application:
                 await notify_waitlist_for_slot(context.application, cancelled_appt)
-                logger.info(f"Waitlist notification triggered for cancelled appointment {appointment_id}")
+                logger.info("Waitlist notification triggered for cancelled appointment %s", appointment_id)
             else:
                 logger.warning("context.application not available for waitlist notification")
         except Exception as e:
@@ -867,6 +1046,7 @@ async def back_to_gender_callback(update: Update, context: ContextTypes.DEFAULT_
     kb = [
         [InlineKeyboardButton("👨 Laki-laki", callback_data="pat_m")],
         [InlineKeyboardButton("👩 Perempuan", callback_data="pat_f")],
+        [InlineKeyboardButton("👨‍👩‍👧 Booking Keluarga / Grup", callback_data="group_make")],
         [InlineKeyboardButton("🏠 Kembali ke Menu Utama", callback_data="back_to_start")]
     ]
     
@@ -902,7 +1082,7 @@ async def back_to_choose_time_callback(update: Update, context: ContextTypes.DEF
     date_obj = parse_date(date_iso)
     gender = context.user_data.get('patient_gender', '')
     
-    slots = await generate_time_slots(date_obj)
+    slots = await _time_choices(context, date_obj)
     kb = []
     row = []
     
@@ -955,8 +1135,8 @@ async def back_to_choose_therapist_callback(update: Update, context: ContextType
     
     available = []
     for therapist in therapists:
-        if therapist['gender'] == gender:
-            is_free = await db.therapist_free(therapist['id'], slot_iso, Config.SESSION_MINUTES)
+        if therapist.gender == gender:
+            is_free = await db.therapist_free(therapist.id, slot_iso, _session_minutes(context))
             if is_free:
                 available.append(therapist)
     
@@ -971,7 +1151,7 @@ async def back_to_choose_therapist_callback(update: Update, context: ContextType
         )
         return S_CHOOSE_TIME
     
-    kb = [[InlineKeyboardButton(f"✅ {t['name']}", callback_data=f"ther_{t['id']}")] for t in available]
+    kb = _therapist_keyboard(available)
     kb.append([InlineKeyboardButton("🔙 Kembali", callback_data="back_to_choose_time"), InlineKeyboardButton("🏠 Menu Utama", callback_data="back_to_start")])
     
     msg = (
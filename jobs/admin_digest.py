@@ -0,0 +1,66 @@
+import logging
+from datetime import datetime
+from typing import List
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from config import Config
+from database.db import db
+from services.admin_alerts import Alert, admin_alerts
+from utils.datetime_helper import JAKARTA_TZ
+
+logger = logging.getLogger(__name__)
+
+# Alerts listed in one digest; Telegram messages are capped at 4096 characters.
+MAX_LINES = 20
+
+
+def _clock(ts: float) -> str:
+    return datetime.fromtimestamp(ts, JAKARTA_TZ).strftime("%H:%M")
+
+
+def format_digest(alerts: List[Alert]) -> str:
+    lines = []
+    for alert in alerts[:MAX_LINES]:
+        line = f"• {alert.text}"
+        if alert.count > 1:
+            line += f" ({alert.count}x, {_clock(alert.first_seen)}-{_clock(alert.last_seen)})"
+        else:
+            line += f" ({_clock(alert.first_seen)})"
+        if alert.subjects:
+            others = alert.count - len(alert.subjects)
+            line += f"\n  User: {', '.join(alert.subjects)}" + (f" dan {others} lainnya" if others > 0 else "")
+        lines.append(line)
+    if len(alerts) > MAX_LINES:
+        lines.append(f"...dan {len(alerts) - MAX_LINES} peringatan lainnya")
+    return "⚠️ RINGKASAN PERINGATAN\n\n" + "\n".join(lines)
+
+
+async def send_admin_digest() -> int:
+    """
+    Queue one digest of the pending admin alerts to every admin in
+    ADMIN_IDS through the notification outbox (rate-limited and retried
+    like patient notifications). Returns the number of alerts sent.
+    """
+    alerts = admin_alerts.drain(Config.ADMIN_ALERT_DEDUP_SECONDS)
+    if not alerts or not Config.ADMIN_IDS:
+        return 0
+    try:
+        text = format_digest(alerts)
+        await db.enqueue_notifications("admin_digest", [(admin_id, text) for admin_id in Config.ADMIN_IDS])
+        logger.info(f"Admin digest queued: {len(alerts)} alerts, {sum(a.count for a in alerts)} events")
+    except Exception as e:
+        logger.error(f"Error queueing admin digest ({len(alerts)} alerts dropped): {e}")
+        return 0
+    return len(alerts)
+
+
+def setup_admin_digest(scheduler: AsyncIOScheduler):
+    """Send the admin alert digest every ADMIN_DIGEST_SECONDS."""
+    scheduler.add_job(
+        send_admin_digest,
+        'interval',
+        seconds=Config.ADMIN_DIGEST_SECONDS,
+        id='admin_digest',
+        replace_existing=True,
+        max_instances=1
+    )
+    logger.info(f"Admin alert digest configured: every {Config.ADMIN_DIGEST_SECONDS}s")
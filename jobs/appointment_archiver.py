@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from datetime import timedelta
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from config import Config
+from database.db import db
+from services.coordination import leader_only
+from utils.datetime_helper import now_jakarta, JAKARTA_TZ
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_old_appointments():
+    """
+    Move appointments older than ARCHIVE_AFTER_DAYS into appointments_archive,
+    ARCHIVE_BATCH_SIZE rows per transaction, yielding to the event loop
+    between batches so updates keep flowing during a large first run.
+    """
+    cutoff = (now_jakarta() - timedelta(days=Config.ARCHIVE_AFTER_DAYS)).isoformat()
+    total = 0
+    try:
+        while True:
+            moved = await db.archive_appointments(cutoff, Config.ARCHIVE_BATCH_SIZE)
+            if not moved:
+                break
+            total += moved
+            await asyncio.sleep(0)
+        logger.info(f"Appointment archiver moved {total} appointments older than {cutoff}")
+    except Exception as e:
+        logger.error(f"Error archiving appointments (moved {total} before the error): {e}")
+    return total
+
+
+def setup_appointment_archiver(scheduler: AsyncIOScheduler):
+    """Archive old appointments daily at 02:30 WIB (disabled when ARCHIVE_AFTER_DAYS=0)."""
+    if not Config.ARCHIVE_AFTER_DAYS:
+        logger.info("Appointment archiver disabled (ARCHIVE_AFTER_DAYS=0)")
+        return
+
+    scheduler.add_job(
+        leader_only(archive_old_appointments),
+        'cron',
+        hour=2,
+        minute=30,
+        timezone=JAKARTA_TZ,
+        id='appointment_archiver',
+        replace_existing=True,
+        misfire_grace_time=3600,
+        max_instances=1
+    )
+    logger.info(f"Appointment archiver configured: Daily at 02:30 WIB, after {Config.ARCHIVE_AFTER_DAYS} days")
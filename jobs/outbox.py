@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from datetime import timedelta
+from telegram.error import Forbidden, RetryAfter
+from telegram.ext import Application
+from config import Config
+from database.db import db
+from utils.datetime_helper import now_jakarta
+
+logger = logging.getLogger(__name__)
+
+# A notification that failed this many times is left in the table and no longer retried.
+MAX_ATTEMPTS = 5
+
+
+async def dispatch_outbox(app: Application):
+    """
+    Send queued patient notifications (notification_outbox) in claimed
+    batches of OUTBOX_BATCH_SIZE, at most OUTBOX_RATE_PER_SECOND messages
+    per second from this process, so a leave affecting many bookings does
+    not run into Telegram's flood limits. A RetryAfter from Telegram puts
+    the rest of the batch back and ends the run; the next run resumes.
+    """
+    from services.coordination import coordinator
+
+    worker_id = coordinator.worker_id
+    interval = 1 / Config.OUTBOX_RATE_PER_SECOND
+    try:
+        while True:
+            batch = await db.claim_notifications(worker_id, Config.OUTBOX_BATCH_SIZE, MAX_ATTEMPTS)
+            if not batch:
+                return
+
+            sent, failed = [], []
+            throttled = False
+            try:
+                for item in batch:
+                    try:
+                        await app.bot.send_message(chat_id=item.chat_id, text=item.message)
+                        sent.append(item.id)
+                    except Forbidden as e:
+                        # The user blocked the bot; retrying will not help.
+                        sent.append(item.id)
+                        logger.warning(f"Notification {item.id} ({item.kind}) not delivered, user {item.chat_id} blocked the bot: {e}")
+                    except RetryAfter as e:
+                        logger.warning(f"Flood control while sending notifications, retrying in {e.retry_after}s")
+                        throttled = True
+                        break
+                    except Exception as e:
+                        failed.append(item.id)
+                        logger.error(f"Error sending notification {item.id} ({item.kind}) to user {item.chat_id}: {e}")
+                    await asyncio.sleep(interval)
+            finally:
+                # Also on shutdown mid-batch: record what went out and hand the rest back unpenalised.
+                done = set(sent) | set(failed)
+                await db.mark_notifications_sent(sent, worker_id)
+                await db.release_notifications(failed, worker_id)
+                await db.release_notifications([item.id for item in batch if item.id not in done], worker_id, failed=False)
+
+            logger.info("Outbox batch: %s sent, %s failed", len(sent), len(failed))
+            # Failed sends were released; leave them for the next run instead of spinning on them.
+            if throttled or failed or len(batch) < Config.OUTBOX_BATCH_SIZE:
+                return
+    except Exception as e:
+        logger.error(f"Error dispatching notification outbox: {e}")
+
+
+async def release_stale_outbox_claims():
+    cutoff = now_jakarta() - timedelta(seconds=Config.REMINDER_CLAIM_TIMEOUT_SECONDS)
+    try:
+        released = await db.release_stale_notification_claims(cutoff.isoformat())
+        if released:
+            logger.warning(f"Released {released} stale notification claims")
+    except Exception as e:
+        logger.error(f"Error releasing stale notification claims: {e}")
@@ -3,6 +3,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from utils.prayer_times import prefetch_prayer_times_bulk
 from utils.datetime_helper import JAKARTA_TZ
 from config import Config
+from services.coordination import leader_only
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +27,7 @@ def setup_prayer_prefetch_scheduler(scheduler: AsyncIOScheduler):
     Runs at 00:00 WIB every day.
     """
     scheduler.add_job(
-        prayer_times_prefetch_job,
+        leader_only(prayer_times_prefetch_job),
         'cron',
         hour=0,
         minute=0,
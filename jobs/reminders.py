@@ -1,6 +1,8 @@
 import logging
 from datetime import datetime, timedelta
+from telegram.error import Forbidden
 from telegram.ext import Application
+from config import Config
 from database.db import db
 from utils.datetime_helper import from_iso, now_jakarta, format_datetime_id, is_same_day
 from utils.formatters import format_reminder_message
@@ -8,24 +10,91 @@ from utils.formatters import format_reminder_message
 logger = logging.getLogger(__name__)
 
 
-async def send_single_reminder(app: Application, appt_id: int, user_id: int, patient_name: str, 
+async def send_single_reminder(app: Application, appt_id: int, user_id: int, patient_name: str,
                                therapist_name: str, start_dt_iso: str):
+    from services.coordination import coordinator
+
+    worker_id = coordinator.worker_id
+    try:
+        if not await db.claim_reminder(appt_id, worker_id, start_dt_iso):
+            logger.debug("Reminder for appointment %s already sent, claimed or no longer valid", appt_id)
+            return
+    except Exception as e:
+        logger.error(f"Error claiming reminder for appointment {appt_id}: {e}")
+        return
+
+    await _deliver_reminder(app, worker_id, appt_id, user_id, patient_name, therapist_name, start_dt_iso)
+
+
+async def _deliver_reminder(app: Application, worker_id: str, appt_id: int, user_id: int, patient_name: str,
+                            therapist_name: str, start_dt_iso: str) -> bool:
+    """Send a reminder whose row this worker has claimed; returns False if the claim was released for a retry."""
     try:
         appt_dt = from_iso(start_dt_iso)
         now = now_jakarta()
         datetime_str = format_datetime_id(start_dt_iso)
-        
+
         is_today = is_same_day(now, appt_dt)
-        
+
         message = format_reminder_message(patient_name, therapist_name, datetime_str, is_today)
-        
+
         await app.bot.send_message(
             chat_id=user_id,
             text=message,
             parse_mode='Markdown'
         )
-        
-        logger.info(f"Reminder sent to user {user_id} for appointment {appt_id} (is_today={is_today})")
-        
+
+        await db.mark_reminder_sent(appt_id, worker_id)
+        logger.info("Reminder sent to user %s for appointment %s (is_today=%s)", user_id, appt_id, is_today)
+        return True
+
+    except Forbidden as e:
+        # The user blocked the bot; retrying will not help.
+        await db.mark_reminder_sent(appt_id, worker_id)
+        logger.warning(f"Reminder for appointment {appt_id} not delivered, user {user_id} blocked the bot: {e}")
+        return True
     except Exception as e:
         logger.error(f"Error sending reminder to user {user_id} for appointment {appt_id}: {e}")
+        try:
+            await db.release_reminder_claim(appt_id, worker_id)
+        except Exception as release_error:
+            logger.error(f"Error releasing reminder claim for appointment {appt_id}: {release_error}")
+        return False
+
+
+async def dispatch_due_reminders(app: Application):
+    """
+    Safety net behind the per-booking reminder jobs: sends reminders that are
+    due but were never sent (booked on another process, lost on restart, or
+    released after a failure). Runs on every process; rows are claimed in
+    batches so each reminder goes out once.
+    """
+    from services.coordination import coordinator
+
+    worker_id = coordinator.worker_id
+    due_before = (now_jakarta() + timedelta(minutes=Config.REMINDER_MINUTES_BEFORE)).isoformat()
+    try:
+        while True:
+            batch = await db.claim_due_reminders(worker_id, due_before, Config.REMINDER_BATCH_SIZE)
+            if not batch:
+                return
+
+            logger.info("Dispatching %s due reminders from worker %s", len(batch), worker_id)
+            delivered = 0
+            for appt in batch:
+                reminder_time = appt.start - timedelta(minutes=Config.REMINDER_MINUTES_BEFORE)
+                if from_iso(appt.created_at) > reminder_time:
+                    # Booked inside the reminder window; schedule_reminder skips these too.
+                    await db.mark_reminder_sent(appt.id, worker_id)
+                    delivered += 1
+                    continue
+                delivered += await _deliver_reminder(
+                    app, worker_id, appt.id, appt.user_id, appt.user_name,
+                    appt.therapist_name or "-", appt.start_dt
+                )
+
+            # Failed sends were released; leave them for the next run instead of spinning on them.
+            if len(batch) < Config.REMINDER_BATCH_SIZE or delivered < len(batch):
+                return
+    except Exception as e:
+        logger.error(f"Error dispatching due reminders: {e}")
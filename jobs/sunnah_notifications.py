@@ -2,10 +2,12 @@ import logging
 from datetime import datetime, time
 from telegram.ext import Application
 from database.db import db
-from utils.hijri_helper import get_next_sunnah_dates, format_sunnah_notification
 from utils.datetime_helper import now_jakarta, JAKARTA_TZ
+from services.coordination import leader_only
 
 logger = logging.getLogger(__name__)
+# Per-recipient lines go to a child logger so they can be sampled (LOG_SAMPLE_RATES).
+recipient_logger = logging.getLogger(f"{__name__}.recipients")
 
 
 async def send_sunnah_notification(app: Application):
@@ -13,6 +15,8 @@ async def send_sunnah_notification(app: Application):
     Mengirim notifikasi tanggal bekam sunnah ke semua user yang pernah booking.
     Job ini dijadwalkan untuk berjalan setiap hari jam 09:00 WIB.
     """
+    from utils.hijri_helper import get_next_sunnah_dates, format_sunnah_notification
+    
     try:
         logger.info("Starting sunnah notification job...")
         
@@ -30,15 +34,15 @@ async def send_sunnah_notification(app: Application):
             logger.info(f"Not sending notification today. Next sunnah date in {days_until} days")
             return
         
-        appointments = await db.get_appointments()
+        appointments = await db.get_appointments(include_archive=True)
         
         unique_users = {}
         for appt in appointments:
-            user_id = appt['user_id']
+            user_id = appt.user_id
             if user_id not in unique_users:
                 unique_users[user_id] = {
                     'user_id': user_id,
-                    'user_name': appt['user_name']
+                    'user_name': appt.user_name
                 }
         
         if not unique_users:
@@ -58,7 +62,7 @@ async def send_sunnah_notification(app: Application):
                     parse_mode='Markdown'
                 )
                 success_count += 1
-                logger.info(f"Sent sunnah notification to user {user_info['user_id']} ({user_info['user_name']})")
+                recipient_logger.info("Sent sunnah notification to user %s (%s)", user_info['user_id'], user_info['user_name'])
             except Exception as e:
                 error_count += 1
                 logger.error(f"Failed to send sunnah notification to user {user_info['user_id']}: {e}")
@@ -77,7 +81,7 @@ def schedule_sunnah_notifications(scheduler, app: Application):
     """
     try:
         scheduler.add_job(
-            send_sunnah_notification,
+            leader_only(send_sunnah_notification),
             'cron',
             hour=9,
             minute=0,
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
+import asyncio
 import logging
-import sys
+import signal
+import time
 from datetime import timedelta
+from typing import List, Tuple
+from urllib.parse import urlsplit
+from telegram import Update
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, CallbackQueryHandler,
-    ConversationHandler, PicklePersistence, filters
+    ConversationHandler, PicklePersistence, TypeHandler, filters
 )
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from config import Config
@@ -16,32 +21,27 @@ from handlers.user import (
     therapist_callback, patient_name_text, patient_address_text, confirmation_callback,
     my_appointments_callback, view_my_appointment_callback, cancel_my_appointment_callback,
     back_to_gender_callback, back_to_choose_date_callback, back_to_choose_time_callback,
-    back_to_choose_therapist_callback, back_to_name_callback, back_to_address_callback,
-    calendar_nav_callback, calendar_noop_callback,
+    back_to_choose_therapist_callback, back_to_name_callback, back_to_address_callback, back_to_confirm_callback,
+    calendar_nav_callback, calendar_noop_callback, earliest_slots_callback, quick_slot_callback,
+    treatment_callback,
     waitlist_name_text, waitlist_phone_text, waitlist_confirm_callback,
     S_PAT_GENDER, S_CHOOSE_DATE, S_CHOOSE_TIME,
     S_CHOOSE_THER, S_ASK_NAME, S_ASK_ADDRESS, S_CONFIRM,
-    S_WAITLIST_NAME, S_WAITLIST_PHONE
+    S_WAITLIST_NAME, S_WAITLIST_PHONE, S_CHOOSE_TREATMENT
 )
-from handlers.admin import (
-    admin_menu_callback, admin_therapists_callback, add_therapist_callback,
-    add_therapist_name_text, add_therapist_gender_callback, delete_therapist_callback,
-    delete_therapist_confirm_callback, admin_appointments_callback,
-    delete_appointment_callback, delete_appointment_confirm_callback,
-    admin_waitlist_callback, admin_holidays_callback, add_holiday_date_callback,
-    add_holiday_date_text, admin_export_callback,
-    view_appointment_callback, manage_appointment_callback, appt_page_nav_callback,
-    change_status_menu_callback, change_status_confirm_callback, edit_appt_menu_callback,
-    edit_field_select_callback, edit_therapist_confirm_callback, edit_appt_value_text,
-    view_waitlist_entry_callback, confirm_slot_available_callback,
-    inform_waitlist_full_callback, delete_waitlist_entry_callback,
-    therapist_detail_callback, toggle_therapist_callback, edit_therapist_name_callback,
-    edit_therapist_name_text, edit_therapist_gender_callback, set_therapist_gender_callback,
-    add_holiday_date_selected_callback, holiday_calendar_nav_callback, holiday_calendar_noop_callback,
-    schedule_inactive_callback, schedule_inactive_duration_callback, schedule_inactive_custom_callback,
-    schedule_inactive_custom_days_text, cancel_inactive_schedule_callback,
+from handlers.group_booking import (
+    group_start_callback, group_member_callback, group_done_callback, group_calendar_nav_callback,
+    group_date_callback, group_back_date_callback, group_time_callback, group_names_text,
+    group_address_text, group_confirm_callback,
+    S_GROUP_MEMBERS, S_GROUP_DATE, S_GROUP_TIME, S_GROUP_NAMES, S_GROUP_ADDRESS, S_GROUP_CONFIRM
+)
+from handlers.recurring import (
+    series_menu_callback, series_rule_callback, series_count_callback, series_confirm_callback,
+    S_SERIES_RULE, S_SERIES_COUNT, S_SERIES_CONFIRM
+)
+from handlers.admin_states import (
     A_MENU, A_ADD_TH_NAME, A_ADD_TH_GENDER, A_DELETE_TH_SELECT,
-    A_DELETE_APPT, A_HOLIDAY_MENU, A_ADD_HOL_DATE, A_VIEW_APPT, A_MANAGE_APPT,
+    A_DELETE_APPT, A_HOLIDAY_MENU, A_ADD_HOL_DATE, A_ADD_HOL_WEEKLY, A_VIEW_APPT, A_MANAGE_APPT,
     A_EDIT_APPT_FIELD, A_EDIT_APPT_VALUE, A_WAITLIST_MANAGE,
     A_TH_DETAIL, A_EDIT_TH_NAME, A_EDIT_TH_GENDER, A_SCHEDULE_INACTIVE, A_INACTIVE_CUSTOM_DAYS
 )
@@ -49,21 +49,35 @@ from jobs.reminders import send_single_reminder
 from jobs.sunnah_notifications import schedule_sunnah_notifications
 from jobs.therapist_activator import setup_therapist_activator
 from jobs.prayer_prefetch import setup_prayer_prefetch_scheduler
+from jobs.appointment_archiver import setup_appointment_archiver
+from jobs.admin_digest import send_admin_digest, setup_admin_digest
+from services.coordination import coordinator
 from utils.datetime_helper import from_iso, now_jakarta
 from utils.prayer_times import prefetch_prayer_times_bulk
+from utils.metrics import InstrumentedHTTPXRequest, instrument_handlers, metrics, start_metrics_server
+from utils.logging_setup import setup_logging, parse_sample_rates
+from utils.lazy import LazyHandlers
 
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+setup_logging(
+    log_file=Config.LOG_FILE,
+    level=Config.LOG_LEVEL,
+    max_bytes=Config.LOG_MAX_BYTES,
+    backup_count=Config.LOG_BACKUP_COUNT,
+    sample_rates=parse_sample_rates(Config.LOG_SAMPLE_RATES)
 )
 
 logger = logging.getLogger(__name__)
 
+# Admin screens are imported on first use; patients never load them.
+admin = LazyHandlers("handlers.admin")
+
 global_scheduler = None
+metrics_server = None
+prefetch_task = None
+
+# Reset by build_application(); startup phases are measured from here.
+startup_started = time.perf_counter()
+first_update_seen = False
 
 
 async def error_handler(update: object, context) -> None:
@@ -101,13 +115,28 @@ def schedule_reminder(app: Application, appt_id: int, user_id: int, patient_name
             id=job_id,
             replace_existing=True
         )
-        logger.info(f"Scheduled reminder for appointment {appt_id} at {reminder_time}")
+        logger.info("Scheduled reminder for appointment %s at %s", appt_id, reminder_time)
         return job_id
     except Exception as e:
         logger.error(f"Error scheduling reminder: {e}")
         return None
 
 
+def schedule_reminders(app: Application, reminders: List[Tuple[int, int, str, str, str]]) -> List[Tuple[int, str]]:
+    """
+    Register reminder jobs for many appointments at once (a recurring
+    series): reminders are (appt_id, user_id, patient_name, therapist_name,
+    start_dt_iso). Returns (appt_id, job_id) for the jobs that were added,
+    ready for db.set_reminder_jobs.
+    """
+    jobs = []
+    for appt_id, user_id, patient_name, therapist_name, start_dt_iso in reminders:
+        job_id = schedule_reminder(app, appt_id, user_id, patient_name, therapist_name, start_dt_iso)
+        if job_id:
+            jobs.append((appt_id, job_id))
+    return jobs
+
+
 def cancel_reminder(job_id: str):
     global global_scheduler
     
@@ -116,49 +145,89 @@ def cancel_reminder(job_id: str):
     
     try:
         global_scheduler.remove_job(job_id)
-        logger.info(f"Cancelled reminder job: {job_id}")
+        logger.info("Cancelled reminder job: %s", job_id)
     except Exception as e:
         logger.debug(f"Could not cancel reminder job {job_id}: {e}")
 
 
-async def post_init(application: Application) -> None:
-    await db.connect()
+def _observe_startup(phase: str) -> float:
+    elapsed = time.perf_counter() - startup_started
+    metrics.observe("startup", phase, elapsed)
+    return elapsed
+
+
+async def mark_first_update(update: Update, context) -> None:
+    """Group -1 hook: records time from build_application() to the first handled update, once."""
+    global first_update_seen
     
-    application.bot_data['schedule_reminder'] = schedule_reminder
-    application.bot_data['cancel_reminder'] = cancel_reminder
+    if first_update_seen:
+        return
+    first_update_seen = True
     
+    elapsed_ms = _observe_startup("first_update") * 1000
+    if elapsed_ms > Config.STARTUP_BUDGET_MS:
+        logger.warning(f"First update handled {elapsed_ms:.0f} ms after start (budget {Config.STARTUP_BUDGET_MS} ms)")
+    else:
+        logger.info(f"First update handled {elapsed_ms:.0f} ms after start")
+
+
+async def startup_prayer_prefetch():
     try:
         logger.info("Pre-fetching prayer times on bot startup...")
         success_count = await prefetch_prayer_times_bulk(days_ahead=Config.PRAYER_PREFETCH_DAYS)
         logger.info(f"Startup prayer times pre-fetch completed: {success_count} days cached")
     except Exception as e:
         logger.error(f"Error during startup prayer times pre-fetch: {e}")
+
+
+async def post_init(application: Application) -> None:
+    global metrics_server, prefetch_task
     
-    logger.info("Bot initialized successfully with persistence")
+    await db.connect()
+    _observe_startup("db_connect")
+    await db.load_schedule()
+    _observe_startup("schedule_load")
+    
+    application.bot_data['schedule_reminder'] = schedule_reminder
+    application.bot_data['schedule_reminders'] = schedule_reminders
+    application.bot_data['cancel_reminder'] = cancel_reminder
+    
+    # Cached days return immediately and missing ones fall back to a live fetch,
+    # so the first update does not wait for up to PRAYER_PREFETCH_DAYS API calls.
+    prefetch_task = asyncio.create_task(startup_prayer_prefetch(), name="startup-prayer-prefetch")
+    
+    if Config.METRICS_PORT:
+        try:
+            metrics_server = await start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT)
+        except OSError as e:
+            logger.error(f"Could not start metrics endpoint on port {Config.METRICS_PORT}: {e}")
+    
+    elapsed_ms = _observe_startup("post_init") * 1000
+    logger.info(f"Bot initialized successfully with persistence ({elapsed_ms:.0f} ms)")
 
 
 async def post_shutdown(application: Application) -> None:
+    global metrics_server, prefetch_task
+    
+    if prefetch_task:
+        prefetch_task.cancel()
+        await asyncio.gather(prefetch_task, return_exceptions=True)
+        prefetch_task = None
+    
+    if metrics_server:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+        metrics_server = None
+    
+    # Pending admin alerts go to the outbox and are sent after the next start.
+    await send_admin_digest()
+    await coordinator.release()
     await db.close()
     logger.info("Bot shutdown complete")
 
 
-def main():
-    global global_scheduler
-    
-    logger.info("Starting Bekam Booking Bot with session persistence...")
-    
-    persistence = PicklePersistence(filepath=Config.PERSISTENCE_PATH)
-    
-    application = (
-        Application.builder()
-        .token(Config.TOKEN)
-        .persistence(persistence)
-        .post_init(post_init)
-        .post_shutdown(post_shutdown)
-        .build()
-    )
-    
-    main_conv_handler = ConversationHandler(
+def build_conversation_handler() -> ConversationHandler:
+    return ConversationHandler(
         entry_points=[
             CommandHandler("start", start_cmd),
             CallbackQueryHandler(make_appointment_callback, pattern="^make$")
@@ -169,19 +238,61 @@ def main():
                 CallbackQueryHandler(my_appointments_callback, pattern="^my_appointments$"),
                 CallbackQueryHandler(view_my_appointment_callback, pattern="^view_my_appt_"),
                 CallbackQueryHandler(cancel_my_appointment_callback, pattern="^cancel_my_appt_"),
-                CallbackQueryHandler(admin_menu_callback, pattern="^admin_menu$"),
+                CallbackQueryHandler(admin.admin_menu_callback, pattern="^admin_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             S_PAT_GENDER: [
                 CallbackQueryHandler(patient_gender_callback, pattern="^pat_[mf]$"),
+                CallbackQueryHandler(group_start_callback, pattern="^group_make$"),
                 CallbackQueryHandler(back_to_gender_callback, pattern="^back_to_gender$"),
                 CallbackQueryHandler(show_any_or_waitlist_callback, pattern="^join_waitlist_no_therapist$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
+            S_CHOOSE_TREATMENT: [
+                CallbackQueryHandler(treatment_callback, pattern="^treat_\\d+$"),
+                CallbackQueryHandler(back_to_gender_callback, pattern="^back_to_gender$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_GROUP_MEMBERS: [
+                CallbackQueryHandler(group_member_callback, pattern="^(grp_add_[mf]_\\d+|grp_undo)$"),
+                CallbackQueryHandler(group_done_callback, pattern="^grp_done$"),
+                CallbackQueryHandler(make_appointment_callback, pattern="^make$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_GROUP_DATE: [
+                CallbackQueryHandler(group_date_callback, pattern="^date_"),
+                CallbackQueryHandler(group_calendar_nav_callback, pattern="^cal_(prev|next)_"),
+                CallbackQueryHandler(calendar_noop_callback, pattern="^cal_noop$"),
+                CallbackQueryHandler(group_done_callback, pattern="^grp_members$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_GROUP_TIME: [
+                CallbackQueryHandler(group_time_callback, pattern="^grp_time_\\d+$"),
+                CallbackQueryHandler(group_back_date_callback, pattern="^grp_back_date$"),
+                CallbackQueryHandler(group_date_callback, pattern="^grp_back_time$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_GROUP_NAMES: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, group_names_text),
+                CallbackQueryHandler(group_date_callback, pattern="^grp_back_time$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_GROUP_ADDRESS: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, group_address_text),
+                CallbackQueryHandler(group_date_callback, pattern="^grp_back_time$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_GROUP_CONFIRM: [
+                CallbackQueryHandler(group_confirm_callback, pattern="^grp_confirm_(yes|no)$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
             S_CHOOSE_DATE: [
                 CallbackQueryHandler(date_callback, pattern="^date_"),
                 CallbackQueryHandler(calendar_nav_callback, pattern="^cal_(prev|next)_"),
                 CallbackQueryHandler(calendar_noop_callback, pattern="^cal_noop$"),
+                CallbackQueryHandler(earliest_slots_callback, pattern="^earliest_slots$"),
+                CallbackQueryHandler(quick_slot_callback, pattern="^quick_"),
+                CallbackQueryHandler(back_to_choose_date_callback, pattern="^back_to_choose_date$"),
                 CallbackQueryHandler(back_to_gender_callback, pattern="^back_to_gender$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
@@ -210,9 +321,25 @@ def main():
             ],
             S_CONFIRM: [
                 CallbackQueryHandler(confirmation_callback, pattern="^confirm_"),
+                CallbackQueryHandler(series_menu_callback, pattern="^series_menu$"),
                 CallbackQueryHandler(back_to_address_callback, pattern="^back_to_address$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
+            S_SERIES_RULE: [
+                CallbackQueryHandler(series_rule_callback, pattern="^series_rule_"),
+                CallbackQueryHandler(back_to_confirm_callback, pattern="^back_to_confirm$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_SERIES_COUNT: [
+                CallbackQueryHandler(series_count_callback, pattern="^series_count_\\d+$"),
+                CallbackQueryHandler(series_menu_callback, pattern="^series_menu$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
+            S_SERIES_CONFIRM: [
+                CallbackQueryHandler(series_confirm_callback, pattern="^series_confirm$"),
+                CallbackQueryHandler(series_rule_callback, pattern="^series_rule_"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
+            ],
             S_WAITLIST_NAME: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, waitlist_name_text),
                 CallbackQueryHandler(back_to_choose_time_callback, pattern="^back_to_choose_time$"),
@@ -225,110 +352,120 @@ def main():
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_MENU: [
-                CallbackQueryHandler(admin_therapists_callback, pattern="^admin_therapists$"),
-                CallbackQueryHandler(add_therapist_callback, pattern="^add_therapist$"),
-                CallbackQueryHandler(delete_therapist_callback, pattern="^delete_therapist$"),
-                CallbackQueryHandler(therapist_detail_callback, pattern="^th_detail_"),
-                CallbackQueryHandler(admin_appointments_callback, pattern="^admin_appointments$"),
-                CallbackQueryHandler(view_appointment_callback, pattern="^view_appointment$"),
-                CallbackQueryHandler(delete_appointment_callback, pattern="^delete_appointment$"),
-                CallbackQueryHandler(admin_waitlist_callback, pattern="^admin_waitlist$"),
-                CallbackQueryHandler(admin_holidays_callback, pattern="^admin_holidays$"),
-                CallbackQueryHandler(admin_export_callback, pattern="^admin_export$"),
-                CallbackQueryHandler(admin_menu_callback, pattern="^admin_menu$"),
+                CallbackQueryHandler(admin.admin_therapists_callback, pattern="^admin_therapists$"),
+                CallbackQueryHandler(admin.add_therapist_callback, pattern="^add_therapist$"),
+                CallbackQueryHandler(admin.delete_therapist_callback, pattern="^delete_therapist$"),
+                CallbackQueryHandler(admin.therapist_detail_callback, pattern="^th_detail_"),
+                CallbackQueryHandler(admin.admin_appointments_callback, pattern="^admin_appointments$"),
+                CallbackQueryHandler(admin.view_appointment_callback, pattern="^view_appointment$"),
+                CallbackQueryHandler(admin.delete_appointment_callback, pattern="^delete_appointment$"),
+                CallbackQueryHandler(admin.admin_waitlist_callback, pattern="^admin_waitlist$"),
+                CallbackQueryHandler(admin.admin_holidays_callback, pattern="^admin_holidays$"),
+                CallbackQueryHandler(admin.admin_export_callback, pattern="^admin_export$"),
+                CallbackQueryHandler(admin.admin_menu_callback, pattern="^admin_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_ADD_TH_NAME: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, add_therapist_name_text)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, admin.add_therapist_name_text)
             ],
             A_ADD_TH_GENDER: [
-                CallbackQueryHandler(add_therapist_gender_callback, pattern="^gender_[mf]$"),
+                CallbackQueryHandler(admin.add_therapist_gender_callback, pattern="^gender_[mf]$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_DELETE_TH_SELECT: [
-                CallbackQueryHandler(delete_therapist_confirm_callback, pattern="^(delther_|admin_menu)"),
+                CallbackQueryHandler(admin.delete_therapist_confirm_callback, pattern="^(delther_|admin_menu)"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_TH_DETAIL: [
-                CallbackQueryHandler(toggle_therapist_callback, pattern="^toggle_th_"),
-                CallbackQueryHandler(edit_therapist_name_callback, pattern="^edit_th_name_"),
-                CallbackQueryHandler(edit_therapist_gender_callback, pattern="^edit_th_gender_"),
-                CallbackQueryHandler(schedule_inactive_callback, pattern="^schedule_inactive_"),
-                CallbackQueryHandler(cancel_inactive_schedule_callback, pattern="^cancel_inactive_"),
-                CallbackQueryHandler(delete_therapist_confirm_callback, pattern="^delther_"),
-                CallbackQueryHandler(admin_therapists_callback, pattern="^admin_therapists$"),
-                CallbackQueryHandler(therapist_detail_callback, pattern="^th_detail_"),
+                CallbackQueryHandler(admin.toggle_therapist_callback, pattern="^toggle_th_"),
+                CallbackQueryHandler(admin.edit_therapist_name_callback, pattern="^edit_th_name_"),
+                CallbackQueryHandler(admin.edit_therapist_gender_callback, pattern="^edit_th_gender_"),
+                CallbackQueryHandler(admin.schedule_inactive_callback, pattern="^schedule_inactive_"),
+                CallbackQueryHandler(admin.cancel_inactive_schedule_callback, pattern="^cancel_inactive_"),
+                CallbackQueryHandler(admin.delete_therapist_confirm_callback, pattern="^delther_"),
+                CallbackQueryHandler(admin.admin_therapists_callback, pattern="^admin_therapists$"),
+                CallbackQueryHandler(admin.therapist_detail_callback, pattern="^th_detail_"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_SCHEDULE_INACTIVE: [
-                CallbackQueryHandler(schedule_inactive_duration_callback, pattern="^inactive_dur_"),
-                CallbackQueryHandler(schedule_inactive_custom_callback, pattern="^inactive_custom_"),
-                CallbackQueryHandler(therapist_detail_callback, pattern="^th_detail_")
+                CallbackQueryHandler(admin.schedule_inactive_duration_callback, pattern="^inactive_dur_"),
+                CallbackQueryHandler(admin.schedule_inactive_custom_callback, pattern="^inactive_custom_"),
+                CallbackQueryHandler(admin.therapist_detail_callback, pattern="^th_detail_")
             ],
             A_INACTIVE_CUSTOM_DAYS: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, schedule_inactive_custom_days_text),
-                CallbackQueryHandler(therapist_detail_callback, pattern="^th_detail_")
+                MessageHandler(filters.TEXT & ~filters.COMMAND, admin.schedule_inactive_custom_days_text),
+                CallbackQueryHandler(admin.therapist_detail_callback, pattern="^th_detail_")
             ],
             A_EDIT_TH_NAME: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, edit_therapist_name_text),
-                CallbackQueryHandler(therapist_detail_callback, pattern="^th_detail_")
+                MessageHandler(filters.TEXT & ~filters.COMMAND, admin.edit_therapist_name_text),
+                CallbackQueryHandler(admin.therapist_detail_callback, pattern="^th_detail_")
             ],
             A_EDIT_TH_GENDER: [
-                CallbackQueryHandler(set_therapist_gender_callback, pattern="^set_gender_[mf]_"),
-                CallbackQueryHandler(therapist_detail_callback, pattern="^th_detail_")
+                CallbackQueryHandler(admin.set_therapist_gender_callback, pattern="^set_gender_[mf]_"),
+                CallbackQueryHandler(admin.therapist_detail_callback, pattern="^th_detail_")
             ],
             A_DELETE_APPT: [
-                CallbackQueryHandler(delete_appointment_confirm_callback, pattern="^(delappt_|admin_menu)"),
+                CallbackQueryHandler(admin.delete_appointment_confirm_callback, pattern="^(delappt_|admin_menu)"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_HOLIDAY_MENU: [
-                CallbackQueryHandler(add_holiday_date_callback, pattern="^add_holiday_date$"),
-                CallbackQueryHandler(admin_menu_callback, pattern="^admin_menu$"),
+                CallbackQueryHandler(admin.add_holiday_date_callback, pattern="^add_holiday_date$"),
+                CallbackQueryHandler(admin.add_holiday_weekly_callback, pattern="^add_holiday_weekly$"),
+                CallbackQueryHandler(admin.holiday_impact_action_callback, pattern="^hol_(move|cancel)$"),
+                CallbackQueryHandler(admin.admin_holidays_callback, pattern="^admin_holidays$"),
+                CallbackQueryHandler(admin.admin_menu_callback, pattern="^admin_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_ADD_HOL_DATE: [
-                CallbackQueryHandler(add_holiday_date_selected_callback, pattern="^date_"),
-                CallbackQueryHandler(holiday_calendar_nav_callback, pattern="^cal_(prev|next)_"),
-                CallbackQueryHandler(holiday_calendar_noop_callback, pattern="^cal_noop$"),
-                CallbackQueryHandler(admin_holidays_callback, pattern="^admin_holidays$"),
+                CallbackQueryHandler(admin.add_holiday_date_selected_callback, pattern="^date_"),
+                CallbackQueryHandler(admin.holiday_calendar_nav_callback, pattern="^cal_(prev|next)_"),
+                CallbackQueryHandler(admin.holiday_calendar_noop_callback, pattern="^cal_noop$"),
+                CallbackQueryHandler(admin.admin_holidays_callback, pattern="^admin_holidays$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$"),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, add_holiday_date_text)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, admin.add_holiday_date_text)
+            ],
+            A_ADD_HOL_WEEKLY: [
+                CallbackQueryHandler(admin.add_holiday_weekly_selected_callback, pattern="^holweekly_[0-6]$"),
+                CallbackQueryHandler(admin.admin_holidays_callback, pattern="^admin_holidays$"),
+                CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_VIEW_APPT: [
-                CallbackQueryHandler(manage_appointment_callback, pattern="^mgappt_"),
-                CallbackQueryHandler(appt_page_nav_callback, pattern="^appt_page_(next|prev)$"),
-                CallbackQueryHandler(admin_menu_callback, pattern="^admin_menu$"),
+                CallbackQueryHandler(admin.manage_appointment_callback, pattern="^mgappt_"),
+                CallbackQueryHandler(admin.appt_page_nav_callback, pattern="^appt_page_(next|prev)$"),
+                CallbackQueryHandler(admin.admin_menu_callback, pattern="^admin_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_MANAGE_APPT: [
-                CallbackQueryHandler(manage_appointment_callback, pattern="^mgappt_"),
-                CallbackQueryHandler(view_appointment_callback, pattern="^view_appointment$"),
-                CallbackQueryHandler(change_status_menu_callback, pattern="^change_status_menu$"),
-                CallbackQueryHandler(change_status_confirm_callback, pattern="^chgstatus_"),
-                CallbackQueryHandler(edit_appt_menu_callback, pattern="^edit_appt_menu$"),
-                CallbackQueryHandler(delete_appointment_confirm_callback, pattern="^delappt_"),
-                CallbackQueryHandler(admin_menu_callback, pattern="^admin_menu$"),
+                CallbackQueryHandler(admin.manage_appointment_callback, pattern="^mgappt_"),
+                CallbackQueryHandler(admin.view_appointment_callback, pattern="^view_appointment$"),
+                CallbackQueryHandler(admin.change_status_menu_callback, pattern="^change_status_menu$"),
+                CallbackQueryHandler(admin.change_status_confirm_callback, pattern="^chgstatus_"),
+                CallbackQueryHandler(admin.edit_appt_menu_callback, pattern="^edit_appt_menu$"),
+                CallbackQueryHandler(admin.delete_appointment_confirm_callback, pattern="^delappt_"),
+                CallbackQueryHandler(admin.admin_menu_callback, pattern="^admin_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_EDIT_APPT_FIELD: [
-                CallbackQueryHandler(edit_field_select_callback, pattern="^editfield_"),
-                CallbackQueryHandler(manage_appointment_callback, pattern="^mgappt_"),
-                CallbackQueryHandler(edit_appt_menu_callback, pattern="^edit_appt_menu$"),
+                CallbackQueryHandler(admin.edit_field_select_callback, pattern="^editfield_"),
+                CallbackQueryHandler(admin.manage_appointment_callback, pattern="^mgappt_"),
+                CallbackQueryHandler(admin.edit_appt_menu_callback, pattern="^edit_appt_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_EDIT_APPT_VALUE: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, edit_appt_value_text),
-                CallbackQueryHandler(edit_therapist_confirm_callback, pattern="^settherapist_"),
-                CallbackQueryHandler(edit_appt_menu_callback, pattern="^edit_appt_menu$"),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, admin.edit_appt_value_text),
+                CallbackQueryHandler(admin.edit_therapist_confirm_callback, pattern="^settherapist_"),
+                CallbackQueryHandler(admin.reschedule_alternative_callback, pattern="^resched_\\d+$"),
+                CallbackQueryHandler(admin.manage_appointment_callback, pattern="^mgappt_"),
+                CallbackQueryHandler(admin.edit_appt_menu_callback, pattern="^edit_appt_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ],
             A_WAITLIST_MANAGE: [
-                CallbackQueryHandler(view_waitlist_entry_callback, pattern="^wl_view_"),
-                CallbackQueryHandler(confirm_slot_available_callback, pattern="^wl_confirm_"),
-                CallbackQueryHandler(inform_waitlist_full_callback, pattern="^wl_inform_full_"),
-                CallbackQueryHandler(delete_waitlist_entry_callback, pattern="^wl_delete_"),
-                CallbackQueryHandler(admin_waitlist_callback, pattern="^admin_waitlist$"),
-                CallbackQueryHandler(admin_menu_callback, pattern="^admin_menu$"),
+                CallbackQueryHandler(admin.view_waitlist_entry_callback, pattern="^wl_view_"),
+                CallbackQueryHandler(admin.confirm_slot_available_callback, pattern="^wl_confirm_"),
+                CallbackQueryHandler(admin.inform_waitlist_full_callback, pattern="^wl_inform_full_"),
+                CallbackQueryHandler(admin.delete_waitlist_entry_callback, pattern="^wl_delete_"),
+                CallbackQueryHandler(admin.admin_waitlist_callback, pattern="^admin_waitlist$"),
+                CallbackQueryHandler(admin.admin_menu_callback, pattern="^admin_menu$"),
                 CallbackQueryHandler(back_to_start_callback, pattern="^back_to_start$")
             ]
         },
@@ -343,11 +480,46 @@ def main():
         persistent=True,
         allow_reentry=True
     )
+
+
+def build_application(base_url: str = None, persistence_path: str = Config.PERSISTENCE_PATH) -> Application:
+    """
+    Build the bot Application with every handler registered.
+    base_url lets a local Bot API stand-in replace api.telegram.org (load tests).
+    """
+    global startup_started, first_update_seen
+    
+    startup_started = time.perf_counter()
+    first_update_seen = False
+    
+    builder = Application.builder().token(Config.TOKEN)
+    
+    if base_url:
+        builder = builder.base_url(base_url)
+    
+    if persistence_path:
+        builder = builder.persistence(PicklePersistence(filepath=persistence_path))
+    
+    application = (
+        builder
+        .request(InstrumentedHTTPXRequest(connection_pool_size=256))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
-    application.add_handler(main_conv_handler)
+    application.add_handler(TypeHandler(Update, mark_first_update), group=-1)
+    application.add_handler(instrument_handlers(build_conversation_handler()))
+    application.add_handler(instrument_handlers(CommandHandler("stats", admin.stats_cmd)))
     
     application.add_error_handler(error_handler)
     
+    return application
+
+
+def start_scheduler(application: Application) -> AsyncIOScheduler:
+    global global_scheduler
+    
     global_scheduler = AsyncIOScheduler()
     global_scheduler.start()
     logger.info("Dynamic reminder scheduler started")
@@ -361,6 +533,82 @@ def main():
     setup_prayer_prefetch_scheduler(global_scheduler)
     logger.info("Prayer times pre-fetch scheduler configured")
     
+    setup_appointment_archiver(global_scheduler)
+    
+    setup_admin_digest(global_scheduler)
+    
+    coordinator.setup(global_scheduler, application)
+    
+    return global_scheduler
+
+
+async def run_webhook(application: Application) -> None:
+    """
+    Serve updates from Telegram webhooks instead of long polling.
+    Shutdown order on SIGINT/SIGTERM: stop accepting, drain queued updates,
+    then stop the application (which flushes persistence).
+    """
+    from services.webhook import WebhookServer
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+    
+    # Application.initialize() does not run post_init/post_shutdown; only run_polling does.
+    await application.initialize()
+    await post_init(application)
+    start_scheduler(application)
+    await application.start()
+    
+    server = WebhookServer(
+        application,
+        host=Config.WEBHOOK_LISTEN,
+        port=Config.WEBHOOK_PORT,
+        path=urlsplit(Config.WEBHOOK_URL).path or "/",
+        secret_token=Config.WEBHOOK_SECRET,
+        queue_size=Config.WEBHOOK_QUEUE_SIZE,
+        workers=Config.WEBHOOK_WORKERS
+    )
+    await server.start()
+    
+    try:
+        await application.bot.set_webhook(
+            url=Config.WEBHOOK_URL,
+            secret_token=Config.WEBHOOK_SECRET,
+            allowed_updates=["message", "callback_query"],
+            max_connections=min(100, max(1, Config.WEBHOOK_WORKERS * 10))
+        )
+        logger.info(f"Webhook registered: {Config.WEBHOOK_URL}")
+        
+        logger.info("Bot is running in webhook mode. Press Ctrl+C to stop.")
+        await stop_event.wait()
+    finally:
+        logger.info("Shutting down webhook mode...")
+        await server.stop(drain_timeout=Config.WEBHOOK_DRAIN_SECONDS)
+        if global_scheduler:
+            global_scheduler.shutdown(wait=False)
+        await application.stop()
+        await post_shutdown(application)
+        await application.shutdown()
+
+
+def main():
+    # Validated here rather than on import so tools and benchmarks can import config freely.
+    Config.validate()
+    logger.info("Starting Bekam Booking Bot with session persistence...")
+    
+    application = build_application()
+    
+    if Config.WEBHOOK_URL:
+        asyncio.run(run_webhook(application))
+        return
+    
+    start_scheduler(application)
+    
     logger.info("Bot is running with session persistence. Press Ctrl+C to stop.")
     application.run_polling(allowed_updates=["message", "callback_query"])
 
@@ -0,0 +1,59 @@
+import time
+from typing import Dict, List, Optional
+
+
+class Alert:
+    """One pending admin alert: its text, how often it fired and when, and a few of the users behind it."""
+
+    __slots__ = ("text", "count", "first_seen", "last_seen", "subjects")
+
+    def __init__(self, text: str, now: float):
+        self.text = text
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.subjects: List[str] = []
+
+
+class AdminAlerts:
+    """
+    Admin alerts waiting for the next digest, per process. record() only
+    touches a dict, so handlers call it on the patient's request path
+    without awaiting anything, and identical alerts (same key) fold into one
+    entry with a count. jobs/admin_digest.py drains it every
+    ADMIN_DIGEST_SECONDS; an alert that already went out is held back until
+    its dedup window has passed and then reported with everything counted
+    meanwhile.
+    """
+
+    MAX_SUBJECTS = 5
+
+    def __init__(self):
+        self._pending: Dict[str, Alert] = {}
+        # key -> when it was last drained, for the dedup window.
+        self._last_sent: Dict[str, float] = {}
+
+    def record(self, key: str, text: str, subject: Optional[str] = None, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        alert = self._pending.get(key)
+        if alert is None:
+            alert = self._pending[key] = Alert(text, now)
+        alert.count += 1
+        alert.last_seen = now
+        if subject and subject not in alert.subjects and len(alert.subjects) < self.MAX_SUBJECTS:
+            alert.subjects.append(subject)
+
+    def drain(self, dedup_seconds: float, now: Optional[float] = None) -> List[Alert]:
+        """Take the alerts due for a digest (not sent within dedup_seconds), oldest first."""
+        now = time.time() if now is None else now
+        self._last_sent = {key: sent for key, sent in self._last_sent.items() if now - sent < dedup_seconds}
+        due = [key for key in self._pending if key not in self._last_sent]
+        for key in due:
+            self._last_sent[key] = now
+        return sorted((self._pending.pop(key) for key in due), key=lambda alert: alert.first_seen)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+admin_alerts = AdminAlerts()
@@ -0,0 +1,52 @@
+from typing import Optional, Sequence, Tuple
+
+from database.db import db
+from services.slot_engine import open_day, treatments
+from utils.datetime_helper import from_iso
+
+
+def assignment_score(start: int, end: int, window: Tuple[int, int], before: Optional[int],
+                     after: Optional[int], day_load: int, min_session: int) -> Tuple[int, int, int]:
+    """
+    How much a session [start, end) would hurt a therapist's day; lower is
+    better. Compared in order:
+
+    - stranded seconds: a gap left before or after the session (up to the
+      neighbouring appointment or the window's edge) that is too short for
+      even the shortest treatment can never be booked again;
+    - the day's booked seconds, so bookings spread across therapists;
+    - minus the sides where the session touches its neighbours, so days
+      fill from the edges of gaps and keep the rest in one piece.
+    """
+    opens, closes = window
+    gap_before = start - max(opens, before if before is not None else opens)
+    gap_after = min(closes, after if after is not None else closes) - end
+    gaps = (max(gap_before, 0), max(gap_after, 0))
+    stranded = sum(gap for gap in gaps if 0 < gap < min_session)
+    touching = sum(1 for gap in gaps if gap == 0)
+    return stranded, day_load, -touching
+
+
+async def pick_therapist(therapists: Sequence, start_iso: str, duration_min: int):
+    """
+    The therapist (among `therapists`, all free for the session) whose day
+    the booking fragments least, by assignment_score; ties go to the one
+    listed first. Each candidate costs two bisects and a dict lookup in the
+    schedule store.
+    """
+    if len(therapists) < 2:
+        return therapists[0] if therapists else None
+    start_dt = from_iso(start_iso)
+    start = int(start_dt.timestamp())
+    end = start + duration_min * 60
+    day = await open_day(start_dt.date(), duration_min)
+    window = next(((o, c) for o, c in day.windows if o <= start < c), (start, end))
+    min_session = min(t.minutes for t in treatments()) * 60
+    neighbours = await db.get_slot_neighbours([t.id for t in therapists], start_iso, duration_min)
+
+    def key(item: Tuple[int, object]) -> Tuple[int, int, int, int]:
+        order, therapist = item
+        before, after, day_load = neighbours[therapist.id]
+        return assignment_score(start, end, window, before, after, day_load, min_session) + (order,)
+
+    return min(enumerate(therapists), key=key)[1]
@@ -0,0 +1,163 @@
+import functools
+import logging
+import os
+import socket
+from datetime import timedelta
+from typing import Optional
+
+from config import Config
+from database.db import db
+from utils.datetime_helper import now_jakarta
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE = "scheduler_leader"
+
+
+class Coordinator:
+    """
+    Lets several bot processes share one SQLite database.
+
+    - Cron jobs (sunnah notifications, therapist activator, prayer prefetch,
+      stale-claim sweeper) run only on the leader: the process holding the
+      `scheduler_leader` lease row. The lease is renewed every heartbeat and
+      expires after LEADER_LEASE_SECONDS, so another process takes over when
+      the leader dies. Every leader term gets a higher fencing token, and a
+      job re-checks its token against the database right before running, so a
+      paused ex-leader cannot run a job after being replaced.
+    - Reminders are claimed per appointment row (UPDATE ... WHERE
+      reminder_claimed_by IS NULL), so any number of processes can send them
+      without duplicates.
+    """
+
+    def __init__(self, worker_id: str = "", lease_seconds: int = 30, heartbeat_seconds: int = 10):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.fencing_token: Optional[int] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.fencing_token is not None
+
+    async def heartbeat(self):
+        try:
+            token = await db.acquire_lease(LEADER_LEASE, self.worker_id, self.lease_seconds)
+        except Exception as e:
+            # Could not renew: behave as a follower until the next heartbeat succeeds.
+            logger.error(f"Leader heartbeat failed for {self.worker_id}: {e}")
+            token = None
+
+        if token is not None and token != self.fencing_token:
+            logger.info(f"Worker {self.worker_id} is now scheduler leader (fencing token {token})")
+        elif token is None and self.fencing_token is not None:
+            logger.warning(f"Worker {self.worker_id} lost scheduler leadership")
+        self.fencing_token = token
+
+        # Holiday edits made by another process only reach this one's cache via a reload.
+        db.holidays.invalidate()
+        try:
+            await db.sync_schedule()
+        except Exception as e:
+            logger.error(f"Schedule store sync failed: {e}")
+            db.schedule.invalidate()
+
+    async def fence(self) -> Optional[int]:
+        """The current fencing token if this process is still the leader per the database, else None."""
+        token = self.fencing_token
+        if token is None:
+            return None
+        if not await db.check_lease(LEADER_LEASE, self.worker_id, token):
+            logger.warning(f"Worker {self.worker_id} lease (token {token}) is no longer valid")
+            self.fencing_token = None
+            return None
+        return token
+
+    async def release(self):
+        if self.fencing_token is not None:
+            try:
+                await db.release_lease(LEADER_LEASE, self.worker_id)
+                logger.info(f"Worker {self.worker_id} released scheduler leadership")
+            except Exception as e:
+                logger.error(f"Error releasing leader lease: {e}")
+            self.fencing_token = None
+
+    def setup(self, scheduler, app):
+        """Register heartbeat, reminder and outbox dispatch and the leader-only claim sweepers on the scheduler."""
+        from jobs.reminders import dispatch_due_reminders
+        from jobs.outbox import dispatch_outbox, release_stale_outbox_claims
+
+        now = now_jakarta()
+        scheduler.add_job(
+            self.heartbeat,
+            'interval',
+            seconds=self.heartbeat_seconds,
+            id='leader_heartbeat',
+            replace_existing=True,
+            next_run_time=now,
+            max_instances=1
+        )
+        scheduler.add_job(
+            dispatch_due_reminders,
+            'interval',
+            seconds=Config.REMINDER_SWEEP_SECONDS,
+            args=[app],
+            id='reminder_dispatch',
+            replace_existing=True,
+            next_run_time=now + timedelta(seconds=5),
+            max_instances=1
+        )
+        scheduler.add_job(
+            leader_only(release_stale_reminder_claims),
+            'interval',
+            seconds=Config.REMINDER_SWEEP_SECONDS,
+            id='reminder_claim_sweeper',
+            replace_existing=True,
+            max_instances=1
+        )
+        scheduler.add_job(
+            dispatch_outbox,
+            'interval',
+            seconds=Config.OUTBOX_SWEEP_SECONDS,
+            args=[app],
+            id='outbox_dispatch',
+            replace_existing=True,
+            next_run_time=now + timedelta(seconds=5),
+            max_instances=1
+        )
+        scheduler.add_job(
+            leader_only(release_stale_outbox_claims),
+            'interval',
+            seconds=Config.REMINDER_SWEEP_SECONDS,
+            id='outbox_claim_sweeper',
+            replace_existing=True,
+            max_instances=1
+        )
+        logger.info(f"Coordination configured for worker {self.worker_id}")
+
+
+def leader_only(job):
+    """Wrap a scheduler job so it only runs on the current, fenced leader."""
+
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        token = await coordinator.fence()
+        if token is None:
+            logger.debug(f"Skipping {job.__name__}: not the scheduler leader")
+            return None
+        return await job(*args, **kwargs)
+
+    return wrapper
+
+
+async def release_stale_reminder_claims():
+    cutoff = now_jakarta() - timedelta(seconds=Config.REMINDER_CLAIM_TIMEOUT_SECONDS)
+    try:
+        released = await db.release_stale_reminder_claims(cutoff.isoformat())
+        if released:
+            logger.warning(f"Released {released} stale reminder claims")
+    except Exception as e:
+        logger.error(f"Error releasing stale reminder claims: {e}")
+
+
+coordinator = Coordinator(Config.WORKER_ID, Config.LEADER_LEASE_SECONDS, Config.LEADER_HEARTBEAT_SECONDS)
@@ -0,0 +1,183 @@
+import heapq
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from config import Config
+from database.db import db
+from services.slot_engine import OpenDay, open_day
+from utils.datetime_helper import JAKARTA_TZ, now_jakarta
+
+
+class EarliestSlot:
+    """One search hit: a free slot (ISO start) and the therapist free at it."""
+
+    __slots__ = ("start_iso", "therapist")
+
+    def __init__(self, start_iso: str, therapist):
+        self.start_iso = start_iso
+        self.therapist = therapist
+
+
+def free_intervals(busy: Iterable[Tuple[int, int]], window_start: int, window_end: int) -> List[Tuple[int, int]]:
+    """Complement of the (possibly overlapping) busy intervals within [window_start, window_end), sorted."""
+    free = []
+    cursor = window_start
+    for start, end in sorted(busy):
+        if start > cursor:
+            free.append((cursor, min(start, window_end)))
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return [(start, end) for start, end in free if start < end]
+
+
+class _SlotGrid:
+    """
+    The open days from `first_day` for one session length (slot_engine
+    OpenDay: opening windows, grid starts, prayer blocks). Days are built on
+    first use and shared by every therapist, so a search that stops early
+    never builds the later days.
+    """
+
+    def __init__(self, first_day: date, days: int, duration_min: int):
+        self.first_day = first_day
+        self.days = days
+        self.duration_min = duration_min
+        # JAKARTA_TZ is a fixed offset, so every day is 86400 seconds long.
+        first = int(datetime.combine(first_day, time(), tzinfo=JAKARTA_TZ).timestamp())
+        self.day_start_ts = list(range(first, first + (days + 1) * 86400, 86400))
+        self._days: List[Optional[OpenDay]] = [None] * days
+
+    async def day(self, index: int) -> OpenDay:
+        if self._days[index] is None:
+            day = self.first_day + timedelta(days=index)
+            if await db.is_weekly_holiday(day) or await db.is_date_holiday(day):
+                self._days[index] = OpenDay(day, self.duration_min, closed=True)
+            else:
+                self._days[index] = await open_day(day, self.duration_min)
+        return self._days[index]
+
+
+class _FreeTime:
+    """
+    Per-therapist free intervals from `start` to `end`, built from the
+    schedule store in chunks that double in length (1, 2, 4, ... days) as
+    the search moves forward: a search answered today looks at one day of
+    appointments, not the whole booking window.
+    """
+
+    def __init__(self, therapists, start: int, end: int):
+        self.loaded_until = start
+        self.end = end
+        self.span = 24 * 3600
+        self.free = {t.id: [] for t in therapists}
+
+    @property
+    def complete(self) -> bool:
+        return self.loaded_until >= self.end
+
+    async def load_until(self, until: int):
+        until = min(until, self.end)
+        while self.loaded_until < until:
+            chunk_start = self.loaded_until
+            chunk_end = min(max(until, chunk_start + self.span), self.end)
+            busy = await db.get_busy_intervals(list(self.free), _iso(chunk_start), _iso(chunk_end))
+            for therapist_id, free in self.free.items():
+                chunk = free_intervals(busy[therapist_id], chunk_start, chunk_end)
+                if chunk and free and free[-1][1] == chunk[0][0]:
+                    free[-1] = (free[-1][0], chunk.pop(0)[1])
+                free.extend(chunk)
+            self.loaded_until = chunk_end
+            self.span *= 2
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, JAKARTA_TZ).isoformat()
+
+
+class _TherapistCursor:
+    """A therapist's position in the day list and in their free-interval list."""
+
+    __slots__ = ("therapist", "free", "gap", "day", "starts", "slot")
+
+    def __init__(self, therapist, free: List[Tuple[int, int]]):
+        self.therapist = therapist
+        self.free = free
+        self.gap = 0
+        self.day = 0
+        self.starts: List[int] = []
+        self.slot = 0
+
+    async def next_free(self, grid: _SlotGrid, free_time: _FreeTime, duration: int) -> Optional[Tuple[int, str]]:
+        """
+        The next start that fits entirely inside a free interval. Each day's
+        starts come from one gap-fitting pass (OpenDay.fit) over the
+        therapist's free intervals, and days only move forward, so the
+        pointer into `free` only advances.
+        """
+        free = self.free
+        while self.day < grid.days:
+            if self.slot < len(self.starts):
+                start = self.starts[self.slot]
+                self.slot += 1
+                return start, _iso(start)
+            # Every start of the day (and a session running past midnight) must be loaded before checking it.
+            await free_time.load_until(grid.day_start_ts[self.day + 1] + duration)
+            if self.gap == len(free):
+                if free_time.complete:
+                    return None
+            elif grid.day_start_ts[self.day + 1] > free[self.gap][0]:
+                # Days before the next free interval are skipped without building them.
+                day = await grid.day(self.day)
+                self.starts, self.gap = day.fit(free, self.gap)
+                self.slot = 0
+            self.day += 1
+        if self.slot < len(self.starts):
+            start = self.starts[self.slot]
+            self.slot += 1
+            return start, _iso(start)
+        return None
+
+
+async def find_earliest_slots(gender: str, limit: int, days_ahead: int = None,
+                              duration_min: int = None) -> List[EarliestSlot]:
+    """
+    The first `limit` free (therapist, start) pairs for therapists of `gender`
+    and a session of `duration_min` (SESSION_MINUTES), from now up to
+    `days_ahead` (MAX_DAYS_AHEAD) days ahead, soonest first; ties go to the
+    therapist listed first.
+
+    Busy time (confirmed appointments and a scheduled leave, from the
+    schedule store) is turned into per-therapist free-interval lists, only as
+    far ahead as the search gets. Each therapist yields its free
+    starts in time order and a heap merges them, so the search ends at the
+    `limit`-th hit instead of checking every day and therapist.
+    """
+    days_ahead = Config.MAX_DAYS_AHEAD if days_ahead is None else days_ahead
+    now = now_jakarta()
+    duration_min = duration_min or Config.SESSION_MINUTES
+    grid = _SlotGrid(now.date(), days_ahead + 1, duration_min)
+    window_start = int(now.timestamp())
+    window_end = grid.day_start_ts[-1]
+
+    therapists = [t for t in await db.get_therapists(active_only=True) if t.gender == gender]
+    free_time = _FreeTime(therapists, window_start, window_end)
+
+    duration = duration_min * 60
+    heap = []
+    for order, therapist in enumerate(therapists):
+        cursor = _TherapistCursor(therapist, free_time.free[therapist.id])
+        hit = await cursor.next_free(grid, free_time, duration)
+        if hit:
+            heapq.heappush(heap, (hit[0], order, hit[1], cursor))
+
+    results = []
+    while heap and len(results) < limit:
+        _, order, start_iso, cursor = heapq.heappop(heap)
+        results.append(EarliestSlot(start_iso, cursor.therapist))
+        hit = await cursor.next_free(grid, free_time, duration)
+        if hit:
+            heapq.heappush(heap, (hit[0], order, hit[1], cursor))
+    return results
@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from database.db import db
+from services.slot_engine import therapist_starts
+
+
+class GroupMember:
+    """One patient of a group booking: gender and treatment length."""
+
+    __slots__ = ("gender", "minutes", "treatment")
+
+    def __init__(self, gender: str, minutes: int, treatment: Optional[str] = None):
+        self.gender = gender
+        self.minutes = minutes
+        self.treatment = treatment
+
+
+def perfect_matching(candidates: Sequence[Sequence[int]]) -> Optional[List[int]]:
+    """
+    One distinct therapist per patient, `candidates[i]` being the therapists
+    patient i can take (augmenting paths, Kuhn's algorithm); None when no
+    assignment covers every patient. Candidates are tried in the order given.
+    """
+    owner: Dict[int, int] = {}
+
+    def augment(patient: int, seen: Set[int]) -> bool:
+        for therapist_id in candidates[patient]:
+            if therapist_id in seen:
+                continue
+            seen.add(therapist_id)
+            if therapist_id not in owner or augment(owner[therapist_id], seen):
+                owner[therapist_id] = patient
+                return True
+        return False
+
+    for patient in range(len(candidates)):
+        if not augment(patient, set()):
+            return None
+    assignment = [0] * len(candidates)
+    for therapist_id, patient in owner.items():
+        assignment[patient] = therapist_id
+    return assignment
+
+
+async def find_group_starts(members: Sequence[GroupMember], date_obj: date,
+                            therapists: Sequence = None) -> List[Tuple[int, List[int]]]:
+    """
+    Every start (Unix seconds) on a date where all `members` can begin at
+    once, each with their own gender-matched therapist free for their
+    treatment, with one such assignment (a therapist id per member).
+
+    The day is searched as a whole: one gap-fitting pass per therapist and
+    treatment length gives each therapist's feasible starts, the starts
+    every member can use somewhere are intersected, and only those get the
+    matching over the (member x therapist) free matrix.
+    """
+    if therapists is None:
+        therapists = await db.get_therapists(active_only=True)
+    genders = {member.gender for member in members}
+    therapists = [t for t in therapists if t.gender in genders]
+    ids = [t.id for t in therapists]
+
+    # (gender, minutes) -> {therapist_id: set of feasible starts}
+    free: Dict[Tuple[str, int], Dict[int, Set[int]]] = {}
+    for minutes in {member.minutes for member in members}:
+        starts = await therapist_starts(ids, date_obj, minutes)
+        for t in therapists:
+            free.setdefault((t.gender, minutes), {})[t.id] = set(starts[t.id])
+
+    candidates: Optional[Set[int]] = None
+    for key in {(member.gender, member.minutes) for member in members}:
+        usable = set().union(*free.get(key, {}).values())
+        candidates = usable if candidates is None else candidates & usable
+        if not candidates:
+            return []
+
+    results = []
+    for start in sorted(candidates):
+        matrix = [
+            [therapist_id for therapist_id, starts in free[(member.gender, member.minutes)].items() if start in starts]
+            for member in members
+        ]
+        assignment = perfect_matching(matrix)
+        if assignment:
+            results.append((start, assignment))
+    return results
@@ -0,0 +1,97 @@
+import calendar
+from datetime import date
+from typing import Iterable, List, Set
+
+
+class HolidayCalendar:
+    """
+    In-memory view of the holiday_weekly and holiday_dates tables.
+    Weekly closures are kept as a 7-bit weekday mask (bit 0 = Senin) and
+    dated holidays as a bitset indexed by day offset from the earliest
+    stored holiday, so per-day and per-month checks never touch the database.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.weekday_mask = 0
+        self._base = 0
+        self._bits = 0
+
+    def load(self, weekdays: Iterable[int], dates: Iterable[date]):
+        mask = 0
+        for weekday in weekdays:
+            mask |= 1 << weekday
+
+        ordinals = [d.toordinal() for d in dates]
+        base = min(ordinals) if ordinals else 0
+        bits = 0
+        for ordinal in ordinals:
+            bits |= 1 << (ordinal - base)
+
+        self.weekday_mask = mask
+        self._base = base
+        self._bits = bits
+        self.loaded = True
+
+    def invalidate(self):
+        self.loaded = False
+
+    def is_weekly_holiday(self, date_obj: date) -> bool:
+        return bool(self.weekday_mask >> date_obj.weekday() & 1)
+
+    def is_date_holiday(self, date_obj: date) -> bool:
+        offset = date_obj.toordinal() - self._base
+        return offset >= 0 and bool(self._bits >> offset & 1)
+
+    def is_holiday(self, date_obj: date) -> bool:
+        return self.is_weekly_holiday(date_obj) or self.is_date_holiday(date_obj)
+
+    def _month_date_bits(self, year: int, month: int) -> int:
+        days_in_month = calendar.monthrange(year, month)[1]
+        offset = date(year, month, 1).toordinal() - self._base
+        if offset >= 0:
+            bits = self._bits >> offset
+        else:
+            bits = self._bits << -offset
+        return bits & ((1 << days_in_month) - 1)
+
+    def _month_weekly_bits(self, year: int, month: int) -> int:
+        if not self.weekday_mask:
+            return 0
+        first_weekday, days_in_month = calendar.monthrange(year, month)
+        bits = 0
+        for i in range(days_in_month):
+            if self.weekday_mask >> ((first_weekday + i) % 7) & 1:
+                bits |= 1 << i
+        return bits
+
+    @staticmethod
+    def _bits_to_dates(year: int, month: int, bits: int) -> Set[date]:
+        result = set()
+        day = 1
+        while bits:
+            if bits & 1:
+                result.add(date(year, month, day))
+            bits >>= 1
+            day += 1
+        return result
+
+    def month_date_holidays(self, year: int, month: int) -> Set[date]:
+        """Dated holidays only (used by the admin holiday calendar)."""
+        return self._bits_to_dates(year, month, self._month_date_bits(year, month))
+
+    def month_holidays(self, year: int, month: int) -> Set[date]:
+        """All closed days in a month, weekly and dated."""
+        bits = self._month_date_bits(year, month) | self._month_weekly_bits(year, month)
+        return self._bits_to_dates(year, month, bits)
+
+    def holiday_dates(self) -> List[date]:
+        result = []
+        bits = self._bits
+        ordinal = self._base
+        while bits:
+            if bits & 1:
+                result.append(date.fromordinal(ordinal))
+            bits >>= 1
+            ordinal += 1
+        return result
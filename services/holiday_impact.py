@@ -0,0 +1,142 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database.db import db
+from services.assignment import pick_therapist
+from services.slot_engine import open_day
+from utils.datetime_helper import JAKARTA_TZ, format_date_id, format_datetime_id, now_jakarta
+
+logger = logging.getLogger(__name__)
+
+# How many days after a holiday a booking may be moved to.
+SEARCH_DAYS = 14
+
+
+class HolidayImpact:
+    """What was done to the bookings on a new holiday: moved (appointment, therapist, new start) and left in place."""
+
+    __slots__ = ("moved", "unmoved")
+
+    def __init__(self, moved: list, unmoved: list):
+        self.moved = moved
+        self.unmoved = unmoved
+
+    @property
+    def affected(self) -> int:
+        return len(self.moved) + len(self.unmoved)
+
+
+async def affected_appointments(kind: str, value) -> list:
+    """
+    Upcoming confirmed appointments on a holiday, `kind` being 'date' (value
+    an ISO date) or 'weekly' (value a weekday, 0 = Monday). One indexed
+    start_dt range query either way: the day itself, or everything from now
+    on filtered to the weekday.
+    """
+    now = now_jakarta()
+    if kind == "date":
+        day_start = datetime.combine(date.fromisoformat(value), time(), tzinfo=JAKARTA_TZ)
+        return await db.get_confirmed_appointments_between(
+            max(day_start, now).isoformat(), (day_start + timedelta(days=1)).isoformat()
+        )
+    appointments = await db.get_confirmed_appointments_between(now.isoformat())
+    return [appt for appt in appointments if appt.start.astimezone(JAKARTA_TZ).weekday() == int(value)]
+
+
+async def _next_open_slot(appt, therapists, planned: Dict[int, List[Tuple[int, int]]]):
+    """
+    The first day after the appointment's with the same time of day open
+    and free: its own therapist if they can, otherwise the gender-matched
+    therapist that fragments the day least. (therapist, start_iso) or (None, None).
+    """
+    local = appt.start.astimezone(JAKARTA_TZ)
+    candidates = [t for t in therapists if t.gender == appt.patient_gender]
+    candidates.sort(key=lambda t: t.id != appt.therapist_id)
+    for offset in range(1, SEARCH_DAYS + 1):
+        day = local.date() + timedelta(days=offset)
+        if await db.is_weekly_holiday(day) or await db.is_date_holiday(day):
+            continue
+        start_dt = datetime.combine(day, local.timetz())
+        start = int(start_dt.timestamp())
+        end = start + appt.duration_min * 60
+        if not (await open_day(day, appt.duration_min)).accepts(start):
+            continue
+
+        matrix = await db.get_availability_matrix([t.id for t in candidates], [(start_dt.isoformat(), appt.duration_min)])
+        free = [
+            t for t in candidates
+            if matrix[t.id][0] and not any(s < end and start < e for s, e in planned.get(t.id, ()))
+        ]
+        if not free:
+            continue
+        choice = free[0] if free[0].id == appt.therapist_id else await pick_therapist(free, start_dt.isoformat(), appt.duration_min)
+        planned.setdefault(choice.id, []).append((start, end))
+        return choice, start_dt.isoformat()
+    return None, None
+
+
+async def plan_moves(appointments) -> list:
+    """(appointment, therapist, new start_iso) for each appointment; (appointment, None, None) when nothing is free."""
+    therapists = await db.get_therapists(active_only=True)
+    planned: Dict[int, List[Tuple[int, int]]] = {}
+    plan = []
+    for appt in appointments:
+        plan.append((appt, *await _next_open_slot(appt, therapists, planned)))
+    return plan
+
+
+async def move_for_holiday(appointments, schedule_reminder: Optional[Callable] = None, app=None) -> HolidayImpact:
+    """
+    Move every appointment to the next open day at the same time, in one
+    transaction; re-register the moved ones' reminders for their new time
+    and queue a message to each patient in the notification outbox.
+    Appointments nothing was found for stay where they are.
+    """
+    plan = await plan_moves(appointments)
+    moved_ids = set(await db.move_appointments(
+        [(appt.id, therapist.id, start_iso) for appt, therapist, start_iso in plan if therapist]
+    ))
+    moved = [(appt, therapist, start_iso) for appt, therapist, start_iso in plan if appt.id in moved_ids]
+    unmoved = [appt for appt, _, _ in plan if appt.id not in moved_ids]
+
+    if schedule_reminder and app:
+        reminders = []
+        for appt, therapist, start_iso in moved:
+            job_id = schedule_reminder(app, appt.id, appt.user_id, appt.user_name, therapist.name, start_iso)
+            if job_id:
+                reminders.append((appt.id, job_id))
+        await db.set_reminder_jobs(reminders)
+
+    await db.enqueue_notifications("holiday", [
+        (appt.user_id,
+         f"📅 Jadwal janji dipindah\n\n"
+         f"Klinik libur pada {format_date_id(appt.start.astimezone(JAKARTA_TZ).date(), include_year=True)}. "
+         f"Janji {appt.user_name} dipindah ke {format_datetime_id(start_iso)} dengan {therapist.name}. "
+         f"Jika waktu baru tidak cocok, batalkan lewat menu 📋 Janji Saya lalu buat janji baru.")
+        for appt, therapist, start_iso in moved
+    ])
+    logger.info("Holiday moves: %s appointments, %s moved, %s left in place", len(appointments), len(moved), len(unmoved))
+    return HolidayImpact(moved, unmoved)
+
+
+async def cancel_for_holiday(appointments, cancel_reminder: Optional[Callable] = None) -> list:
+    """Cancel the appointments in one statement, drop their reminder jobs and queue a message to each patient."""
+    cancelled_ids = set(await db.cancel_appointments([appt.id for appt in appointments]))
+    cancelled = [appt for appt in appointments if appt.id in cancelled_ids]
+
+    if cancel_reminder:
+        for appt in cancelled:
+            if appt.reminder_job_id:
+                cancel_reminder(appt.reminder_job_id)
+
+    await db.enqueue_notifications("holiday", [
+        (appt.user_id,
+         f"❌ Janji dibatalkan\n\n"
+         f"Klinik libur pada {format_date_id(appt.start.astimezone(JAKARTA_TZ).date(), include_year=True)}, "
+         f"sehingga janji {appt.user_name} pada {format_datetime_id(appt.start_dt)} dibatalkan. "
+         f"Mohon maaf atas ketidaknyamanannya; silakan buat janji baru lewat menu 🩺 Buat Janji Baru.")
+        for appt in cancelled
+    ])
+    logger.info("Holiday cancellations: %s of %s appointments cancelled", len(cancelled), len(appointments))
+    return cancelled
@@ -0,0 +1,99 @@
+import logging
+from typing import Callable, Dict, List, Optional
+
+from database.db import db
+from services.assignment import pick_therapist
+from utils.datetime_helper import format_datetime_id
+
+logger = logging.getLogger(__name__)
+
+
+class LeaveImpact:
+    """What a therapist's leave did to their bookings: appointments moved to whom, and those nobody could take."""
+
+    __slots__ = ("therapist", "reassigned", "unassigned")
+
+    def __init__(self, therapist, reassigned: list, unassigned: list):
+        self.therapist = therapist
+        self.reassigned = reassigned
+        self.unassigned = unassigned
+
+    @property
+    def affected(self) -> int:
+        return len(self.reassigned) + len(self.unassigned)
+
+
+async def plan_reassignments(therapist, appointments) -> list:
+    """
+    A replacement for each appointment: the availability matrix of every
+    active therapist of the patient's gender over all the appointments
+    (one schedule-store pass), then per appointment the free candidate
+    that fragments their day least (services.assignment). Candidates are
+    not given two overlapping appointments within the plan.
+    """
+    candidates = [t for t in await db.get_therapists(active_only=True) if t.id != therapist.id]
+    matrix = await db.get_availability_matrix(
+        [t.id for t in candidates], [(appt.start_dt, appt.duration_min) for appt in appointments]
+    )
+    planned: Dict[int, List[tuple]] = {}
+    plan = []
+    for i, appt in enumerate(appointments):
+        free = [
+            t for t in candidates
+            if t.gender == appt.patient_gender and matrix[t.id][i]
+            and not any(start < appt.end and appt.start < end for start, end in planned.get(t.id, ()))
+        ]
+        choice = await pick_therapist(free, appt.start_dt, appt.duration_min) if free else None
+        if choice:
+            planned.setdefault(choice.id, []).append((appt.start, appt.end))
+        plan.append((appt, choice))
+    return plan
+
+
+async def reassign_for_leave(therapist_id: int, start_iso: str, end_iso: str,
+                             schedule_reminder: Optional[Callable] = None, app=None) -> LeaveImpact:
+    """
+    Deal with the confirmed bookings inside a therapist's new leave window:
+    find them with one indexed range query, move each to a free therapist
+    of the patient's gender in one transaction, re-register the reminders of
+    the moved ones (they carry the therapist's name), and queue a message to
+    every affected patient in the notification outbox.
+    """
+    therapist = await db.get_therapist(therapist_id)
+    appointments = await db.get_therapist_appointments_between(therapist_id, start_iso, end_iso)
+    if not appointments:
+        return LeaveImpact(therapist, [], [])
+
+    plan = await plan_reassignments(therapist, appointments)
+    moved = set(await db.reassign_appointments([(appt.id, choice.id) for appt, choice in plan if choice]))
+    reassigned = [(appt, choice) for appt, choice in plan if choice and appt.id in moved]
+    unassigned = [appt for appt, choice in plan if appt.id not in moved]
+
+    if schedule_reminder and app:
+        reminders = []
+        for appt, choice in reassigned:
+            job_id = schedule_reminder(app, appt.id, appt.user_id, appt.user_name, choice.name, appt.start_dt)
+            if job_id:
+                reminders.append((appt.id, job_id))
+        await db.set_reminder_jobs(reminders)
+
+    messages = [
+        (appt.user_id,
+         f"ℹ️ Perubahan terapis\n\n"
+         f"Janji {appt.user_name} pada {format_datetime_id(appt.start_dt)} sekarang ditangani oleh "
+         f"{choice.name}, karena {therapist.name} berhalangan. Waktu janji tidak berubah.")
+        for appt, choice in reassigned
+    ]
+    messages += [
+        (appt.user_id,
+         f"⚠️ Terapis berhalangan\n\n"
+         f"{therapist.name} berhalangan pada janji {appt.user_name}, {format_datetime_id(appt.start_dt)}, "
+         f"dan belum ada terapis pengganti. Admin akan menghubungi Anda, atau batalkan lewat menu "
+         f"📋 Janji Saya lalu buat janji baru.")
+        for appt in unassigned
+    ]
+    await db.enqueue_notifications("leave", messages)
+
+    logger.info("Leave of therapist %s: %s appointments affected, %s reassigned, %s without replacement",
+                therapist_id, len(appointments), len(reassigned), len(unassigned))
+    return LeaveImpact(therapist, reassigned, unassigned)
@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from database.db import db
+from services.slot_engine import open_day
+from utils.datetime_helper import JAKARTA_TZ, from_iso
+
+# Rule code -> label shown to the patient.
+RULES = {
+    "weekly": "Setiap minggu",
+    "biweekly": "Setiap 2 minggu",
+    "sunnah": "Setiap tanggal sunnah (17, 19, 21 Hijriah)",
+}
+
+_STEP_DAYS = {"weekly": 7, "biweekly": 14}
+
+
+def expand_dates(rule: str, first: date, count: int) -> List[date]:
+    """The first `count` dates of a series starting on `first` (always the first occurrence)."""
+    if rule in _STEP_DAYS:
+        return [first + timedelta(days=_STEP_DAYS[rule] * i) for i in range(count)]
+    if rule == "sunnah":
+        from utils.hijri_helper import get_sunnah_dates_from
+        return [first] + get_sunnah_dates_from(first + timedelta(days=1), count - 1)
+    raise ValueError(f"unknown recurrence rule: {rule!r}")
+
+
+def expand_starts(rule: str, first_start: str, count: int) -> List[str]:
+    """Occurrence starts (ISO, Jakarta time) of a series: the first start's time of day on every rule date."""
+    start_dt = from_iso(first_start).astimezone(JAKARTA_TZ)
+    return [datetime.combine(day, start_dt.timetz()).isoformat()
+            for day in expand_dates(rule, start_dt.date(), count)]
+
+
+async def plan_series(therapist_id: int, starts: List[str], duration_min: int) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Split a series into bookable starts and conflicts with their reason:
+    closed days, times outside the day's opening hours or inside prayer
+    blocks, and the therapist's busy time, the last checked for every
+    occurrence in one schedule-store call. Returns (free starts,
+    [(start, reason), ...]).
+    """
+    open_starts, conflicts = [], []
+    for start in starts:
+        start_dt = from_iso(start)
+        day = start_dt.date()
+        if await db.is_weekly_holiday(day) or await db.is_date_holiday(day):
+            conflicts.append((start, "libur"))
+        elif not (await open_day(day, duration_min)).accepts(int(start_dt.timestamp())):
+            conflicts.append((start, "di luar jam layanan"))
+        else:
+            open_starts.append(start)
+
+    busy = set(await db.get_series_conflicts(therapist_id, open_starts, duration_min))
+    conflicts.extend((start, "terapis sudah terisi") for start in open_starts if start in busy)
+    conflicts.sort()
+    return [start for start in open_starts if start not in busy], conflicts
@@ -0,0 +1,127 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional
+
+from database.db import db
+from services.earliest_slots import free_intervals
+from services.slot_engine import open_day
+from utils.datetime_helper import JAKARTA_TZ, format_datetime_id, from_iso, now_jakarta
+
+logger = logging.getLogger(__name__)
+
+# How many days either side of the requested one alternatives are looked for.
+SEARCH_DAYS = 7
+ALTERNATIVES = 3
+
+
+class RescheduleResult:
+    """Outcome of a reschedule: moved, or the reason it was refused and the nearest free starts (ISO) instead."""
+
+    __slots__ = ("moved", "reason", "alternatives")
+
+    def __init__(self, moved: bool, reason: Optional[str] = None, alternatives: Optional[List[str]] = None):
+        self.moved = moved
+        self.reason = reason
+        self.alternatives = alternatives or []
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, JAKARTA_TZ).isoformat()
+
+
+async def _free_starts(appt, day: date) -> List[int]:
+    """
+    Feasible starts (Unix seconds) of the appointment's therapist on a day
+    for its length: the gap-fitting pass over their free intervals from the
+    schedule store, the appointment's own current time counting as free.
+    """
+    if await db.is_weekly_holiday(day) or await db.is_date_holiday(day):
+        return []
+    open_ = await open_day(day, appt.duration_min)
+    if not open_.windows:
+        return []
+    window_start, window_end = open_.windows[0][0], open_.windows[-1][1]
+    busy = await db.get_busy_intervals([appt.therapist_id], _iso(window_start), _iso(window_end), ignore=appt.id)
+    return open_.fit(free_intervals(busy[appt.therapist_id], window_start, window_end))[0]
+
+
+async def check_target(appt, start_iso: str) -> Optional[str]:
+    """Why the appointment cannot move to start_iso (a reason for the admin), or None if it can."""
+    if appt.status != 'confirmed' or appt.archived:
+        return "janji tidak aktif"
+    start_dt = from_iso(start_iso)
+    day = start_dt.astimezone(JAKARTA_TZ).date()
+    start = int(start_dt.timestamp())
+    if await db.is_weekly_holiday(day) or await db.is_date_holiday(day):
+        return "hari libur"
+    open_ = await open_day(day, appt.duration_min)
+    if day < now_jakarta().date() or start <= open_.earliest:
+        return "waktu sudah lewat atau terlalu dekat"
+    if any(block_start <= start < block_end for block_start, block_end in open_.blocked):
+        return "waktu sholat"
+    if not open_.accepts(start):
+        return "di luar jam layanan"
+    if not await db.therapist_free(appt.therapist_id, start_iso, appt.duration_min, ignore=appt.id):
+        return "terapis sudah terisi atau cuti"
+    return None
+
+
+async def nearest_alternatives(appt, start_iso: str, limit: int = ALTERNATIVES) -> List[str]:
+    """
+    The `limit` free starts of the appointment's therapist closest to
+    start_iso (other than its current one), sorted by time. Days are taken
+    outwards from the requested one and the search stops as soon as no
+    unvisited day can be closer.
+    """
+    target = int(from_iso(start_iso).timestamp())
+    skip = {target, int(appt.start.timestamp())}
+    day = from_iso(start_iso).astimezone(JAKARTA_TZ).date()
+    found: List[int] = []
+    for offset in range(SEARCH_DAYS + 1):
+        for candidate in {day - timedelta(days=offset), day + timedelta(days=offset)}:
+            found.extend(start for start in await _free_starts(appt, candidate) if start not in skip)
+        found.sort(key=lambda start: abs(start - target))
+        # Every start on a later offset is more than offset days away.
+        if len(found) >= limit and abs(found[limit - 1] - target) <= offset * 86400:
+            break
+    return [_iso(start) for start in sorted(found[:limit])]
+
+
+async def reschedule_appointment(appointment_id: int, start_iso: str, schedule_reminder: Optional[Callable] = None,
+                                 cancel_reminder: Optional[Callable] = None, app=None) -> RescheduleResult:
+    """
+    Move an appointment to start_iso with its therapist, after checking the
+    target against holidays, opening hours, prayer blocks and the
+    therapist's busy time. The row (start and reset reminder state) is
+    written in one statement, then its reminder job is replaced for the
+    new time and the patient is told through the notification outbox. When
+    the target is refused, the nearest free starts come back instead.
+    """
+    appt = await db.get_appointment_by_id(appointment_id)
+    if not appt:
+        return RescheduleResult(False, "janji tidak ditemukan")
+
+    reason = await check_target(appt, start_iso)
+    if reason is None and not await db.move_appointments([(appt.id, appt.therapist_id, start_iso)]):
+        reason = "terapis sudah terisi atau cuti"
+    if reason:
+        alternatives = await nearest_alternatives(appt, start_iso) if appt.status == 'confirmed' and not appt.archived else []
+        return RescheduleResult(False, reason, alternatives)
+
+    job_id = None
+    if schedule_reminder and app:
+        job_id = schedule_reminder(app, appt.id, appt.user_id, appt.user_name, appt.therapist_name, start_iso)
+    if job_id:
+        await db.set_reminder_jobs([(appt.id, job_id)])
+    elif cancel_reminder and appt.reminder_job_id:
+        # Too close for a reminder at the new time; the one for the old time must not fire.
+        cancel_reminder(appt.reminder_job_id)
+
+    await db.enqueue_notifications("reschedule", [(
+        appt.user_id,
+        f"🕒 Jadwal janji diubah\n\n"
+        f"Janji {appt.user_name} dengan {appt.therapist_name} dipindah dari {format_datetime_id(appt.start_dt)} "
+        f"ke {format_datetime_id(start_iso)}. Hubungi admin jika waktu baru tidak cocok."
+    )])
+    logger.info("Appointment %s rescheduled from %s to %s", appt.id, appt.start_dt, start_iso)
+    return RescheduleResult(True)
@@ -0,0 +1,190 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.datetime_helper import JAKARTA_OFFSET
+
+_OFFSET = int(JAKARTA_OFFSET.total_seconds())
+
+
+def local_day(ts: int) -> int:
+    """Jakarta calendar day of a Unix timestamp, as a day number."""
+    return (ts + _OFFSET) // 86400
+
+
+class TherapistSchedule:
+    """
+    One therapist's confirmed appointments as parallel lists sorted by
+    start (Unix seconds). `longest` is the longest appointment ever stored,
+    so every appointment overlapping [start, end) starts inside
+    (start - longest, end): two bisects bound the candidates.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "longest")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[int] = []
+        self.longest = 0
+
+    def add(self, appointment_id: int, start: int, end: int):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, appointment_id)
+        self.longest = max(self.longest, end - start)
+
+    def remove(self, appointment_id: int, start: int):
+        i = bisect_left(self.starts, start)
+        while i < len(self.ids) and self.ids[i] != appointment_id:
+            i += 1
+        if i < len(self.ids):
+            del self.starts[i], self.ends[i], self.ids[i]
+
+    def _candidates(self, start: int, end: int) -> range:
+        return range(bisect_right(self.starts, start - self.longest), bisect_left(self.starts, end))
+
+    def overlaps(self, start: int, end: int, ignore: Optional[int] = None) -> bool:
+        ends, ids = self.ends, self.ids
+        return any(ends[i] > start and ids[i] != ignore for i in self._candidates(start, end))
+
+    def busy(self, start: int, end: int, ignore: Optional[int] = None) -> List[Tuple[int, int]]:
+        starts, ends, ids = self.starts, self.ends, self.ids
+        return [(starts[i], ends[i]) for i in self._candidates(start, end) if ends[i] > start and ids[i] != ignore]
+
+    def neighbours(self, start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+        """End of the appointment just before a free [start, end) and start of the one just after."""
+        i = bisect_left(self.starts, end)
+        before = self.ends[i - 1] if i else None
+        after = self.starts[i] if i < len(self.starts) else None
+        return before, after
+
+
+class ScheduleStore:
+    """
+    In-memory view of every confirmed appointment that has not ended yet and
+    every scheduled therapist leave, per therapist. Database loads it with one
+    query on first use and keeps it current from its own write methods, so
+    conflict checks and busy-time lookups are a couple of bisects with no
+    database round-trip. Other processes' writes are picked up when the
+    coordinator heartbeat sees PRAGMA data_version move and invalidates it.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.data_version: Optional[int] = None
+        self._schedules: Dict[int, TherapistSchedule] = {}
+        # appointment id -> (therapist_id, start, end), to find an entry again on cancel/edit.
+        self._appointments: Dict[int, Tuple[int, int, int]] = {}
+        self._leave: Dict[int, Tuple[int, int]] = {}
+        # (therapist_id, local_day) -> booked seconds, for load balancing.
+        self._day_load: Dict[Tuple[int, int], int] = {}
+        # Last placeholder id handed out by reserve(); negative, so never a row id.
+        self._reservation = 0
+
+    def load(self, appointments: Iterable[Tuple[int, int, int, int]],
+             leave: Iterable[Tuple[int, int, int]], data_version: Optional[int] = None):
+        """appointments: (id, therapist_id, start, end); leave: (therapist_id, start, end)."""
+        self._schedules = {}
+        self._appointments = {}
+        self._day_load = {}
+        by_therapist: Dict[int, List[Tuple[int, int, int]]] = {}
+        for appointment_id, therapist_id, start, end in appointments:
+            by_therapist.setdefault(therapist_id, []).append((start, appointment_id, end))
+            self._appointments[appointment_id] = (therapist_id, start, end)
+            self._count_load(therapist_id, start, end - start)
+        for therapist_id, rows in by_therapist.items():
+            rows.sort()
+            schedule = TherapistSchedule()
+            schedule.starts = [row[0] for row in rows]
+            schedule.ids = [row[1] for row in rows]
+            schedule.ends = [row[2] for row in rows]
+            schedule.longest = max(end - start for start, _, end in rows)
+            self._schedules[therapist_id] = schedule
+        self._leave = {therapist_id: (start, end) for therapist_id, start, end in leave}
+        self.data_version = data_version
+        self.loaded = True
+
+    def invalidate(self):
+        self.loaded = False
+
+    def add(self, appointment_id: int, therapist_id: int, start: int, end: int):
+        """Insert or move an appointment (a confirmed booking, an edit, a re-confirmation)."""
+        self.remove(appointment_id)
+        self._schedules.setdefault(therapist_id, TherapistSchedule()).add(appointment_id, start, end)
+        self._appointments[appointment_id] = (therapist_id, start, end)
+        self._count_load(therapist_id, start, end - start)
+
+    def reserve(self, therapist_id: int, start: int, end: int) -> int:
+        """
+        Hold [start, end) for a booking whose row is not written yet, under a
+        placeholder id. Called right after is_free() with no await in
+        between, so a concurrent booking sees the time as taken; once the
+        INSERT is done the placeholder is remove()d for the real id.
+        """
+        self._reservation -= 1
+        self.add(self._reservation, therapist_id, start, end)
+        return self._reservation
+
+    def remove(self, appointment_id: int):
+        entry = self._appointments.pop(appointment_id, None)
+        if entry:
+            therapist_id, start, end = entry
+            self._schedules[therapist_id].remove(appointment_id, start)
+            self._count_load(therapist_id, start, start - end)
+
+    def _count_load(self, therapist_id: int, start: int, seconds: int):
+        key = (therapist_id, local_day(start))
+        self._day_load[key] = self._day_load.get(key, 0) + seconds
+
+    def span(self, appointment_id: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of a stored appointment."""
+        entry = self._appointments.get(appointment_id)
+        return entry[1:] if entry else None
+
+    def set_leave(self, therapist_id: int, start: int, end: int):
+        self._leave[therapist_id] = (start, end)
+
+    def clear_leave(self, therapist_id: int):
+        self._leave.pop(therapist_id, None)
+
+    def is_free(self, therapist_id: int, start: int, end: int, ignore: Optional[int] = None) -> bool:
+        """`ignore`: an appointment id left out of the check (the one being moved)."""
+        leave = self._leave.get(therapist_id)
+        if leave and leave[0] < end and start < leave[1]:
+            return False
+        schedule = self._schedules.get(therapist_id)
+        return schedule is None or not schedule.overlaps(start, end, ignore)
+
+    def conflicts(self, therapist_id: int, intervals: Iterable[Tuple[int, int]]) -> List[int]:
+        """Positions of the (start, end) intervals that overlap the therapist's busy time, for a whole series at once."""
+        return [i for i, (start, end) in enumerate(intervals) if not self.is_free(therapist_id, start, end)]
+
+    def day_load(self, therapist_id: int, ts: int) -> int:
+        """Seconds booked for the therapist on the Jakarta day of `ts`."""
+        return self._day_load.get((therapist_id, local_day(ts)), 0)
+
+    def neighbours(self, therapist_id: int, start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+        """
+        For a free [start, end): where the therapist's busy time before it
+        ends and where the busy time after it starts (appointments or leave;
+        None when there is none). Two bisects, whatever the schedule size.
+        """
+        schedule = self._schedules.get(therapist_id)
+        before, after = schedule.neighbours(start, end) if schedule else (None, None)
+        leave = self._leave.get(therapist_id)
+        if leave:
+            if leave[1] <= start and (before is None or leave[1] > before):
+                before = leave[1]
+            if leave[0] >= end and (after is None or leave[0] < after):
+                after = leave[0]
+        return before, after
+
+    def busy(self, therapist_id: int, start: int, end: int, ignore: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Appointments (but `ignore`) and leave overlapping [start, end), sorted by start; may overlap each other."""
+        schedule = self._schedules.get(therapist_id)
+        intervals = schedule.busy(start, end, ignore) if schedule else []
+        leave = self._leave.get(therapist_id)
+        if leave and leave[0] < end and start < leave[1]:
+            insort(intervals, leave)
+        return intervals
@@ -0,0 +1,226 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import Config
+from utils.datetime_helper import JAKARTA_TZ, now_jakarta
+
+WEEKDAY_KEYS = {'sen': 0, 'sel': 1, 'rab': 2, 'kam': 3, 'jum': 4, 'sab': 5, 'min': 6}
+CLOSED = ('tutup', '-')
+
+
+class Treatment:
+    """A bookable treatment type and how long a session of it takes."""
+
+    __slots__ = ("name", "minutes")
+
+    def __init__(self, name: str, minutes: int):
+        self.name = name
+        self.minutes = minutes
+
+
+def _minute_of_day(text: str) -> int:
+    hour, _, minute = text.strip().partition(":")
+    value = int(hour) * 60 + int(minute or 0)
+    if not 0 <= value <= 24 * 60:
+        raise ValueError(f"jam di luar 00:00-24:00: {text!r}")
+    return value
+
+
+def parse_opening_hours(spec: str) -> Dict[int, Tuple[Tuple[int, int], ...]]:
+    """
+    'sen=08:00-12:00,13:00-17:00;sab=08:00-12:00;min=tutup' -> {weekday:
+    ((open_minute, close_minute), ...)}. Weekdays left out use the global
+    START_HOUR/END_HOUR and break. Raises ValueError on a malformed entry.
+    """
+    hours = {}
+    for item in spec.split(";"):
+        if not item.strip():
+            continue
+        key, _, ranges = item.partition("=")
+        key = key.strip().lower()[:3]
+        if key not in WEEKDAY_KEYS:
+            raise ValueError(f"hari tidak dikenal: {item.strip()!r}")
+        windows = []
+        if ranges.strip().lower() not in CLOSED:
+            for part in ranges.split(","):
+                opens, _, closes = part.partition("-")
+                window = (_minute_of_day(opens), _minute_of_day(closes))
+                if window[0] >= window[1] or (windows and window[0] < windows[-1][1]):
+                    raise ValueError(f"rentang jam tidak urut: {item.strip()!r}")
+                windows.append(window)
+        hours[WEEKDAY_KEYS[key]] = tuple(windows)
+    return hours
+
+
+def parse_treatments(spec: str) -> List[Treatment]:
+    """'Bekam=40,Bekam + Pijat=60' -> [Treatment, ...]; empty means one 'Bekam' of SESSION_MINUTES."""
+    if not spec.strip():
+        return [Treatment("Bekam", Config.SESSION_MINUTES)]
+    result = []
+    for item in spec.split(","):
+        name, _, minutes = item.rpartition("=")
+        if not name.strip() or int(minutes) < 1:
+            raise ValueError(f"jenis terapi tidak valid: {item.strip()!r}")
+        result.append(Treatment(name.strip(), int(minutes)))
+    return result
+
+
+@lru_cache(maxsize=1)
+def treatments() -> List[Treatment]:
+    return parse_treatments(Config.TREATMENTS)
+
+
+@lru_cache(maxsize=1)
+def _opening_hours() -> Dict[int, Tuple[Tuple[int, int], ...]]:
+    return parse_opening_hours(Config.OPENING_HOURS)
+
+
+@lru_cache(maxsize=7)
+def opening_windows(weekday: int) -> Tuple[Tuple[int, int], ...]:
+    """Open windows of a weekday as (open_minute, close_minute) pairs."""
+    configured = _opening_hours()
+    if weekday in configured:
+        return configured[weekday]
+    opens, closes = Config.START_HOUR * 60, Config.END_HOUR * 60
+    break_start, break_end = Config.BREAK_START_HOUR * 60, Config.BREAK_END_HOUR * 60
+    windows = ((opens, min(closes, break_start)), (max(opens, break_end), closes))
+    return tuple(window for window in windows if window[0] < window[1])
+
+
+@lru_cache(maxsize=64)
+def day_template(weekday: int, duration_min: int) -> Tuple[int, ...]:
+    """
+    Grid starts (minute of day) of a weekday for a session of `duration_min`:
+    every INTERVAL_MINUTES from each window's opening, as long as the whole
+    session ends by the window's close. Built once per (weekday, duration).
+    """
+    starts = []
+    for opens, closes in opening_windows(weekday):
+        starts.extend(range(opens, closes - duration_min + 1, Config.INTERVAL_MINUTES))
+    return tuple(starts)
+
+
+class OpenDay:
+    """
+    One date's bookable time for one session length, in Unix seconds: open
+    windows, the grid starts that fit them (after the booking buffer and
+    outside prayer blocks), and the checks to fit a start into a therapist's
+    free gaps.
+    """
+
+    __slots__ = ("day_start", "day_end", "duration", "windows", "blocked", "earliest", "grid")
+
+    def __init__(self, date_obj: date, duration_min: int, blocked: Sequence[Tuple[int, int]] = (),
+                 now: Optional[datetime] = None, closed: bool = False):
+        now = now or now_jakarta()
+        # JAKARTA_TZ is a fixed offset, so every day is 86400 seconds long.
+        self.day_start = int(datetime.combine(date_obj, time(), tzinfo=JAKARTA_TZ).timestamp())
+        self.day_end = self.day_start + 86400
+        self.duration = duration_min * 60
+        self.blocked = tuple(blocked)
+        if closed or date_obj < now.date():
+            self.windows = ()
+        else:
+            self.windows = tuple((self.day_start + o * 60, self.day_start + c * 60)
+                                 for o, c in opening_windows(date_obj.weekday()))
+        if date_obj == now.date():
+            self.earliest = int((now + timedelta(minutes=Config.MIN_BOOKING_BUFFER_MINUTES)).timestamp())
+        else:
+            self.earliest = self.day_start
+        self.grid = [ts for ts in (self.day_start + m * 60 for m in day_template(date_obj.weekday(), duration_min))
+                     if ts > self.earliest and not self._in_prayer(ts)] if self.windows else []
+
+    def _in_prayer(self, ts: int) -> bool:
+        return any(start <= ts < end for start, end in self.blocked)
+
+    def accepts(self, ts: int) -> bool:
+        """A start off the grid: after the buffer, outside prayer blocks, and the session fits a window."""
+        if ts <= self.earliest or self._in_prayer(ts):
+            return False
+        return any(opens <= ts and ts + self.duration <= closes for opens, closes in self.windows)
+
+    def fit(self, free: Sequence[Tuple[int, int]], gap: int = 0) -> Tuple[List[int], int]:
+        """
+        Gap-fitting: feasible starts within a therapist's sorted free gaps,
+        from `free[gap]` on. A gap offers its own start (right after an
+        appointment or leave ends, so a longer session does not strand the
+        minutes up to the next grid start) and every grid start whose whole
+        session fits before the gap closes. Returns the starts and the first
+        gap still open at the end of the day, so callers walking day by day
+        never revisit a gap.
+        """
+        grid, duration = self.grid, self.duration
+        starts = []
+        while gap < len(free) and free[gap][0] < self.day_end:
+            opens, closes = free[gap]
+            if opens > self.day_start and opens + duration <= closes and self.accepts(opens):
+                starts.append(opens)
+            i = bisect_left(grid, opens)
+            while i < len(grid) and grid[i] + duration <= closes:
+                if grid[i] != opens:
+                    starts.append(grid[i])
+                i += 1
+            if closes > self.day_end:
+                break
+            gap += 1
+        return starts, gap
+
+
+async def prayer_blocks(date_obj: date) -> List[Tuple[int, int]]:
+    """Prayer blocks of a date as Unix-second ranges; none if prayer times are unavailable."""
+    try:
+        from utils.prayer_times import get_blocked_time_ranges
+        return [(int(start.timestamp()), int(end.timestamp())) for start, end in await get_blocked_time_ranges(date_obj)]
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).warning(f"Could not filter by prayer times: {e}")
+        return []
+
+
+async def open_day(date_obj: date, duration_min: Optional[int] = None) -> OpenDay:
+    duration_min = duration_min or Config.SESSION_MINUTES
+    if date_obj < now_jakarta().date() or not day_template(date_obj.weekday(), duration_min):
+        return OpenDay(date_obj, duration_min)
+    return OpenDay(date_obj, duration_min, await prayer_blocks(date_obj))
+
+
+async def _fit_therapists(day: OpenDay, therapist_ids: List[int]) -> Dict[int, List[int]]:
+    from database.db import db
+    from services.earliest_slots import free_intervals
+
+    if not day.windows:
+        return {therapist_id: [] for therapist_id in therapist_ids}
+    window_start = day.windows[0][0]
+    window_end = day.windows[-1][1]
+    busy = await db.get_busy_intervals(therapist_ids, _iso(window_start), _iso(window_end))
+    return {therapist_id: day.fit(free_intervals(busy[therapist_id], window_start, window_end))[0]
+            for therapist_id in therapist_ids}
+
+
+async def therapist_starts(therapist_ids: List[int], date_obj: date,
+                           duration_min: Optional[int] = None) -> Dict[int, List[int]]:
+    """
+    Feasible session starts (Unix seconds) of each therapist on a date: one
+    busy-time lookup from the schedule store per therapist and a single pass
+    over their free gaps, instead of a conflict check per grid start.
+    """
+    return await _fit_therapists(await open_day(date_obj, duration_min), therapist_ids)
+
+
+async def bookable_starts(therapist_ids: List[int], date_obj: date, duration_min: Optional[int] = None) -> List[str]:
+    """
+    The time picker's choices: every grid start of the date (a full one
+    still leads to the waitlist) plus the off-grid gap starts where one of
+    the therapists fits a session, as sorted ISO strings.
+    """
+    day = await open_day(date_obj, duration_min)
+    starts = set(day.grid)
+    for fits in (await _fit_therapists(day, therapist_ids)).values():
+        starts.update(fits)
+    return [_iso(ts) for ts in sorted(starts)]
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, JAKARTA_TZ).isoformat()
@@ -0,0 +1,133 @@
+import asyncio
+import hmac
+import logging
+from typing import List, Optional
+
+from telegram import Update
+from telegram.ext import Application
+
+from utils.http_server import HTTPRequest, HTTPResponse, server_port, start_http_server
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookServer:
+    """
+    Receives Telegram webhook POSTs and feeds them to the Application.
+
+    Updates are sharded by chat id over a fixed number of workers, each with
+    its own bounded queue, so one chat's updates stay in order while different
+    chats are processed in parallel. When a shard's queue is full the request
+    is answered 503 + Retry-After and Telegram redelivers it later instead of
+    the bot buffering without limit. stop() closes the listener first and then
+    drains whatever was already accepted.
+    """
+
+    def __init__(self, application: Application, host: str, port: int, path: str = "/",
+                 secret_token: Optional[str] = None, queue_size: int = 1000, workers: int = 4,
+                 retry_after: int = 1):
+        self.application = application
+        self.host = host
+        self.port = port
+        self.path = path or "/"
+        self.secret_token = secret_token
+        self.retry_after = retry_after
+        self.workers = max(1, workers)
+        shard_size = max(1, queue_size // self.workers)
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=shard_size) for _ in range(self.workers)]
+
+        self.server = None
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.rejected = 0
+        self.failed = 0
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker(q), name=f"webhook-worker-{i}")
+                       for i, q in enumerate(self.queues)]
+        self.server = await start_http_server(self._handle, self.host, self.port)
+        self.port = server_port(self.server)
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path} ({self.workers} workers)")
+
+    async def stop(self, drain_timeout: float = 30.0, close_timeout: float = 5.0):
+        if self.server:
+            self.server.close()
+            try:
+                # wait_closed() also waits for open keep-alive connections; don't let an idle client hold shutdown.
+                await asyncio.wait_for(self.server.wait_closed(), close_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Webhook server close timed out; idle client connections left open")
+            self.server = None
+
+        pending = sum(q.qsize() for q in self.queues)
+        if pending:
+            logger.info(f"Draining {pending} queued webhook updates...")
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self.queues)), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Webhook drain timed out; {sum(q.qsize() for q in self.queues)} updates dropped")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Webhook server stopped (accepted={self.accepted}, rejected={self.rejected}, failed={self.failed})")
+
+    def _shard(self, update: Update) -> int:
+        if update.effective_chat:
+            key = update.effective_chat.id
+        elif update.effective_user:
+            key = update.effective_user.id
+        else:
+            key = update.update_id
+        return key % self.workers
+
+    async def _handle(self, request: HTTPRequest) -> HTTPResponse:
+        if request.path != self.path:
+            return HTTPResponse(404, b"not found")
+        if request.method != "POST":
+            return HTTPResponse(405, b"method not allowed")
+
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, "").encode(), self.secret_token.encode()
+        ):
+            logger.warning("Webhook request with missing or wrong secret token rejected")
+            return HTTPResponse(403, b"forbidden")
+
+        try:
+            update = Update.de_json(request.json(), self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning("Malformed webhook payload: %s", e)
+            return HTTPResponse(400, b"bad update")
+        if update is None:
+            return HTTPResponse(400, b"bad update")
+
+        try:
+            self.queues[self._shard(update)].put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return HTTPResponse(503, b"busy", headers={"Retry-After": str(self.retry_after)})
+
+        self.accepted += 1
+        return HTTPResponse(200, b"")
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            update = await queue.get()
+            try:
+                await self.application.process_update(update)
+            except Exception as e:
+                self.failed += 1
+                logger.error("Error processing webhook update %s: %s", update.update_id, e, exc_info=True)
+            finally:
+                queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "queued": [q.qsize() for q in self.queues],
+        }
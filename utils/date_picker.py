@@ -1,8 +1,11 @@
 import calendar
 from datetime import date, timedelta
-from typing import List, Set, Tuple
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
 from telegram import InlineKeyboardButton
 
+from utils.datetime_helper import now_jakarta
+
 MONTH_NAMES_ID = [
     'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
     'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember'
@@ -18,49 +21,82 @@ def get_prev_month(year: int, month: int) -> Tuple[int, int]:
         return year - 1, 12
     return year, month - 1
 
-def create_calendar_keyboard(year: int, month: int, available_dates: Set[date], max_date: date) -> Tuple[List[List[InlineKeyboardButton]], str]:
-    cal = calendar.monthcalendar(year, month)
-    today = date.today()
-    
-    header_text = f"📅 *{MONTH_NAMES_ID[month-1]} {year}*"
-    
-    kb = []
-    
-    day_headers = ['Sen', 'Sel', 'Rab', 'Kam', 'Jum', 'Sab', 'Min']
-    header_row = [InlineKeyboardButton(day, callback_data="cal_noop") for day in day_headers]
-    kb.append(header_row)
+# Buttons are immutable, so one instance can sit in any number of keyboards.
+HEADER_ROW = tuple(InlineKeyboardButton(day, callback_data="cal_noop") for day in ['Sen', 'Sel', 'Rab', 'Kam', 'Jum', 'Sab', 'Min'])
+BLANK_BUTTON = InlineKeyboardButton(" ", callback_data="cal_noop")
+
+# Day cell states, indexes into MonthTemplate day variants.
+DAY_AVAILABLE, DAY_UNAVAILABLE, DAY_OUT_OF_RANGE = 0, 1, 2
+
+
+class MonthTemplate:
+    """
+    The parts of a month keyboard that never change: header text, weekday
+    row, blank cells, the three prebuilt buttons of every day (available,
+    full/closed, outside the booking window) and the navigation buttons.
+    Rendering only picks one variant per day.
+    """
+    __slots__ = ("year", "month", "header_text", "weeks", "prev_button", "next_button", "first_day")
+
+    def __init__(self, year: int, month: int):
+        self.year = year
+        self.month = month
+        self.header_text = f"📅 *{MONTH_NAMES_ID[month-1]} {year}*"
+        self.first_day = date(year, month, 1)
+        self.weeks = tuple(
+            tuple(
+                BLANK_BUTTON if day == 0 else (
+                    date(year, month, day),
+                    (
+                        InlineKeyboardButton(str(day), callback_data=f"date_{date(year, month, day).isoformat()}"),
+                        InlineKeyboardButton(f"[{day}]", callback_data="cal_noop"),
+                        InlineKeyboardButton(f"({day})", callback_data="cal_noop"),
+                    )
+                )
+                for day in week
+            )
+            for week in calendar.monthcalendar(year, month)
+        )
+        self.prev_button = InlineKeyboardButton("◀ Sebelumnya", callback_data=f"cal_prev_{year}_{month}")
+        self.next_button = InlineKeyboardButton("Berikutnya ▶", callback_data=f"cal_next_{year}_{month}")
+
+
+@lru_cache(maxsize=48)
+def month_template(year: int, month: int) -> MonthTemplate:
+    """Shared by the patient calendar and the admin holiday calendar."""
+    return MonthTemplate(year, month)
+
+
+def create_calendar_keyboard(year: int, month: int, available_dates: Set[date], max_date: date,
+                             today: Optional[date] = None) -> Tuple[List[List[InlineKeyboardButton]], str]:
+    template = month_template(year, month)
+    if today is None:
+        today = now_jakarta().date()
     
-    for week in cal:
+    kb = [list(HEADER_ROW)]
+    for week in template.weeks:
         week_row = []
-        for i, day in enumerate(week):
-            if day == 0:
-                week_row.append(InlineKeyboardButton(" ", callback_data="cal_noop"))
+        for cell in week:
+            if cell is BLANK_BUTTON:
+                week_row.append(cell)
+                continue
+            current_date, variants = cell
+            if current_date in available_dates:
+                week_row.append(variants[DAY_AVAILABLE])
+            elif current_date < today or current_date > max_date:
+                week_row.append(variants[DAY_OUT_OF_RANGE])
             else:
-                current_date = date(year, month, day)
-                
-                if current_date in available_dates:
-                    label = str(day)
-                    callback = f"date_{current_date.isoformat()}"
-                elif current_date < today or current_date > max_date:
-                    label = f"({day})"
-                    callback = "cal_noop"
-                else:
-                    label = f"[{day}]"
-                    callback = "cal_noop"
-                
-                week_row.append(InlineKeyboardButton(label, callback_data=callback))
-        
+                week_row.append(variants[DAY_UNAVAILABLE])
         kb.append(week_row)
     
     nav_row = []
     if (year, month) > (today.year, today.month):
-        nav_row.append(InlineKeyboardButton("◀ Sebelumnya", callback_data=f"cal_prev_{year}_{month}"))
+        nav_row.append(template.prev_button)
     
-    if date(year, month, 1) < max_date:
-        next_year, next_month = get_next_month(year, month)
-        nav_row.append(InlineKeyboardButton("Berikutnya ▶", callback_data=f"cal_next_{year}_{month}"))
+    if template.first_day < max_date:
+        nav_row.append(template.next_button)
     
     if nav_row:
         kb.append(nav_row)
     
-    return kb, header_text
+    return kb, template.header_text
@@ -1,30 +1,61 @@
-import pytz
-from datetime import datetime, timedelta, date
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone, date
+from functools import lru_cache
+from typing import List, Optional, Union
+from zoneinfo import ZoneInfo
 
-JAKARTA_TZ = pytz.timezone('Asia/Jakarta')
+# Asia/Jakarta has had no DST or offset change since 1964, so its current
+# zoneinfo offset is used as a fixed offset: conversions are a plain
+# replace()/astimezone() with no per-call tz database lookup.
+JAKARTA_OFFSET = ZoneInfo('Asia/Jakarta').utcoffset(datetime(2000, 1, 1))
+JAKARTA_TZ = timezone(JAKARTA_OFFSET, 'WIB')
 WEEKDAY_NAMES_ID = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
 
+# Slot timestamps repeat constantly (same few days x same slot grid), so
+# parsed and formatted values are memoized; datetimes are immutable and safe to share.
+ISO_CACHE_SIZE = 4096
+
 def now_jakarta() -> datetime:
     return datetime.now(JAKARTA_TZ)
 
+@lru_cache(maxsize=ISO_CACHE_SIZE)
+def _parse_iso(iso_str: str) -> datetime:
+    dt = datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+    if dt.tzinfo is None or dt.utcoffset() == JAKARTA_OFFSET:
+        return dt.replace(tzinfo=JAKARTA_TZ)
+    return dt.astimezone(JAKARTA_TZ)
+
 def from_iso(iso_str: str) -> datetime:
     if not iso_str:
         return now_jakarta()
-    dt = datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-    if dt.tzinfo is None:
-        return JAKARTA_TZ.localize(dt)
+    return _parse_iso(iso_str)
+
+def _jakarta(dt: datetime) -> datetime:
+    # Aware datetimes compare (and hash) by instant, so the format caches must
+    # only ever see one offset or 10:00+07:00 could come back as 03:00 UTC's string.
+    if dt.tzinfo is None or dt.tzinfo is JAKARTA_TZ:
+        return dt
     return dt.astimezone(JAKARTA_TZ)
 
-def format_datetime_id(iso_str: str) -> str:
-    dt = from_iso(iso_str)
+@lru_cache(maxsize=ISO_CACHE_SIZE)
+def _format_id(dt: datetime) -> str:
     weekday = WEEKDAY_NAMES_ID[dt.weekday()]
     return f"{weekday}, {dt.day:02d}-{dt.month:02d}-{dt.year} pukul {dt.hour:02d}:{dt.minute:02d} WIB"
 
-def format_datetime_short(iso_str: str) -> str:
-    dt = from_iso(iso_str)
+@lru_cache(maxsize=ISO_CACHE_SIZE)
+def _format_short(dt: datetime) -> str:
     return f"{dt.day:02d}-{dt.month:02d}-{dt.year} {dt.hour:02d}:{dt.minute:02d}"
 
+def format_datetime_id(iso_str: Union[str, datetime]) -> str:
+    return _format_id(_jakarta(iso_str) if isinstance(iso_str, datetime) else from_iso(iso_str))
+
+def format_datetime_short(iso_str: Union[str, datetime]) -> str:
+    return _format_short(_jakarta(iso_str) if isinstance(iso_str, datetime) else from_iso(iso_str))
+
+def iso_cache_info() -> dict:
+    """Hit/miss counters of the parse and format caches."""
+    return {name: fn.cache_info()._asdict()
+            for name, fn in (("parse", _parse_iso), ("format_id", _format_id), ("format_short", _format_short))}
+
 def format_date_id(date_obj: date, include_year: bool = False) -> str:
     weekday = WEEKDAY_NAMES_ID[date_obj.weekday()]
     if include_year:
@@ -46,35 +77,13 @@ def overlaps(start1: datetime, duration1: int, start2_iso: str, duration2: int)
     end2 = start2 + timedelta(minutes=duration2)
     return start1 < end2 and start2 < end1
 
-async def generate_time_slots(date_obj: date) -> List[str]:
-    from config import Config
-    
-    now = now_jakarta()
-    today = now.date()
-    
-    if date_obj < today:
-        return []
-    
-    slots = []
-    current_dt = JAKARTA_TZ.localize(datetime.combine(date_obj, datetime.min.time()))
-    current_dt = current_dt.replace(hour=Config.START_HOUR, minute=0, second=0, microsecond=0)
-    end_dt = current_dt.replace(hour=Config.END_HOUR, minute=0)
-    
-    while current_dt < end_dt:
-        if current_dt.hour < Config.BREAK_START_HOUR or current_dt.hour >= Config.BREAK_END_HOUR:
-            if date_obj == today:
-                if current_dt > now + timedelta(minutes=Config.MIN_BOOKING_BUFFER_MINUTES):
-                    slots.append(current_dt.isoformat())
-            else:
-                slots.append(current_dt.isoformat())
-        
-        current_dt += timedelta(minutes=Config.INTERVAL_MINUTES)
-    
-    try:
-        from utils.prayer_times import filter_slots_by_prayer_times
-        slots = await filter_slots_by_prayer_times(slots)
-    except Exception as e:
-        import logging
-        logging.getLogger(__name__).warning(f"Could not filter by prayer times: {e}")
+async def generate_time_slots(date_obj: date, duration_min: Optional[int] = None) -> List[str]:
+    """
+    Grid starts of a date where a session of `duration_min` (SESSION_MINUTES
+    by default) fits the day's opening hours, outside prayer blocks and the
+    booking buffer. The per-weekday templates live in services.slot_engine.
+    """
+    from services.slot_engine import open_day
     
-    return slots
+    day = await open_day(date_obj, duration_min)
+    return [datetime.fromtimestamp(ts, JAKARTA_TZ).isoformat() for ts in day.grid]
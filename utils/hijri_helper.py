@@ -1,7 +1,8 @@
 from hijri_converter import Hijri, Gregorian
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta
 from typing import List, Dict, Optional
-import pytz
+
+from utils.datetime_helper import now_jakarta
 
 # Nama-nama bulan Hijriyah (bahasa Indonesia)
 HIJRI_MONTHS_ID = [
@@ -17,9 +18,8 @@ def get_upcoming_sunnah_date(today: Optional[date] = None) -> Optional[Dict]:
     """
     Mengambil tanggal bekam sunnah berikutnya berdasarkan waktu Asia/Jakarta.
     """
-    jakarta = pytz.timezone("Asia/Jakarta")
     if today is None:
-        today = datetime.now(jakarta).date()
+        today = now_jakarta().date()
 
     for days_ahead in range(0, 90):  # cek 3 bulan ke depan
         check_date = today + timedelta(days=days_ahead)
@@ -41,8 +41,7 @@ def get_days_until_next_sunnah(sunnah_date: Optional[Dict] = None) -> int:
     Menghitung berapa hari lagi menuju tanggal bekam sunnah berikutnya.
     Sekarang menggunakan hasil dari get_upcoming_sunnah_date() agar sinkron.
     """
-    jakarta = pytz.timezone("Asia/Jakarta")
-    today = datetime.now(jakarta).date()
+    today = now_jakarta().date()
 
     if not sunnah_date:
         sunnah_date = get_upcoming_sunnah_date(today)
@@ -57,8 +56,7 @@ def get_next_sunnah_dates(months_ahead: int = 1) -> List[Dict]:
     """
     Mengembalikan daftar semua tanggal bekam sunnah dalam rentang bulan tertentu.
     """
-    jakarta = pytz.timezone("Asia/Jakarta")
-    today = datetime.now(jakarta).date()
+    today = now_jakarta().date()
     end_date = today + timedelta(days=months_ahead * 30)
 
     sunnah_dates = []
@@ -81,6 +79,27 @@ def get_next_sunnah_dates(months_ahead: int = 1) -> List[Dict]:
     return sunnah_dates
 
 
+def get_sunnah_dates_from(start: date, count: int) -> List[date]:
+    """
+    Mengembalikan `count` tanggal bekam sunnah pertama mulai dari `start`
+    (termasuk), dihitung langsung per bulan Hijriyah tanpa memeriksa tiap hari.
+    """
+    hijri = Gregorian.fromdate(start).to_hijri()
+    year, month = hijri.year, hijri.month
+    result = []
+    while len(result) < count:
+        for day in SUNNAH_DAYS:
+            try:
+                gregorian = Hijri(year, month, day).to_gregorian()
+            except OverflowError:
+                # Di luar rentang kalender yang didukung hijri-converter.
+                return result
+            if gregorian >= start and len(result) < count:
+                result.append(date(gregorian.year, gregorian.month, gregorian.day))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+
 def format_sunnah_notification(sunnah_date: Dict) -> str:
     """
     Format pesan pengingat untuk hari bekam sunnah.
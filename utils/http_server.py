@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPRequest:
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8")) if self.body else None
+
+    def form(self) -> Dict[str, str]:
+        """Decode an application/x-www-form-urlencoded or multipart/form-data body (text fields only)."""
+        content_type = self.headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            return _parse_multipart(self.body, content_type)
+        if content_type.startswith("application/json"):
+            data = self.json() or {}
+            return {k: v if isinstance(v, str) else json.dumps(v) for k, v in data.items()}
+        return dict(parse_qsl(self.body.decode("utf-8"), keep_blank_values=True))
+
+
+class HTTPResponse:
+    __slots__ = ("status", "body", "content_type", "headers")
+
+    def __init__(self, status: int = 200, body: bytes = b"", content_type: str = "text/plain; charset=utf-8",
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, payload, status: int = 200, headers: Optional[Dict[str, str]] = None) -> "HTTPResponse":
+        return cls(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+
+Handler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+
+def _parse_multipart(body: bytes, content_type: str) -> Dict[str, str]:
+    boundary = None
+    for part in content_type.split(";"):
+        part = part.strip()
+        if part.startswith("boundary="):
+            boundary = part[len("boundary="):].strip('"')
+    if not boundary:
+        return {}
+
+    fields = {}
+    for chunk in body.split(b"--" + boundary.encode()):
+        if b"\r\n\r\n" not in chunk:
+            continue
+        raw_headers, value = chunk.split(b"\r\n\r\n", 1)
+        if value.endswith(b"\r\n"):
+            value = value[:-2]
+        disposition = ""
+        for line in raw_headers.decode("utf-8", "replace").split("\r\n"):
+            if line.lower().startswith("content-disposition:"):
+                disposition = line
+        if "filename=" in disposition or 'name="' not in disposition:
+            continue
+        name = disposition.split('name="', 1)[1].split('"', 1)[0]
+        fields[name] = value.decode("utf-8", "replace")
+    return fields
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[HTTPRequest]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    method, target, _ = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return HTTPRequest(method.upper(), url.path, dict(parse_qsl(url.query)), headers, body)
+
+
+def _encode_response(response: HTTPResponse, keep_alive: bool) -> bytes:
+    reason = STATUS_TEXT.get(response.status, "OK")
+    lines = [
+        f"HTTP/1.1 {response.status} {reason}",
+        f"Content-Type: {response.content_type}",
+        f"Content-Length: {len(response.body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    lines.extend(f"{name}: {value}" for name, value in response.headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + response.body
+
+
+async def start_http_server(handler: Handler, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+    """
+    Start a minimal HTTP/1.1 server with keep-alive support on the running loop.
+    Enough for local endpoints (metrics, webhook intake, test doubles) without
+    pulling a web framework into the bot's dependencies.
+    """
+
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError):
+                    writer.write(_encode_response(HTTPResponse(400, b"bad request"), False))
+                    break
+                if request is None:
+                    break
+
+                try:
+                    response = await handler(request)
+                except Exception as e:
+                    logger.error(f"Unhandled error serving {request.method} {request.path}: {e}", exc_info=True)
+                    response = HTTPResponse(500, b"internal error")
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                writer.write(_encode_response(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError, asyncio.CancelledError):
+            # Client went away or the loop is shutting down with the connection idle.
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(on_connection, host, port)
+
+
+def server_port(server: asyncio.AbstractServer) -> int:
+    return server.sockets[0].getsockname()[1]
@@ -0,0 +1,32 @@
+import importlib
+from types import ModuleType
+from typing import Optional
+
+
+class LazyHandlers:
+    """
+    Stands in for a handler module at registration time: `admin.foo_callback`
+    returns a callback that imports the module on its first call and then
+    delegates to the real function. Keeps rarely used screens (admin) out of
+    the startup import path.
+    """
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def callback(update, context):
+            return await getattr(self._load(), name)(update, context)
+
+        # Handler metrics are keyed by __name__.
+        callback.__name__ = callback.__qualname__ = name
+        return callback
@@ -0,0 +1,90 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through a fixed fraction of records below WARNING (e.g. 0.1 keeps
+    one in ten); warnings and errors always pass. Deterministic, so counts
+    in the log can be scaled back up by 1/rate.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self._credit = 0.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        self._credit += self.rate
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return True
+        return False
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'jobs.sunnah_notifications.recipients=0.1,utils.foo=0.5' -> {name: rate}"""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            try:
+                rates[name.strip()] = float(rate)
+            except ValueError:
+                continue
+    return rates
+
+
+def setup_logging(log_file: str = 'bot.log', level: str = 'INFO', max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5, sample_rates: Optional[Dict[str, float]] = None) -> QueueListener:
+    """
+    Route all logging through an in-memory queue so callers on the event loop
+    never wait on disk or console I/O. A background QueueListener thread
+    writes to a size-rotated file and stdout.
+    """
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level.upper())
+
+    for name, rate in (sample_rates or {}).items():
+        logging.getLogger(name).addFilter(SamplingFilter(rate))
+
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,349 @@
+import functools
+import inspect
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from telegram.request import HTTPXRequest
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (Prometheus style, +Inf is implicit).
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "total", "max", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class SlowQuery:
+    __slots__ = ("at", "seconds", "sql", "params")
+
+    def __init__(self, seconds: float, sql: str, params: str):
+        self.at = datetime.now()
+        self.seconds = seconds
+        self.sql = sql
+        self.params = params
+
+
+class MetricsRegistry:
+    """
+    In-process latency metrics for handlers, Database methods, outbound
+    Telegram calls and startup phases, plus a ring buffer of slow SQL
+    statements.
+    """
+
+    KINDS = ("handler", "db", "telegram", "startup")
+
+    def __init__(self, slow_query_ms: int = 100, slow_query_log_size: int = 50):
+        self.started_at = datetime.now()
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.series: Dict[str, Dict[str, Histogram]] = {kind: {} for kind in self.KINDS}
+        self.queries = Histogram()
+        self.slow_queries: Deque[SlowQuery] = deque(maxlen=slow_query_log_size)
+        self.slow_query_total = 0
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False):
+        series = self.series[kind]
+        histogram = series.get(name)
+        if histogram is None:
+            histogram = series[name] = Histogram()
+        histogram.observe(seconds, error)
+
+    def observe_query(self, sql: str, params, seconds: float):
+        self.queries.observe(seconds)
+        if seconds >= self.slow_query_seconds:
+            text = " ".join(sql.split())
+            params_text = _format_params(params)
+            self.slow_query_total += 1
+            self.slow_queries.append(SlowQuery(seconds, text, params_text))
+            logger.warning("Slow query (%.1f ms): %s params=%s", seconds * 1000, text, params_text)
+
+    def top(self, kind: str, limit: int = 10) -> List[Tuple[str, Histogram]]:
+        return sorted(self.series[kind].items(), key=lambda item: item[1].total, reverse=True)[:limit]
+
+    def render_summary(self, limit: int = 8) -> str:
+        """Plain-text summary for the admin /stats command."""
+        titles = {"handler": "HANDLER", "db": "DATABASE", "telegram": "TELEGRAM API", "startup": "STARTUP"}
+        lines = [f"Sejak {self.started_at:%d-%m-%Y %H:%M:%S}"]
+        for kind in self.KINDS:
+            lines.append("")
+            lines.append(f"{titles[kind]} (n / p50 / p95 / max ms / err)")
+            rows = self.top(kind, limit)
+            if not rows:
+                lines.append("  -")
+            for name, h in rows:
+                lines.append(
+                    f"  {name[:32]:<32} {h.count:>6} {h.quantile(0.5) * 1000:>7.1f} "
+                    f"{h.quantile(0.95) * 1000:>7.1f} {h.max * 1000:>7.1f} {h.errors:>3}"
+                )
+        lines.append("")
+        lines.append(f"SQL: {self.queries.count} query, {self.slow_query_total} lambat "
+                     f"(>= {self.slow_query_seconds * 1000:.0f} ms)")
+        for q in list(self.slow_queries)[-5:]:
+            lines.append(f"  {q.at:%H:%M:%S} {q.seconds * 1000:.1f} ms {q.sql[:80]} {q.params[:40]}")
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        names = {
+            "handler": ("bekam_handler_seconds", "handler", "Telegram update handler latency"),
+            "db": ("bekam_db_method_seconds", "method", "Database method latency"),
+            "telegram": ("bekam_telegram_request_seconds", "endpoint", "Outbound Telegram Bot API request latency"),
+            "startup": ("bekam_startup_seconds", "phase", "Seconds from start until each startup phase completed"),
+        }
+        out = []
+        for kind in self.KINDS:
+            metric, label, help_text = names[kind]
+            out.append(f"# HELP {metric} {help_text}")
+            out.append(f"# TYPE {metric} histogram")
+            for name, h in sorted(self.series[kind].items()):
+                out.extend(_histogram_lines(metric, f'{label}="{_escape_label(name)}"', h))
+            out.append(f"# HELP {metric[:-len('_seconds')]}_errors_total Calls that raised")
+            out.append(f"# TYPE {metric[:-len('_seconds')]}_errors_total counter")
+            for name, h in sorted(self.series[kind].items()):
+                out.append(f'{metric[:-len("_seconds")]}_errors_total{{{label}="{_escape_label(name)}"}} {h.errors}')
+
+        out.append("# HELP bekam_sql_query_seconds SQL statement latency (execute + fetch)")
+        out.append("# TYPE bekam_sql_query_seconds histogram")
+        out.extend(_histogram_lines("bekam_sql_query_seconds", "", self.queries))
+        out.append("# HELP bekam_sql_slow_queries_total Statements slower than SLOW_QUERY_MS")
+        out.append("# TYPE bekam_sql_slow_queries_total counter")
+        out.append(f"bekam_sql_slow_queries_total {self.slow_query_total}")
+        return "\n".join(out) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(metric: str, labels: str, h: Histogram) -> List[str]:
+    prefix = f"{labels}," if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, n in zip(BUCKETS, h.buckets):
+        cumulative += n
+        lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {h.count}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {h.total:.6f}")
+    lines.append(f"{metric}_count{suffix} {h.count}")
+    return lines
+
+
+def _format_params(params) -> str:
+    if params is None:
+        return "()"
+    text = repr(tuple(params)) if isinstance(params, list) else repr(params)
+    return text if len(text) <= 200 else text[:197] + "..."
+
+
+metrics = MetricsRegistry(Config.SLOW_QUERY_MS, Config.SLOW_QUERY_LOG_SIZE)
+
+
+# --- instrumentation hooks ---
+
+def timed_handler(callback):
+    """Wrap a PTB handler callback so its latency and failures land in the registry."""
+    if getattr(callback, "__wrapped_by_metrics__", False):
+        return callback
+    name = getattr(callback, "__name__", repr(callback))
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        error = False
+        try:
+            return await callback(update, context)
+        except Exception:
+            error = True
+            raise
+        finally:
+            metrics.observe("handler", name, time.perf_counter() - started, error)
+
+    wrapper.__wrapped_by_metrics__ = True
+    return wrapper
+
+
+def instrument_handlers(handler):
+    """Apply timed_handler to every callback in a handler, recursing into ConversationHandler."""
+    from telegram.ext import ConversationHandler
+
+    if isinstance(handler, ConversationHandler):
+        children = list(handler.entry_points) + list(handler.fallbacks)
+        for state_handlers in handler.states.values():
+            children.extend(state_handlers)
+        for child in children:
+            instrument_handlers(child)
+    elif hasattr(handler, "callback"):
+        handler.callback = timed_handler(handler.callback)
+    return handler
+
+
+def timed_methods(cls):
+    """Class decorator: time every public coroutine method under the 'db' series."""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.iscoroutinefunction(value):
+            continue
+        setattr(cls, attr, _timed_method(value))
+    return cls
+
+
+def _timed_method(method):
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        error = False
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            metrics.observe("db", name, time.perf_counter() - started, error)
+
+    return wrapper
+
+
+class TimedCursor:
+    """Cursor proxy that reports execute + fetch time for a statement once."""
+
+    def __init__(self, cursor, sql: str, params, started: float):
+        self._cursor = cursor
+        self._sql = sql
+        self._params = params
+        self._started = started
+        self._pending = True
+
+    def _done(self):
+        if self._pending:
+            self._pending = False
+            metrics.observe_query(self._sql, self._params, time.perf_counter() - self._started)
+
+    async def fetchone(self):
+        try:
+            return await self._cursor.fetchone()
+        finally:
+            self._done()
+
+    async def fetchall(self):
+        try:
+            return await self._cursor.fetchall()
+        finally:
+            self._done()
+
+    async def fetchmany(self, size: Optional[int] = None):
+        try:
+            return await self._cursor.fetchmany(size) if size is not None else await self._cursor.fetchmany()
+        finally:
+            self._done()
+
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._cursor.row_factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    """
+    aiosqlite.Connection proxy feeding the SQL histogram and slow-query log.
+    Statements that return rows are timed until their first fetch, others
+    at the end of execute.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    async def execute(self, sql: str, parameters=None):
+        started = time.perf_counter()
+        cursor = await self._conn.execute(sql, parameters)
+        if cursor.description is None:
+            metrics.observe_query(sql, parameters, time.perf_counter() - started)
+            return cursor
+        return TimedCursor(cursor, sql, parameters, started)
+
+    async def executemany(self, sql: str, parameters):
+        parameters = list(parameters)
+        started = time.perf_counter()
+        try:
+            return await self._conn.executemany(sql, parameters)
+        finally:
+            metrics.observe_query(sql, f"<{len(parameters)} rows>", time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest that records per-endpoint latency of every Bot API call."""
+
+    async def do_request(self, url: str, method: str, request_data=None, *args, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        error = False
+        try:
+            return await super().do_request(url, method, request_data, *args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            metrics.observe("telegram", endpoint, time.perf_counter() - started, error)
+
+
+# --- Prometheus endpoint ---
+
+async def start_metrics_server(host: str, port: int):
+    from utils.http_server import HTTPResponse, server_port, start_http_server
+
+    async def handle(request):
+        if request.method != "GET":
+            return HTTPResponse(405, b"method not allowed")
+        if request.path in ("/metrics", "/"):
+            return HTTPResponse(200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        return HTTPResponse(404, b"not found")
+
+    server = await start_http_server(handle, host, port)
+    logger.info(f"Metrics endpoint listening on http://{host}:{server_port(server)}/metrics")
+    return server
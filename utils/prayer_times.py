@@ -1,5 +1,5 @@
 import httpx
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, time
 from typing import Dict, List, Optional
 from utils.datetime_helper import JAKARTA_TZ, now_jakarta
 import logging
@@ -48,7 +48,7 @@ async def get_prayer_times(city: str = "Jakarta", country: str = "Indonesia", da
     iso_date = _convert_to_iso_date(date_str)
     
     if date_str in _prayer_times_cache:
-        logger.debug(f"Using memory cache for prayer times {date_str}")
+        logger.debug("Using memory cache for prayer times %s", date_str)
         return _prayer_times_cache[date_str]
     
     try:
@@ -56,15 +56,9 @@ async def get_prayer_times(city: str = "Jakarta", country: str = "Indonesia", da
         
         cached_prayer = await db.get_prayer_times_for_date(iso_date)
         if cached_prayer:
-            result = {
-                "Fajr": cached_prayer['fajr'],
-                "Dhuhr": cached_prayer['dhuhr'],
-                "Asr": cached_prayer['asr'],
-                "Maghrib": cached_prayer['maghrib'],
-                "Isha": cached_prayer['isha']
-            }
+            result = cached_prayer.as_dict()
             _prayer_times_cache[date_str] = result
-            logger.debug(f"Using database cache for prayer times {date_str}")
+            logger.debug("Using database cache for prayer times %s", date_str)
             return result
     except Exception as e:
         logger.warning(f"Database cache lookup failed for {date_str}: {e}")
@@ -142,7 +136,7 @@ async def prefetch_prayer_times_bulk(days_ahead: int = 30) -> int:
             
             cached = await db.get_prayer_times_for_date(iso_date)
             if cached:
-                logger.debug(f"Prayer times already cached for {iso_date}, skipping")
+                logger.debug("Prayer times already cached for %s, skipping", iso_date)
                 success_count += 1
                 continue
         except Exception as e:
@@ -198,9 +192,7 @@ def parse_prayer_time(time_str: str, date_obj: date) -> Optional[datetime]:
     """Parse prayer time string (HH:MM) into datetime object."""
     try:
         hour, minute = time_str.split(":")
-        dt = datetime.combine(date_obj, datetime.min.time())
-        dt = dt.replace(hour=int(hour), minute=int(minute))
-        return JAKARTA_TZ.localize(dt)
+        return datetime.combine(date_obj, time(int(hour), int(minute)), tzinfo=JAKARTA_TZ)
     except Exception as e:
         logger.error(f"Error parsing prayer time {time_str}: {e}")
         return None
@@ -212,7 +204,7 @@ async def get_blocked_time_ranges(date_obj: date) -> List[tuple]:
     prayer_times_dict = await get_prayer_times(date_str=date_str)
     
     if not prayer_times_dict:
-        logger.debug(f"No prayer times available for {date_str}, returning empty blocked ranges")
+        logger.debug("No prayer times available for %s, returning empty blocked ranges", date_str)
         return []
     
     blocked_ranges = []
@@ -36,6 +36,27 @@ def is_valid_phone(phone: str) -> Tuple[bool, str]:
     
     return True, ""
 
+def normalize_phone(phone: str) -> str:
+    """Canonical 62xxxxxxxxx form of an Indonesian number; '' if it cannot be parsed."""
+    if not phone:
+        return ""
+    
+    phone_clean = re.sub(r"[\s\-().]", "", phone.strip())
+    
+    if phone_clean.startswith('+62'):
+        phone_clean = phone_clean[3:]
+    elif phone_clean.startswith('62'):
+        phone_clean = phone_clean[2:]
+    elif phone_clean.startswith('0'):
+        phone_clean = phone_clean[1:]
+    else:
+        return ""
+    
+    if not phone_clean.isdigit():
+        return ""
+    
+    return "62" + phone_clean
+
 def is_valid_address(address: str) -> Tuple[bool, str]:
     if not address or len(address.strip()) < 5:
         return False, "Alamat terlalu pendek. Minimal 5 karakter."
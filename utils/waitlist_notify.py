@@ -1,15 +1,17 @@
 import logging
 from telegram.ext import Application
 
+from database.models import Appointment
+
 logger = logging.getLogger(__name__)
 
 
-async def notify_waitlist_for_slot(app: Application, cancelled_appt: dict):
+async def notify_waitlist_for_slot(app: Application, cancelled_appt: Appointment):
     """
     Notify users on waitlist when an appointment is cancelled.
     Currently a placeholder - can be implemented to send notifications to waitlist users.
     """
     try:
-        logger.info(f"Notifying waitlist for cancelled appointment: {cancelled_appt.get('id', 'Unknown')}")
+        logger.info(f"Notifying waitlist for cancelled appointment: {cancelled_appt.id}")
     except Exception as e:
         logger.error(f"Error in notify_waitlist_for_slot: {e}")